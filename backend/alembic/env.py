@@ -39,6 +39,12 @@ target_metadata = Base.metadata
 # Ensure your models are imported so Base.metadata is populated
 from app.models.user import User
 from app.models.appointment import Appointment
+from app.models.resource import Resource
+from app.models.notification_outbox import NotificationOutbox
+from app.models.slot_lock import SlotLock
+from app.models.appointment_series import AppointmentSeries, AppointmentSeriesException
+from app.models.appointment_tombstone import AppointmentTombstone
+from app.models.token_revocation import TokenRevocation
 # ... any other models ...
 
 def run_migrations_offline() -> None:
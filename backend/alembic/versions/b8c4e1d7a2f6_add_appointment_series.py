@@ -0,0 +1,67 @@
+"""add appointment series
+
+Revision ID: b8c4e1d7a2f6
+Revises: f7a3c0d91e45
+Create Date: 2026-10-18 19:02:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c4e1d7a2f6'
+down_revision: Union[str, None] = 'f7a3c0d91e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match BLOCKING_STATUSES in app/models/appointment.py (enum names, in the same order)
+BLOCKING_STATUSES_WHERE = sa.text("status IN ('CONFIRMED', 'PENDING_CONFIRMATION')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('appointment_series',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('service_name', sa.String(length=255), nullable=False),
+    sa.Column('notes', sa.String(length=500), nullable=True),
+    sa.Column('status', sa.Enum('PENDING_CONFIRMATION', 'CONFIRMED', 'CANCELLED_BY_USER', 'CANCELLED_BY_ADMIN', 'COMPLETED', 'NO_SHOW', name='appointmentstatus'), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('freq', sa.String(length=10), nullable=False),
+    sa.Column('interval', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.Column('until', sa.DateTime(), nullable=True),
+    sa.Column('last_end', sa.DateTime(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('resource_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['resource_id'], ['resources.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_appointment_series_id'), 'appointment_series', ['id'], unique=False)
+    op.create_index(
+        'ix_appointment_series_blocking_resource_id_last_end', 'appointment_series',
+        ['resource_id', 'last_end', 'start_time'], unique=False,
+        mssql_where=BLOCKING_STATUSES_WHERE,
+        postgresql_where=BLOCKING_STATUSES_WHERE,
+        sqlite_where=BLOCKING_STATUSES_WHERE,
+    )
+    op.create_index('ix_appointment_series_owner_id_start_time', 'appointment_series', ['owner_id', 'start_time'], unique=False)
+    op.create_table('appointment_series_exceptions',
+    sa.Column('series_id', sa.Integer(), nullable=False),
+    sa.Column('original_start', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['series_id'], ['appointment_series.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('series_id', 'original_start')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('appointment_series_exceptions')
+    op.drop_index('ix_appointment_series_owner_id_start_time', table_name='appointment_series')
+    op.drop_index('ix_appointment_series_blocking_resource_id_last_end', table_name='appointment_series')
+    op.drop_index(op.f('ix_appointment_series_id'), table_name='appointment_series')
+    op.drop_table('appointment_series')
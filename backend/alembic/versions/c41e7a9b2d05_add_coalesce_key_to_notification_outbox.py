@@ -0,0 +1,30 @@
+"""add coalesce key to notification outbox
+
+Revision ID: c41e7a9b2d05
+Revises: 3f6c2d8e41a7
+Create Date: 2026-10-18 10:02:51.107394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a9b2d05'
+down_revision: Union[str, None] = '3f6c2d8e41a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notification_outbox', sa.Column('coalesce_key', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_notification_outbox_coalesce_key'), 'notification_outbox', ['coalesce_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_notification_outbox_coalesce_key'), table_name='notification_outbox')
+    op.drop_column('notification_outbox', 'coalesce_key')
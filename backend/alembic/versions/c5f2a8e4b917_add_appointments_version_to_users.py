@@ -0,0 +1,41 @@
+"""add appointments version to users
+
+Revision ID: c5f2a8e4b917
+Revises: b8c4e1d7a2f6
+Create Date: 2026-10-18 20:14:51.306127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f2a8e4b917'
+down_revision: Union[str, None] = 'b8c4e1d7a2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+APPOINTMENTS_VERSION_DEFAULT = 'DF_users_appointments_version'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name == 'mssql':
+        # Name the default constraint, so downgrade can drop it (SQL Server won't drop a column that has one)
+        op.execute(
+            "ALTER TABLE users ADD appointments_version INTEGER NOT NULL "
+            f"CONSTRAINT {APPOINTMENTS_VERSION_DEFAULT} DEFAULT 0"
+        )
+    else:
+        op.add_column('users', sa.Column('appointments_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('appointments_changed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'appointments_changed_at')
+    if op.get_context().dialect.name == 'mssql':
+        op.drop_constraint(APPOINTMENTS_VERSION_DEFAULT, 'users')
+    op.drop_column('users', 'appointments_version')
@@ -0,0 +1,38 @@
+"""add appointment query indexes
+
+Revision ID: d5e8a1f0b3c2
+Revises: c41e7a9b2d05
+Create Date: 2026-10-18 14:21:37.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a1f0b3c2'
+down_revision: Union[str, None] = 'c41e7a9b2d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match BLOCKING_STATUSES in app/models/appointment.py (enum names, in the same order)
+BLOCKING_STATUSES_WHERE = sa.text("status IN ('CONFIRMED', 'PENDING_CONFIRMATION')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_appointments_owner_id_start_time', 'appointments', ['owner_id', 'start_time'], unique=False)
+    op.create_index(
+        'ix_appointments_blocking_end_time_start_time', 'appointments', ['end_time', 'start_time'], unique=False,
+        mssql_where=BLOCKING_STATUSES_WHERE,
+        postgresql_where=BLOCKING_STATUSES_WHERE,
+        sqlite_where=BLOCKING_STATUSES_WHERE,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_blocking_end_time_start_time', table_name='appointments')
+    op.drop_index('ix_appointments_owner_id_start_time', table_name='appointments')
@@ -0,0 +1,53 @@
+"""add appointment change versions and tombstones
+
+Revision ID: d9e3b6a1f4c8
+Revises: c5f2a8e4b917
+Create Date: 2026-10-18 21:07:12.840573
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e3b6a1f4c8'
+down_revision: Union[str, None] = 'c5f2a8e4b917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANGE_VERSION_DEFAULT = 'DF_appointments_change_version'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows get version 0: a client's first (full) sync picks them up
+    if op.get_context().dialect.name == 'mssql':
+        # Name the default constraint, so downgrade can drop it (SQL Server won't drop a column that has one)
+        op.execute(
+            "ALTER TABLE appointments ADD change_version INTEGER NOT NULL "
+            f"CONSTRAINT {CHANGE_VERSION_DEFAULT} DEFAULT 0"
+        )
+    else:
+        op.add_column('appointments', sa.Column('change_version', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_appointments_owner_id_change_version', 'appointments', ['owner_id', 'change_version'], unique=False)
+    op.create_table('appointment_tombstones',
+    sa.Column('appointment_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('change_version', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('appointment_id')
+    )
+    op.create_index('ix_appointment_tombstones_owner_id_change_version', 'appointment_tombstones', ['owner_id', 'change_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointment_tombstones_owner_id_change_version', table_name='appointment_tombstones')
+    op.drop_table('appointment_tombstones')
+    op.drop_index('ix_appointments_owner_id_change_version', table_name='appointments')
+    if op.get_context().dialect.name == 'mssql':
+        op.drop_constraint(CHANGE_VERSION_DEFAULT, 'appointments')
+    op.drop_column('appointments', 'change_version')
@@ -0,0 +1,32 @@
+"""add appointment slot locks
+
+Revision ID: e2b6f49c7d18
+Revises: d5e8a1f0b3c2
+Create Date: 2026-10-18 15:48:12.204731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6f49c7d18'
+down_revision: Union[str, None] = 'd5e8a1f0b3c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('appointment_slot_locks',
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_start')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('appointment_slot_locks')
@@ -0,0 +1,86 @@
+"""add resources and scope appointments to them
+
+Revision ID: f7a3c0d91e45
+Revises: e2b6f49c7d18
+Create Date: 2026-10-18 17:05:44.918302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a3c0d91e45'
+down_revision: Union[str, None] = 'e2b6f49c7d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match BLOCKING_STATUSES in app/models/appointment.py (enum names, in the same order)
+BLOCKING_STATUSES_WHERE = sa.text("status IN ('CONFIRMED', 'PENDING_CONFIRMATION')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resources',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_resources_id'), 'resources', ['id'], unique=False)
+
+    # Backfill: one resource per distinct service_name
+    op.execute("INSERT INTO resources (name) SELECT DISTINCT service_name FROM appointments")
+    op.add_column('appointments', sa.Column('resource_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE appointments SET resource_id = "
+        "(SELECT resources.id FROM resources WHERE resources.name = appointments.service_name)"
+    )
+    op.alter_column('appointments', 'resource_id', existing_type=sa.Integer(), nullable=False)
+    op.create_foreign_key('fk_appointments_resource_id_resources', 'appointments', 'resources', ['resource_id'], ['id'])
+
+    # The overlap index now leads with the resource
+    op.drop_index('ix_appointments_blocking_end_time_start_time', table_name='appointments')
+    op.create_index(
+        'ix_appointments_blocking_resource_id_end_time_start_time', 'appointments',
+        ['resource_id', 'end_time', 'start_time'], unique=False,
+        mssql_where=BLOCKING_STATUSES_WHERE,
+        postgresql_where=BLOCKING_STATUSES_WHERE,
+        sqlite_where=BLOCKING_STATUSES_WHERE,
+    )
+
+    # Slot locks become per resource. The rows hold no data (they're recreated on
+    # demand), so the table is simply rebuilt with the new key.
+    op.drop_table('appointment_slot_locks')
+    op.create_table('appointment_slot_locks',
+    sa.Column('resource_id', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['resource_id'], ['resources.id'], ),
+    sa.PrimaryKeyConstraint('resource_id', 'bucket_start')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('appointment_slot_locks')
+    op.create_table('appointment_slot_locks',
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_start')
+    )
+
+    op.drop_index('ix_appointments_blocking_resource_id_end_time_start_time', table_name='appointments')
+    op.create_index(
+        'ix_appointments_blocking_end_time_start_time', 'appointments', ['end_time', 'start_time'], unique=False,
+        mssql_where=BLOCKING_STATUSES_WHERE,
+        postgresql_where=BLOCKING_STATUSES_WHERE,
+        sqlite_where=BLOCKING_STATUSES_WHERE,
+    )
+
+    op.drop_constraint('fk_appointments_resource_id_resources', 'appointments', type_='foreignkey')
+    op.drop_column('appointments', 'resource_id')
+    op.drop_index(op.f('ix_resources_id'), table_name='resources')
+    op.drop_table('resources')
@@ -1,7 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, appointments # appointments will be added soon
+from app.api.v1.endpoints import users, appointments, calendar, metrics # appointments will be added soon
 
 api_router = APIRouter()
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 # TODO: Uncomment when appointments.py is created
-api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
\ No newline at end of file
+api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
+api_router.include_router(calendar.router, prefix="/calendar", tags=["calendar"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
\ No newline at end of file
@@ -1,29 +1,58 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Any, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import app.schemas.appointment as appointment_schemas
+import app.crud.async_crud_appointment as async_crud_appointment
+import app.crud.async_crud_user as async_crud_user
 import app.crud.crud_appointment as crud_appointment
-from app.db.session import get_db
-from app.deps import get_current_active_user
-from app.models.user import User as UserModel
+from app.crud.crud_appointment import SlotConflictError, VersionConflictError
+from app.db.session import get_async_db
+from app.core import pagination
+from app.core.config import settings
+from app.core.etag import etag_matches, if_match_satisfied
+from app.deps import get_current_active_superuser, get_current_active_user, get_current_active_user_from_claims
+from app.models.appointment import AppointmentStatus
+from app.services import appointment_export, slot_events
+from app.services.user_cache import UserSnapshot
 import datetime
-
-from app.services.notification_service import (
-    send_appointment_created_email,
-    send_appointment_updated_email,
-    send_appointment_cancelled_email
-)
 import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
+
+# --- Conditional requests ---
+# ETags come from version counters every write bumps: the owner's
+# appointments_version for the list, the row's change_version for one appointment.
+
+_REVALIDATE = {"Cache-Control": "private, no-cache"} # Clients may store responses but must revalidate
+
+def _appointment_etag(appointment_id: int, change_version: int) -> str:
+    return f'"appointment-{appointment_id}-{change_version}"'
+
+def _expected_version(if_match: Optional[str], db_appointment) -> Optional[int]:
+    """
+    The change_version an If-Match pins the write to (None: unconditional).
+    Stale tags fail here already; the crud re-checks atomically under lock.
+    """
+    if not if_match_satisfied(if_match, _appointment_etag(db_appointment.id, db_appointment.change_version)):
+        raise _precondition_failed()
+    if if_match is None or if_match.strip() == "*":
+        return None
+    return db_appointment.change_version
+
+def _precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="The appointment was changed since you fetched it; fetch it again and retry.",
+    )
 @router.post("/", response_model=appointment_schemas.Appointment, status_code=status.HTTP_201_CREATED)
 @router.post("/", response_model=appointment_schemas.Appointment, status_code=status.HTTP_201_CREATED)
-def create_appointment(
+async def create_appointment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     appointment_in: appointment_schemas.AppointmentCreate,
-    current_user: UserModel = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ) -> Any:
     """
     Create a new appointment for the currently authenticated user.
@@ -50,101 +79,460 @@ def create_appointment(
             detail="Appointment start time cannot be in the past.",
         )
 
-    # --- Overlap Check (using adjusted time) ---
-    overlapping = crud_appointment.get_overlapping_appointments(
-        db=db,
-        start_time=adjusted_appointment_in.start_time, # Use adjusted time
-        end_time=adjusted_appointment_in.end_time      # Use adjusted time
-    )
-    if overlapping:
+    # If validations pass, use the ADJUSTED data to create the appointment.
+    # The overlap check happens inside, with the slot locked, so two requests
+    # for the same time can't both get through.
+    try:
+        appointment = await async_crud_appointment.create_appointment(
+            db=db, appointment_in=adjusted_appointment_in, owner_id=current_user.id # Use adjusted data
+        )
+    except SlotConflictError:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="The requested time slot is already booked or overlaps with an existing appointment for this user.",
         )
-
-    # If validations pass, use the ADJUSTED data to create the appointment
-    appointment = crud_appointment.create_appointment(
-        db=db, appointment_in=adjusted_appointment_in, owner_id=current_user.id # Use adjusted data
-    )
     
-    # --- Send Confirmation Email (uses the now-adjusted appointment object) ---
-    if appointment: # Ensure appointment creation was successful
-        # Prepare appointment details for the email
-        email_payload = {
-            "id": appointment.id,  # Include the ID for reference
-            "service_name": appointment.service_name,
-            "start_time": appointment.start_time, # This will be the adjusted time (e.g., 8am)
-            "end_time": appointment.end_time,     # This will be the adjusted time
-            "status": appointment.status,
-            "notes": appointment.notes
-        }
+    # The confirmation email was written to the notification outbox in the same
+    # transaction; a dispatcher sends it, so the response doesn't wait on ACS.
+    return appointment
 
-        email_sent = send_appointment_created_email(
-            recipient_email=current_user.email,
-            recipient_name=current_user.full_name,
-            appointment_details=email_payload
+@router.post("/bulk", response_model=appointment_schemas.AppointmentBulkResult)
+async def create_appointments_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    bulk_in: appointment_schemas.AppointmentBulkCreate,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create many appointments for the currently authenticated user in one
+    transaction (e.g. an import). Each item is validated and booked like a
+    single POST /, but items that fail don't fail the batch: the response
+    reports a status for every item, in request order.
+    """
+    if len(bulk_in.appointments) > settings.BULK_APPOINTMENT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can't have more than {settings.BULK_APPOINTMENT_MAX_ITEMS} appointments.",
         )
-        if not email_sent:
-            logger.warning(f"Appointment CREATED email failed to send to {current_user.email} for appointment ID {appointment.id}")
+
+    # Same timezone fix and past-time check as create_appointment, per item
+    time_adjustment = datetime.timedelta(hours=2)
+    current_time_local = datetime.datetime.now()
+    results: List[Optional[dict]] = [None] * len(bulk_in.appointments)
+    valid_indexes, valid_items = [], []
+    for index, appointment_in in enumerate(bulk_in.appointments):
+        adjusted_appointment_in = appointment_in.model_copy(
+            update={
+                'start_time': appointment_in.start_time + time_adjustment,
+                'end_time': appointment_in.end_time + time_adjustment,
+            }
+        )
+        if adjusted_appointment_in.start_time.replace(tzinfo=None) <= current_time_local:
+            results[index] = {"index": index, "status": "invalid", "detail": "Appointment start time cannot be in the past."}
         else:
-            logger.info(f"Appointment CREATED email initiated for {current_user.email} for appointment ID {appointment.id}")
-            
-    return appointment
+            valid_indexes.append(index)
+            valid_items.append(adjusted_appointment_in)
+
+    item_results = await async_crud_appointment.create_appointments_bulk(
+        db=db, appointments_in=valid_items, owner_id=current_user.id
+    )
+    for index, item_result in zip(valid_indexes, item_results):
+        if item_result.appointment is not None:
+            results[index] = {"index": index, "status": "created", "appointment": item_result.appointment}
+        elif item_result.conflicting_item is not None:
+            other = valid_indexes[item_result.conflicting_item]
+            results[index] = {"index": index, "status": "conflict", "detail": f"Overlaps item {other} of the batch."}
+        else:
+            results[index] = {"index": index, "status": "conflict", "detail": "Overlaps an existing appointment."}
+
+    created = sum(1 for result in results if result["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
 
 @router.get("/", response_model=List[appointment_schemas.Appointment])
-def read_user_appointments(
+async def read_user_appointments(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
-    limit: int = 100,
-    current_user: UserModel = Depends(get_current_active_user),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
 ) -> any:
     """
-    Retrieve appointments for the currently authenticated user.
+    Retrieve appointments for the currently authenticated user, by start time.
+    When there are more, the X-Next-Cursor response header holds the `cursor`
+    to pass for the next page (which then ignores `skip`); unlike `skip`, it
+    costs the same at any depth and doesn't shift when appointments are added.
+    Send the ETag back in If-None-Match: while none of the user's appointments
+    changed, the answer is an empty 304, decided before the page is read.
     """
-    appointments = crud_appointment.get_appointments_by_owner(db=db, owner_id=current_user.id, skip=skip, limit=limit)
+    row = await async_crud_user.get_appointments_version(db, current_user.id)
+    version = row.appointments_version if row is not None else 0
+    # Weak: a page read right after the version may already include a newer change
+    etag = f'W/"appointments-{current_user.id}-{version}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **_REVALIDATE})
+    headers = {"ETag": etag, **_REVALIDATE}
+
+    after = None
+    if cursor is not None:
+        try:
+            after = pagination.decode_cursor(cursor, (datetime.datetime, int))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    # One extra row tells whether there is a next page
+    appointments = await async_crud_appointment.get_cached_appointments_by_owner(
+        db=db, owner_id=current_user.id, skip=skip, limit=limit + 1, after=after, version=version
+    )
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        last = appointments[-1]
+        headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(
+            datetime.datetime.fromisoformat(last["start_time"]), last["id"]
+        )
     # Check if appointments exist
     if not appointments:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No appointments found")
     
-    return appointments  
+    return ORJSONResponse(appointments, headers=headers) # Already in the response_model's shape (see _to_cacheable)
+
+@router.get("/changes", response_model=appointment_schemas.AppointmentChanges)
+async def read_user_appointment_changes(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    since: Optional[int] = Query(None, ge=0),
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
+) -> Any:
+    """
+    Incremental sync: the user's appointments created, updated or deleted
+    after `since` (the value returned by the previous call). Without
+    `since`, everything (a first sync). Declared before /{appointment_id}.
+    """
+    changes = await async_crud_appointment.get_changes_by_owner(
+        db=db, owner_id=current_user.id, since=since, limit=settings.CHANGES_PAGE_SIZE
+    )
+    return {
+        "changed": changes.appointments,
+        "deleted": changes.deleted_ids,
+        "since": changes.version,
+        "has_more": changes.has_more,
+    }
+
+# Declared before /{appointment_id} so "availability" isn't parsed as an ID
+@router.get("/availability", response_model=List[appointment_schemas.AvailableSlot])
+async def read_availability(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    service_name: str,
+    start_date: datetime.date,
+    end_date: Optional[datetime.date] = None,
+    duration_minutes: int = Query(30, ge=5, le=24 * 60),
+    open_time: datetime.time = datetime.time(9, 0),
+    close_time: datetime.time = datetime.time(17, 0),
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
+) -> Any:
+    """
+    Free slots of `duration_minutes` for the service's resource between
+    open_time and close_time on each day from start_date to end_date
+    (inclusive, defaults to start_date).
+    Times are in the same form GET / returns them.
+    """
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+    if (end_date - start_date).days + 1 > settings.AVAILABILITY_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range can't exceed {settings.AVAILABILITY_MAX_RANGE_DAYS} days.",
+        )
+    if close_time <= open_time:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="close_time must be after open_time.")
+
+    slots = await async_crud_appointment.get_available_slots(
+        db=db,
+        service_name=service_name,
+        start_date=start_date,
+        end_date=end_date,
+        duration=datetime.timedelta(minutes=duration_minutes),
+        open_time=open_time,
+        close_time=close_time,
+        not_before=datetime.datetime.now(), # Same naive local clock as the past-time check on create
+    )
+    return [{"start_time": start, "end_time": end} for start, end in slots]
+
+@router.get("/occurrences", response_model=List[appointment_schemas.AppointmentOccurrence])
+async def read_user_occurrences(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    start_date: datetime.date,
+    end_date: Optional[datetime.date] = None,
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
+) -> Any:
+    """
+    The user's appointments from start_date to end_date (inclusive, defaults
+    to start_date), with recurring series expanded into their occurrences.
+    """
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+    if (end_date - start_date).days + 1 > settings.AVAILABILITY_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range can't exceed {settings.AVAILABILITY_MAX_RANGE_DAYS} days.",
+        )
+    return await async_crud_appointment.get_occurrences_by_owner(
+        db=db,
+        owner_id=current_user.id,
+        start_time=datetime.datetime.combine(start_date, datetime.time.min),
+        end_time=datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min),
+    )
+
+@router.post("/series", response_model=appointment_schemas.AppointmentSeries, status_code=status.HTTP_201_CREATED)
+async def create_appointment_series(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    series_in: appointment_schemas.AppointmentSeriesCreate,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create a recurring appointment for the currently authenticated user:
+    the first occurrence repeated every `interval` days or weeks, `count`
+    times and/or until `until`. All occurrences must be free.
+    """
+    # Same timezone fix as create_appointment
+    time_adjustment = datetime.timedelta(hours=2)
+    adjusted_series_in = series_in.model_copy(
+        update={
+            'start_time': series_in.start_time + time_adjustment,
+            'end_time': series_in.end_time + time_adjustment,
+            'until': series_in.until + time_adjustment if series_in.until else None,
+        }
+    )
+    if adjusted_series_in.start_time.replace(tzinfo=None) <= datetime.datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Appointment start time cannot be in the past.",
+        )
+    occurrences = crud_appointment.series_rule(adjusted_series_in).count
+    if not 0 < occurrences <= settings.SERIES_MAX_OCCURRENCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A series must have between 1 and {settings.SERIES_MAX_OCCURRENCES} occurrences.",
+        )
+
+    try:
+        return await async_crud_appointment.create_appointment_series(
+            db=db, series_in=adjusted_series_in, owner_id=current_user.id
+        )
+    except SlotConflictError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An occurrence of the series overlaps an existing appointment.",
+        )
+
+@router.get("/series", response_model=List[appointment_schemas.AppointmentSeries])
+async def read_user_series(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
+) -> Any:
+    """Recurring series of the currently authenticated user."""
+    return await async_crud_appointment.get_series_by_owner(db=db, owner_id=current_user.id)
+
+@router.get("/series/{series_id}", response_model=appointment_schemas.AppointmentSeries)
+async def read_single_series(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    series_id: int,
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
+) -> Any:
+    db_series = await async_crud_appointment.get_series(db=db, series_id=series_id, owner_id=current_user.id)
+    if not db_series:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Series not found")
+    return db_series
+
+@router.post("/series/{series_id}/cancellations", response_model=appointment_schemas.AppointmentSeries)
+async def cancel_series_occurrence(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    series_id: int,
+    cancel_in: appointment_schemas.SeriesOccurrenceCancel,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+) -> Any:
+    """Cancel one occurrence of a series (recorded as an exception to its rule)."""
+    db_series = await async_crud_appointment.get_series(db=db, series_id=series_id, owner_id=current_user.id)
+    if not db_series:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Series not found or you don't have access")
+    updated_series = await async_crud_appointment.cancel_series_occurrence(
+        db=db, db_series=db_series, original_start=cancel_in.original_start
+    )
+    if not updated_series:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The series has no occurrence at that time")
+    return updated_series
+
+@router.delete("/series/{series_id}", response_model=appointment_schemas.AppointmentSeries)
+async def delete_user_series(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    series_id: int,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+) -> Any:
+    """Delete a series and all its occurrences."""
+    db_series = await async_crud_appointment.get_series(db=db, series_id=series_id, owner_id=current_user.id)
+    if not db_series:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Series not found or you don't have access")
+    return await async_crud_appointment.delete_series(db=db, db_series=db_series)
+
+@router.get("/availability/events", response_class=StreamingResponse)
+async def stream_availability_events(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    service_name: str,
+    start_date: datetime.date,
+    end_date: Optional[datetime.date] = None,
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
+) -> Any:
+    """
+    Server-sent events for the service's resource on each day from
+    start_date to end_date (inclusive, defaults to start_date):
+    "slot_taken" / "slot_freed" with the slot's start_time and end_time,
+    in the same form GET /availability returns them. Load the initial
+    state from GET /availability, then apply events. A "resync" event means
+    events were missed: reload and reconnect. 404 if the service has never
+    been booked (it has no resource yet).
+    """
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+    if (end_date - start_date).days + 1 > settings.SLOT_EVENTS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range can't exceed {settings.SLOT_EVENTS_MAX_DAYS} days.",
+        )
+    resource_id = await async_crud_appointment.get_resource_id(db=db, service_name=service_name)
+    await db.close() # Don't hold a pooled connection for the life of the stream
+    if resource_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+
+    topics = [
+        slot_events.topic(resource_id, start_date + datetime.timedelta(days=i))
+        for i in range((end_date - start_date).days + 1)
+    ]
+    return StreamingResponse(
+        slot_events.stream(topics, heartbeat=settings.SLOT_EVENTS_HEARTBEAT_SECONDS), # Subscribes once it's iterated
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Declared before /{appointment_id} so "export" isn't parsed as an ID
+@router.get("/export", response_class=StreamingResponse)
+async def export_appointments(
+    *,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    statuses: List[AppointmentStatus] = Query([], alias="status"),
+    service_name: Optional[str] = None,
+    accept_encoding: Optional[str] = Header(None),
+    current_user: UserSnapshot = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    All users' appointments, for reporting (superusers only): NDJSON (one
+    object per line) or CSV with a header row, by id. Filters: start_time on
+    start_date to end_date (inclusive), any of the repeated `status`
+    parameters, and service_name. Streamed from a server-side cursor, so any
+    size works; gzip-encoded when the client accepts it.
+    """
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+    gzip = _accepts_gzip(accept_encoding)
+    headers = {
+        "Content-Disposition": f'attachment; filename="appointments.{export_format}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    logger.info(f"Appointment export ({export_format}) started by user {current_user.id}")
+    # A sync generator: Starlette iterates it in the threadpool, with its own session
+    return StreamingResponse(
+        appointment_export.stream_export(
+            export_format, start_date=start_date, end_date=end_date, statuses=statuses,
+            service_name=service_name, gzip=gzip,
+        ),
+        media_type=appointment_export.FORMATS[export_format],
+        headers=headers,
+    )
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header value allows gzip (and doesn't give it q=0)."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip().removeprefix("q=")
+            try:
+                return float(q) > 0 if q else True
+            except ValueError:
+                return False
+    return False
 
 @router.get("/{appointment_id}", response_model=appointment_schemas.Appointment)
-def read_single_appointment(
+async def read_single_appointment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     appointment_id: int,
-    current_user: UserModel = Depends(get_current_active_user),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
 ) -> Any:
     """
     Get a specific appointment by ID
     Ensures the appointment belongs to the currently authenticated user.
+    Its ETag is the one to send in If-Match to update or delete it, and in
+    If-None-Match to get a 304 while it's unchanged.
     """
-    appointment = crud_appointment.get_appointment(
+    version = await async_crud_appointment.get_appointment_version(
+        db=db, appointment_id=appointment_id, owner_id=current_user.id
+    )
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
+    if etag_matches(if_none_match, _appointment_etag(appointment_id, version)):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": _appointment_etag(appointment_id, version), **_REVALIDATE},
+        )
+    appointment = await async_crud_appointment.get_cached_appointment(
         db=db,
         appointment_id=appointment_id,
-        owner_id=current_user.id
+        owner_id=current_user.id,
+        version=version,
     )
     if not appointment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
-    return appointment
+    # From the body itself: it may be newer than `version`, and If-Match needs the exact one
+    etag = _appointment_etag(appointment_id, appointment["change_version"])
+    return ORJSONResponse(appointment, headers={"ETag": etag, **_REVALIDATE})
 
 @router.put("/{appointment_id}", response_model=appointment_schemas.Appointment)
-def update_user_appointment(
+async def update_user_appointment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     appointment_id: int,
     appointment_in: appointment_schemas.AppointmentUpdate,
-    current_user: UserModel = Depends(get_current_active_user),
+    if_match: Optional[str] = Header(None),
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ) -> Any:
     """
     Update an appointment owned by the currently authenticated user.
+    With If-Match (the ETag of GET /appointments/{id}), the update only
+    happens if nobody changed the appointment since; otherwise 412.
     """
-    db_appointment = crud_appointment.get_appointment(
+    db_appointment = await async_crud_appointment.get_appointment(
         db=db, appointment_id=appointment_id, owner_id=current_user.id
     )
     if not db_appointment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found or you don't have access")
+    expected_version = _expected_version(if_match, db_appointment)
 
     # --- Timezone Fix for Presentation Demo on Update ---
     time_adjustment = datetime.timedelta(hours=2) 
@@ -188,94 +576,58 @@ def update_user_appointment(
             detail="End time must be after start time."
         )
 
-    # --- Overlap Check (only if times are changing) ---
-    if adjusted_appointment_in.start_time is not None or adjusted_appointment_in.end_time is not None:
-        overlapping = crud_appointment.get_overlapping_appointments(
-            db=db,
-            start_time=proposed_start_time,
-            end_time=proposed_end_time,
-            exclude_appointment_id=db_appointment.id # Exclude self
+    # If validations pass, perform the update using the ADJUSTED data.
+    # A new time is overlap-checked inside, with the slot locked.
+    try:
+        updated_appointment = await async_crud_appointment.update_appointment(
+            db=db, db_appointment=db_appointment, appointment_in=adjusted_appointment_in,
+            expected_version=expected_version,
         )
-        if overlapping:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="The requested time slot is already booked or overlaps with an existing appointment for this user.",
-            )
-
-    # If validations pass, perform the update using the ADJUSTED data
-    updated_appointment = crud_appointment.update_appointment(
-        db=db, db_appointment=db_appointment, appointment_in=adjusted_appointment_in
-    )
-
-    # --- Send Update Email ---
-    if updated_appointment:
-        email_payload_updated = {
-            "id": updated_appointment.id,  # Include the ID for reference
-            "service_name": updated_appointment.service_name,
-            "start_time": updated_appointment.start_time,
-            "end_time": updated_appointment.end_time,
-            "status": updated_appointment.status,
-            "notes": updated_appointment.notes
-        }
-
-        email_sent = send_appointment_updated_email(
-            recipient_email=current_user.email,
-            recipient_name=current_user.full_name,
-            appointment_details=email_payload_updated
+    except SlotConflictError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The requested time slot is already booked or overlaps with an existing appointment for this user.",
         )
-        if not email_sent:
-            logger.warning(f"Appointment UPDATED email failed to send to {current_user.email} for appointment ID {updated_appointment.id}")
-        else:
-            logger.info(f"Appointment UPDATED email initiated for {current_user.email} for appointment ID {updated_appointment.id}")
+    except VersionConflictError:
+        raise _precondition_failed()
+
+    # The update email is queued in the notification outbox by the CRUD layer.
+    response.headers["ETag"] = _appointment_etag(updated_appointment.id, updated_appointment.change_version)
 
     return updated_appointment
 @router.delete("/{appointment_id}", response_model=appointment_schemas.Appointment)
-def delete_user_appointment(
+async def delete_user_appointment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     appointment_id: int,
-    current_user: UserModel = Depends(get_current_active_user),
+    if_match: Optional[str] = Header(None),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ) -> Any:
     """
     Delete an existing appointment for the currently authenticated user.
+    With If-Match, only if it's unchanged since that ETag; otherwise 412.
     """
     # Step 1: Fetch the appointment to ensure it exists and belongs to the user
-    db_appointment_to_delete = crud_appointment.get_appointment(
+    db_appointment_to_delete = await async_crud_appointment.get_appointment(
         db=db,
         appointment_id=appointment_id,
         owner_id=current_user.id
     )
     if not db_appointment_to_delete:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found or you don't have access")
+    expected_version = _expected_version(if_match, db_appointment_to_delete)
     
-    # Step 2: Capture necessary details for the email BEFORE the actual deletion
-    email_payload_for_deleted = {
-        "service_name": db_appointment_to_delete.service_name,
-        "start_time": db_appointment_to_delete.start_time,
-        "end_time": db_appointment_to_delete.end_time,
-        "status": db_appointment_to_delete.status, # Original status before deletion
-        "notes": db_appointment_to_delete.notes
-        # "action": "cancelled" // This can be implicit by calling the specific email func
-    }
-    
-    # Step 3: Perform the deletion
-    deleted_appointment_data_for_response = crud_appointment.delete_appointment(
-        db=db,
-        db_appointment=db_appointment_to_delete # Pass the fetched object to be deleted
-    )
-    
-    # Step 4: Send the Cancellation Email (AFTER successful deletion commit in CRUD)
-    # We use the payload captured in Step 2.
-    email_sent = send_appointment_cancelled_email( # Call the specific cancellation email function
-        recipient_email=current_user.email,
-        recipient_name=current_user.full_name,
-        appointment_details=email_payload_for_deleted
-    )
-    if not email_sent:
-        logger.warning(f"Appointment CANCELLED email failed to send to {current_user.email} for (now deleted) appointment ID {appointment_id}")
-    else:
-        logger.info(f"Appointment CANCELLED email initiated for {current_user.email} for (now deleted) appointment ID {appointment_id}")
+    # Step 2: Perform the deletion. The cancellation email is written to the
+    # notification outbox in the same transaction, before the row goes away.
+    try:
+        deleted_appointment_data_for_response = await async_crud_appointment.delete_appointment(
+            db=db,
+            db_appointment=db_appointment_to_delete, # Pass the fetched object to be deleted
+            expected_version=expected_version,
+        )
+    except VersionConflictError:
+        raise _precondition_failed()
     
-    # Step 5: Return the data of the deleted appointment
+    # Step 3: Return the data of the deleted appointment
     return deleted_appointment_data_for_response
 
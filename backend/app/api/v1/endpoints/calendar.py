@@ -0,0 +1,41 @@
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Header, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.crud.async_crud_user as async_crud_user
+from app.core.etag import etag_matches
+from app.db.session import get_async_db
+from app.deps import get_current_active_user_from_claims
+from app.services import calebdar_service
+from app.services.user_cache import UserSnapshot
+
+router = APIRouter()
+
+@router.get("/feed.ics", response_class=StreamingResponse)
+async def read_calendar_feed(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserSnapshot = Depends(get_current_active_user_from_claims),
+) -> Any:
+    """
+    The current user's appointments as an iCalendar feed. Send the ETag back
+    in If-None-Match: while nothing changed the answer is an empty 304.
+    """
+    version, changed_at = await async_crud_user.get_appointments_version(db, current_user.id)
+    etag = calebdar_service.feed_etag(current_user.id, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    modified = calebdar_service.last_modified(changed_at)
+    if modified:
+        headers["Last-Modified"] = modified
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # A sync generator: Starlette iterates it in the threadpool, next to its own session.
+    # A write landing between the version read and the stream only makes the body
+    # newer than its ETag, so the next poll re-downloads rather than missing it.
+    return StreamingResponse(
+        calebdar_service.stream_feed(current_user.id, changed_at),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
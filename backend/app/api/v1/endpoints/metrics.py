@@ -0,0 +1,31 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+
+from app.deps import get_current_active_superuser
+from app.db.session import pool_stats
+from app.services.user_cache import UserSnapshot
+from app.services.appointment_cache import appointment_cache
+from app.services.conflict_index import conflict_index
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_outbox import outbox_poller
+from app.services.slot_events import slot_event_broker
+from app.services.user_cache import user_cache
+
+router = APIRouter()
+
+@router.get("/")
+def read_metrics(
+    current_user: UserSnapshot = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Runtime metrics for this worker process (superusers only).
+    """
+    return {
+        "notifications": notification_dispatcher.stats(),
+        "outbox_poller": outbox_poller.stats(),
+        "user_cache": user_cache.stats(),
+        "appointment_cache": appointment_cache.stats(),
+        "conflict_index": conflict_index.stats(),
+        "slot_events": slot_event_broker.stats(),
+        "db_pool": pool_stats(),
+    }
@@ -1,41 +1,49 @@
-from typing import Any, List
+from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 import app.schemas.user as user_schemas
-import app.crud.crud_user as crud_user
-from app.db.session import get_db
-from app.core.security import create_access_token, verify_password
+import app.crud.async_crud_user as async_crud_user
+from app.db.session import get_async_db
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash_async, user_token_claims, verify_password_async
 from app.schemas.token import Token
-from app.deps import get_current_active_user # We'll create this next
+from app.deps import get_current_active_user, reusable_oauth2 # We'll create this next
+from app.services import token_revocation
+from app.services.user_cache import UserSnapshot
 
 router = APIRouter(redirect_slashes=False)
 
 @router.post("/register", response_model=user_schemas.User)
-def register_user(
+async def register_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: user_schemas.UserCreate,
 ) -> Any:
     """
     Create new user.
     """
-    user = crud_user.get_user_by_email(db, email=user_in.email)
+    # bcrypt runs in the password executor so it doesn't stall the event loop
+    user = await async_crud_user.get_user_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    user = crud_user.create_user(db=db, user=user_in)
+    await db.close() # Give the connection back to the pool while bcrypt runs
+    hashed_password = await get_password_hash_async(user_in.password)
+    user = await async_crud_user.create_user(db, user=user_in, hashed_password=hashed_password)
     return user
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = crud_user.get_user_by_email(db, email=form_data.username) # Using email as username
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await async_crud_user.get_user_by_email(db, email=form_data.username) # Using email as username
+    await db.close() # Don't hold a pooled connection while bcrypt runs
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -44,12 +52,31 @@ async def login_for_access_token(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
-    access_token = create_access_token(subject=user.email) # Use email as subject for JWT
+    claims = user_token_claims(user) if settings.ACCESS_TOKEN_MODE == "claims" else None
+    access_token = create_access_token(subject=user.email, claims=claims) # Use email as subject for JWT
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(reusable_oauth2),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+):
+    """
+    Revoke the presented token, in every worker (see token_revocation). A
+    claims-mode token is revoked by its ID; subject-only tokens carry none, so
+    every token the user was issued so far is revoked instead.
+    """
+    payload = jwt.get_unverified_claims(token) # Already verified by get_current_active_user
+    if payload.get("jti"):
+        await db.run_sync(lambda session: token_revocation.revoke_token(session, payload["jti"], payload["exp"]))
+    else:
+        await db.run_sync(lambda session: token_revocation.revoke_user_tokens(session, current_user.id))
+    await db.commit()
+
 @router.get("/me", response_model=user_schemas.User)
-def read_users_me(
+async def read_users_me(
     current_user: user_schemas.User = Depends(get_current_active_user),
 ):
     """
@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from typing import List, Union # Ensure Union is imported
+from typing import List, Optional, Union # Ensure Union is imported
 from pydantic import AnyHttpUrl, field_validator # field_validator for Pydantic v2
 from pydantic_settings import BaseSettings
 
@@ -10,10 +10,67 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "a_default_secret_key_if_not_set")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # "subject": token only carries the email, the user is looked up per request.
+    # "claims": token also carries the user id and roles, so endpoints using
+    # get_current_active_user_from_claims authenticate without touching the DB.
+    ACCESS_TOKEN_MODE: str = "subject"
+    ACCESS_TOKEN_CLAIMS_TRUST_SECONDS: int = 300 # After this, claims are re-checked against the DB (bounds lag for user changes made outside the app)
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 2.0 # How often a worker merges revocations (logouts, user changes) from the DB; upper bound for them to reach it (0 checks on every request)
+    USER_CACHE_TTL_SECONDS: float = 30.0 # Upper bound for a deactivation made in another worker to take effect
+    USER_CACHE_MAX_SIZE: int = 10000
+    PASSWORD_HASH_EXECUTOR: str = "thread" # "thread" or "process" (process uses more cores for bcrypt)
+    PASSWORD_HASH_WORKERS: int = 2 # Max concurrent bcrypt hashes/verifications per worker
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None # Defaults to DATABASE_URL with its async driver (e.g. mssql+aioodbc)
+    # Connection pool, per engine and per worker process (gunicorn runs 4 workers, each
+    # with a sync and an async engine): keep workers * 2 * (size + overflow) under the
+    # Azure SQL tier's connection limit.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5 # Extra connections opened under bursts, closed again when returned
+    DB_POOL_TIMEOUT: float = 10.0 # Seconds a request waits for a free connection before failing
+    DB_POOL_RECYCLE: int = 1800 # Replace connections older than this (Azure drops idle ones after ~30 min)
+    DB_POOL_PRE_PING: bool = True # Test each connection on checkout so a dropped one is replaced, not handed out
     
     ACS_CONNECTION_STRING: str = os.getenv("ACS_CONNECTION_STRING", "") # From previous steps
     ACS_SENDER_ADDRESS: str = os.getenv("ACS_SENDER_ADDRESS", "")   # From previous steps
+    ACS_HTTP_POOL_SIZE: int = 10 # Keep-alive connections shared by this worker's ACS client
+
+    # Notification dispatch (in-process queue drained by a worker pool)
+    NOTIFICATION_WORKERS: int = 4
+    NOTIFICATION_QUEUE_SIZE: int = 1000
+    NOTIFICATION_ENQUEUE_TIMEOUT_SECONDS: float = 0.5 # How long a request blocks on a full queue before dropping
+
+    # Notification outbox (rows written with the appointment change, sent by a dispatcher)
+    OUTBOX_POLL_IN_APP: bool = True # Also run a dispatcher inside each API worker
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_CLAIM_TIMEOUT_SECONDS: int = 120 # A claimed row is retried by others after this
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 5.0 # Retry delay doubles from here on each failure
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 3600.0
+    NOTIFICATION_COALESCE_WINDOW_SECONDS: float = 10.0 # Quiet period after the last edit before an appointment's email goes out (0 disables)
+    NOTIFICATION_COALESCE_MAX_SECONDS: float = 300.0 # Never hold an email longer than this, even if edits keep coming
+
+    # In-memory copy of blocking appointments used to reject conflicting bookings without a query
+    CONFLICT_INDEX_TTL_SECONDS: float = 30.0 # Reload interval of the in-memory conflict hints, done in the background (0 disables)
+    AVAILABILITY_CACHE_TTL_SECONDS: float = 10.0 # Per-day busy intervals behind GET /appointments/availability
+    AVAILABILITY_CACHE_MAX_DAYS: int = 1000
+    AVAILABILITY_MAX_RANGE_DAYS: int = 62
+    SLOT_LOCK_BUCKET_MINUTES: int = 60 # Granularity of booking locks; bookings within the same bucket are serialized
+    BULK_APPOINTMENT_MAX_ITEMS: int = 1000 # Per POST /appointments/bulk request (one transaction)
+    SLOT_EVENTS_QUEUE_SIZE: int = 256 # Undelivered events per subscriber before it's told to resync and dropped
+    SLOT_EVENTS_HEARTBEAT_SECONDS: float = 20.0 # Keep-alive comment on idle slot event streams
+    SLOT_EVENTS_MAX_DAYS: int = 31 # Days one subscription may cover
+    CHANGES_PAGE_SIZE: int = 500 # Max changes per GET /appointments/changes call (a bulk create's batch is never split)
+    CALENDAR_FEED_BATCH_SIZE: int = 500 # Rows fetched from the cursor (and events rendered) per streamed chunk
+    EXPORT_BATCH_SIZE: int = 5000 # Rows fetched from the cursor (and rendered) per streamed chunk of GET /appointments/export
+    CALENDAR_UID_DOMAIN: str = os.getenv("CALENDAR_UID_DOMAIN", "appointments.local") # Right-hand side of event UIDs; keep stable, calendar apps key on it
+    # Read-through cache for GET /appointments/ and /appointments/{id}
+    APPOINTMENT_CACHE_BACKEND: str = "memory" # "memory" (per worker) or "redis" (shared; needs the redis package)
+    APPOINTMENT_CACHE_REDIS_URL: str = os.getenv("APPOINTMENT_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    APPOINTMENT_CACHE_TTL_SECONDS: float = 30.0 # With "memory", bounds how long another worker's change can go unseen (0 disables)
+    APPOINTMENT_CACHE_MAX_SIZE: int = 10000 # Entries (pages and single appointments) per worker, "memory" only
+    SERIES_MAX_OCCURRENCES: int = 400 # Per recurring series (every occurrence's slot is locked when it's booked)
 
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
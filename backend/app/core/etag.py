@@ -0,0 +1,30 @@
+"""
+Entity-tag comparisons for conditional requests (RFC 9110 section 13.1).
+ETags here are built from version counters the writes already maintain, so
+checking one never needs the representation itself.
+"""
+from typing import Iterator, Optional
+
+
+def _candidates(header: str) -> Iterator[str]:
+    return (candidate.strip() for candidate in header.split(","))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches `etag` (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    candidates = list(_candidates(if_none_match))
+    return "*" in candidates or etag.removeprefix("W/") in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def if_match_satisfied(if_match: Optional[str], etag: str) -> bool:
+    """
+    Whether a change to a resource currently tagged `etag` may go ahead under
+    an If-Match header value: no header or "*" (the resource exists), or an
+    exact strong match. Weak tags never match.
+    """
+    if if_match is None:
+        return True
+    candidates = list(_candidates(if_match))
+    return "*" in candidates or (not etag.startswith("W/") and etag in candidates)
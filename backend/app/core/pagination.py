@@ -0,0 +1,38 @@
+"""
+Opaque cursors for keyset pagination. A cursor is the sort key of the last
+row of a page; the next page is "rows after that key", which the database
+answers with an index seek at any depth (OFFSET reads and discards every
+skipped row) and which doesn't shift when rows are inserted before it.
+Clients must treat cursors as opaque: the encoding may change.
+"""
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, Sequence, Tuple
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*key: Any) -> str:
+    values = [value.isoformat() if isinstance(value, datetime.datetime) else value for value in key]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    """The key encoded in `cursor`, as values of `types`; ValueError if it isn't a valid cursor for them."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Malformed cursor")
+    key = []
+    for value, kind in zip(values, types):
+        if kind is datetime.datetime and isinstance(value, str):
+            key.append(datetime.datetime.fromisoformat(value)) # ValueError if not a datetime
+        elif kind is int and type(value) is int:
+            key.append(value)
+        else:
+            raise ValueError("Malformed cursor")
+    return tuple(key)
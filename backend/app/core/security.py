@@ -1,5 +1,10 @@
+import asyncio
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -11,20 +16,71 @@ SECRET_KEY = settings.SECRET_KEY
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[dict] = None
 ) -> str:
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
+        expire = now + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # iat keeps its fractions: a login right after a logout must come out after the revocation
+    to_encode = {"exp": expire, "sub": str(subject), "iat": now.timestamp()}
+    if claims:
+        # Self-contained token: the jti lets it be revoked without a DB lookup
+        to_encode.update(claims, jti=uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_token_claims(user: Any) -> dict:
+    """Claims that let get_current_active_user_from_claims skip the user lookup."""
+    return {
+        "uid": user.id,
+        "name": user.full_name,
+        "act": bool(user.is_active),
+        "su": bool(user.is_superuser),
+    }
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+# bcrypt is deliberately slow (~100s of ms of CPU). Async handlers must not run it
+# on the event loop, and sync ones shouldn't tie up Starlette's shared threadpool
+# with it, so hashing gets its own bounded executor. With
+# PASSWORD_HASH_EXECUTOR="process" hashing also uses more than one core.
+_hash_executor: Optional[Executor] = None
+_hash_executor_pid: Optional[int] = None
+_hash_executor_lock = threading.Lock()
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor, _hash_executor_pid
+    pid = os.getpid()
+    if _hash_executor is None or _hash_executor_pid != pid: # Executors don't survive a fork
+        with _hash_executor_lock:
+            if _hash_executor is None or _hash_executor_pid != pid:
+                if settings.PASSWORD_HASH_EXECUTOR == "process":
+                    _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+                else:
+                    _hash_executor = ThreadPoolExecutor(
+                        max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+                    )
+                _hash_executor_pid = pid
+    return _hash_executor
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None and _hash_executor_pid == os.getpid():
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+    _hash_executor = None
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), get_password_hash, password)
@@ -0,0 +1,222 @@
+"""
+Async versions of crud_appointment for AsyncSession.
+
+Each function runs its sync counterpart through AsyncSession.run_sync, which
+executes it on the async driver inside a greenlet: the event loop is never
+blocked, and the outbox/notification logic lives in exactly one place.
+The writes then invalidate the owner's cached reads, which needs the event
+loop (see app.services.appointment_cache).
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Sequence, Tuple
+import datetime
+
+import app.crud.crud_appointment as crud_appointment
+import app.crud.crud_resource as crud_resource
+from app.models.appointment import Appointment as AppointmentModel
+from app.models.appointment_series import AppointmentSeries
+from app.schemas.appointment import AppointmentCreate, AppointmentSeriesCreate, AppointmentUpdate
+import app.schemas.appointment as appointment_schemas
+from app.services.appointment_cache import appointment_cache
+
+async def create_appointment(
+        db: AsyncSession, *, appointment_in: AppointmentCreate, owner_id: int
+) -> AppointmentModel:
+    db_appointment = await db.run_sync(
+        lambda session: crud_appointment.create_appointment(session, appointment_in=appointment_in, owner_id=owner_id)
+    )
+    await appointment_cache.invalidate_owner(owner_id)
+    return db_appointment
+
+async def create_appointments_bulk(
+        db: AsyncSession, *, appointments_in: List[AppointmentCreate], owner_id: int
+) -> List[crud_appointment.BulkItemResult]:
+    results = await db.run_sync(
+        lambda session: crud_appointment.create_appointments_bulk(session, appointments_in=appointments_in, owner_id=owner_id)
+    )
+    if any(result.appointment is not None for result in results):
+        await appointment_cache.invalidate_owner(owner_id)
+    return results
+
+async def get_appointment(
+        db: AsyncSession, *, appointment_id: int, owner_id: int, columns: Sequence = ()
+):
+    return await db.run_sync(
+        lambda session: crud_appointment.get_appointment(
+            session, appointment_id=appointment_id, owner_id=owner_id, columns=columns
+        )
+    )
+
+async def get_appointment_version(db: AsyncSession, *, appointment_id: int, owner_id: int) -> Optional[int]:
+    return await db.run_sync(
+        lambda session: crud_appointment.get_appointment_version(session, appointment_id=appointment_id, owner_id=owner_id)
+    )
+
+async def get_appointments_by_owner(
+        db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100,
+        after: Optional[Tuple[datetime.datetime, int]] = None, columns: Sequence = (),
+) -> list:
+    return await db.run_sync(
+        lambda session: crud_appointment.get_appointments_by_owner(
+            session, owner_id=owner_id, skip=skip, limit=limit, after=after, columns=columns
+        )
+    )
+
+# --- Cached reads (app.services.appointment_cache) ---
+# For the read endpoints: they return the Appointment schema as JSON-compatible
+# dicts, which can be cached across requests and workers. Code that goes on to
+# modify an appointment must use the ORM getters above.
+# `version` is the one the caller just read from the database (for its ETag):
+# it's part of the key, so an entry is never older than that version, whichever
+# worker wrote it.
+
+# The schema's fields, in order, as columns: only these are selected
+_SCHEMA_COLUMNS = tuple(getattr(AppointmentModel, name) for name in appointment_schemas.Appointment.model_fields)
+
+def _to_cacheable(row) -> dict:
+    # What Appointment.model_dump(mode="json") gives, without validating what our own DB just returned
+    data = row._asdict()
+    data["start_time"] = data["start_time"].isoformat()
+    data["end_time"] = data["end_time"].isoformat()
+    data["status"] = data["status"].value
+    return data
+
+async def get_cached_appointment(
+        db: AsyncSession, *, appointment_id: int, owner_id: int, version: int
+) -> Optional[dict]:
+    async def load():
+        row = await get_appointment(db, appointment_id=appointment_id, owner_id=owner_id, columns=_SCHEMA_COLUMNS)
+        return None if row is None else _to_cacheable(row)
+    return await appointment_cache.get_or_load(owner_id, f"one:{appointment_id}:v{version}", load)
+
+async def get_cached_appointments_by_owner(
+        db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100,
+        after: Optional[Tuple[datetime.datetime, int]] = None, version: int,
+) -> List[dict]:
+    async def load():
+        rows = await get_appointments_by_owner(
+            db, owner_id=owner_id, skip=skip, limit=limit, after=after, columns=_SCHEMA_COLUMNS
+        )
+        return [_to_cacheable(row) for row in rows]
+    page = f"after:{after[0].isoformat()},{after[1]}" if after is not None else f"skip:{skip}"
+    return await appointment_cache.get_or_load(owner_id, f"page:{page}:{limit}:v{version}", load)
+
+async def get_changes_by_owner(
+        db: AsyncSession, *, owner_id: int, since: Optional[int], limit: int = 500
+) -> crud_appointment.ChangeSet:
+    return await db.run_sync(
+        lambda session: crud_appointment.get_changes_by_owner(session, owner_id=owner_id, since=since, limit=limit)
+    )
+
+async def update_appointment(
+        db: AsyncSession,
+        *,
+        db_appointment: AppointmentModel,
+        appointment_in: AppointmentUpdate,
+        expected_version: Optional[int] = None,
+) -> AppointmentModel:
+    owner_id = db_appointment.owner_id
+    db_appointment = await db.run_sync(
+        lambda session: crud_appointment.update_appointment(
+            session, db_appointment=db_appointment, appointment_in=appointment_in, expected_version=expected_version
+        )
+    )
+    await appointment_cache.invalidate_owner(owner_id)
+    return db_appointment
+
+async def delete_appointment(
+    db: AsyncSession, *, db_appointment: AppointmentModel, expected_version: Optional[int] = None
+) -> AppointmentModel:
+    owner_id = db_appointment.owner_id
+    deleted = await db.run_sync(
+        lambda session: crud_appointment.delete_appointment(
+            session, db_appointment=db_appointment, expected_version=expected_version
+        )
+    )
+    await appointment_cache.invalidate_owner(owner_id)
+    return deleted
+
+async def get_overlapping_appointments(
+    db: AsyncSession,
+    *,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    exclude_appointment_id: Optional[int] = None,
+    resource_id: Optional[int] = None
+) -> List[AppointmentModel]:
+    return await db.run_sync(
+        lambda session: crud_appointment.get_overlapping_appointments(
+            session, start_time=start_time, end_time=end_time,
+            exclude_appointment_id=exclude_appointment_id, resource_id=resource_id
+        )
+    )
+
+async def has_overlapping_appointment(
+    db: AsyncSession,
+    *,
+    resource_id: int,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    exclude_appointment_id: Optional[int] = None
+) -> bool:
+    return await db.run_sync(
+        lambda session: crud_appointment.has_overlapping_appointment(
+            session, resource_id=resource_id, start_time=start_time, end_time=end_time,
+            exclude_appointment_id=exclude_appointment_id
+        )
+    )
+
+async def get_available_slots(
+    db: AsyncSession,
+    *,
+    service_name: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    duration: datetime.timedelta,
+    open_time: datetime.time,
+    close_time: datetime.time,
+    not_before: Optional[datetime.datetime] = None
+) -> List[tuple]:
+    return await db.run_sync(
+        lambda session: crud_appointment.get_available_slots(
+            session, resource_id=crud_resource.get_resource_id(session, service_name), start_date=start_date, end_date=end_date, duration=duration,
+            open_time=open_time, close_time=close_time, not_before=not_before
+        )
+    )
+
+async def create_appointment_series(
+        db: AsyncSession, *, series_in: AppointmentSeriesCreate, owner_id: int
+) -> AppointmentSeries:
+    return await db.run_sync(
+        lambda session: crud_appointment.create_appointment_series(session, series_in=series_in, owner_id=owner_id)
+    )
+
+async def get_series(db: AsyncSession, *, series_id: int, owner_id: int) -> Optional[AppointmentSeries]:
+    return await db.run_sync(
+        lambda session: crud_appointment.get_series(session, series_id=series_id, owner_id=owner_id)
+    )
+
+async def get_series_by_owner(db: AsyncSession, *, owner_id: int) -> List[AppointmentSeries]:
+    return await db.run_sync(lambda session: crud_appointment.get_series_by_owner(session, owner_id=owner_id))
+
+async def delete_series(db: AsyncSession, *, db_series: AppointmentSeries) -> AppointmentSeries:
+    return await db.run_sync(lambda session: crud_appointment.delete_series(session, db_series=db_series))
+
+async def cancel_series_occurrence(
+    db: AsyncSession, *, db_series: AppointmentSeries, original_start: datetime.datetime
+) -> Optional[AppointmentSeries]:
+    return await db.run_sync(
+        lambda session: crud_appointment.cancel_series_occurrence(session, db_series=db_series, original_start=original_start)
+    )
+
+async def get_occurrences_by_owner(
+    db: AsyncSession, *, owner_id: int, start_time: datetime.datetime, end_time: datetime.datetime
+) -> List[dict]:
+    return await db.run_sync(
+        lambda session: crud_appointment.get_occurrences_by_owner(
+            session, owner_id=owner_id, start_time=start_time, end_time=end_time
+        )
+    )
+
+async def get_resource_id(db: AsyncSession, *, service_name: str) -> Optional[int]:
+    return await db.run_sync(lambda session: crud_resource.get_resource_id(session, service_name))
@@ -0,0 +1,27 @@
+"""
+Async versions of crud_user for AsyncSession (see async_crud_appointment).
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+import app.crud.crud_user as crud_user
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.run_sync(lambda session: crud_user.get_user(session, user_id))
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return await db.run_sync(lambda session: crud_user.get_user_by_email(session, email))
+
+async def get_appointments_version(db: AsyncSession, user_id: int):
+    return await db.run_sync(lambda session: crud_user.get_appointments_version(session, user_id))
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    return await db.run_sync(lambda session: crud_user.get_users(session, skip=skip, limit=limit, after_id=after_id))
+
+async def create_user(db: AsyncSession, user: UserCreate, hashed_password: Optional[str] = None) -> User:
+    return await db.run_sync(lambda session: crud_user.create_user(session, user, hashed_password=hashed_password))
+
+async def update_user(db: AsyncSession, db_user: User, user_in: UserUpdate) -> User:
+    return await db.run_sync(lambda session: crud_user.update_user(session, db_user, user_in))
@@ -1,9 +1,27 @@
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.db.session import SessionLocal
 from app.models.appointment import Appointment as AppointmentModel
-from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
+from app.schemas.appointment import AppointmentCreate, AppointmentSeriesCreate, AppointmentUpdate
 import datetime
-from app.models.appointment import AppointmentStatus
+from app.models.appointment import BLOCKING_STATUSES, blocking_status_clause
+from app.models.appointment_series import AppointmentSeries, AppointmentSeriesException
+from app.models.appointment_tombstone import AppointmentTombstone
+from app.models.slot_lock import SlotLock
+from app.models.user import User
+import app.crud.crud_resource as crud_resource
+from app.services import availability, notification_outbox, recurrence
+from app.services.conflict_index import conflict_index
+from app.services.slot_events import SLOT_FREED, SLOT_TAKEN, slot_event_broker
+
+class SlotConflictError(Exception):
+    """The requested time overlaps a blocking appointment for the same resource."""
+
+class VersionConflictError(Exception):
+    """The appointment changed since the version the caller based its change on."""
 
 def create_appointment(
         db: Session, *, appointment_in: AppointmentCreate, owner_id: int
@@ -11,91 +29,829 @@ def create_appointment(
     """
     Create a new appointment in the database.
     Status defaults to PENDING_CONFIRMATION via the model's default.
+    The resource is the one named by service_name (created if new).
+    The slot is reserved atomically (see _reserve_slot); raises SlotConflictError
+    if it overlaps a blocking appointment for the same resource.
+    The confirmation email is queued in the outbox in the same transaction.
     """
-    db_appointment = AppointmentModel(**appointment_in.model_dump(), owner_id=owner_id)
+    resource_id = crud_resource.get_or_create_resource_id(db, appointment_in.service_name)
+    _reserve_slot(db, resource_id, appointment_in.start_time, appointment_in.end_time)
+    db_appointment = AppointmentModel(
+        **appointment_in.model_dump(), owner_id=owner_id, resource_id=resource_id,
+        change_version=_touch_owner(db, owner_id),
+    )
     db.add(db_appointment)
+    db.flush() # Assigns the ID (and status default) the email needs
+    _queue_notification(db, notification_outbox.APPOINTMENT_CREATED, db_appointment)
     db.commit()
     db.refresh(db_appointment)
+    _record_in_conflict_index(db_appointment)
+    availability.invalidate(db_appointment.resource_id, db_appointment.start_time, db_appointment.end_time)
+    _publish_slot(SLOT_TAKEN, db_appointment)
+    notification_outbox.outbox_poller.wake()
     return db_appointment
 
+class BulkItemResult(NamedTuple):
+    """Outcome of one item passed to create_appointments_bulk."""
+    appointment: Optional[AppointmentModel] # The created row, or None if the slot was taken
+    conflicting_item: Optional[int] = None # Index of the batch item it overlaps (None: an existing appointment)
+
+def create_appointments_bulk(
+        db: Session, *, appointments_in: List[AppointmentCreate], owner_id: int
+) -> List[BulkItemResult]:
+    """
+    Create a batch of appointments in one transaction; returns one result per
+    item, in the same order. An item that overlaps an earlier-starting item of
+    the batch on the same resource, or a blocking appointment already booked,
+    is skipped; the rest are inserted together.
+    Instead of a check per item, the batch's slot lock rows are locked at
+    once (see _reserve_slot), then one range query fetches the blocking
+    appointments it could overlap and a sort/sweep in memory matches them up.
+    The confirmation emails are queued in the outbox with a single INSERT.
+    """
+    if not appointments_in:
+        return []
+    results: List[Optional[BulkItemResult]] = [None] * len(appointments_in)
+    resource_ids = {
+        name: crud_resource.get_or_create_resource_id(db, name) # May commit
+        for name in {appointment_in.service_name for appointment_in in appointments_in}
+    }
+    # Stored as naive wall-clock time
+    spans = [
+        (appointment_in.start_time.replace(tzinfo=None), appointment_in.end_time.replace(tzinfo=None))
+        for appointment_in in appointments_in
+    ]
+
+    # Within the batch: in start order, an item is kept unless it overlaps the
+    # last item kept for its resource (kept items never overlap each other).
+    kept: Dict[int, List[int]] = {} # resource id -> indexes of the kept items, by start
+    for i in sorted(range(len(appointments_in)), key=lambda i: spans[i][0]):
+        resource_items = kept.setdefault(resource_ids[appointments_in[i].service_name], [])
+        if resource_items and spans[resource_items[-1]][1] > spans[i][0]:
+            results[i] = BulkItemResult(None, resource_items[-1])
+        else:
+            resource_items.append(i)
+
+    # Against the database, with the lock rows of every kept item held
+    buckets_by_resource = {
+        resource_id: sorted({bucket for i in items for bucket in _slot_buckets(*spans[i])})
+        for resource_id, items in kept.items()
+    }
+    _ensure_slot_buckets(db, buckets_by_resource)
+    _lock_slot_buckets(db, buckets_by_resource)
+    windows = {resource_id: (spans[items[0]][0], spans[items[-1]][1]) for resource_id, items in kept.items()}
+    busy: Dict[int, List[tuple]] = {resource_id: [] for resource_id in kept}
+    rows = db.query(AppointmentModel.resource_id, AppointmentModel.start_time, AppointmentModel.end_time).filter(
+        or_(*(and_(*_overlap_filters(resource_id, *window)) for resource_id, window in windows.items()))
+    ).order_by(AppointmentModel.resource_id, AppointmentModel.start_time)
+    for resource_id, start, end in rows:
+        busy[resource_id].append((start, end))
+    for series in _blocking_series(db, windows):
+        busy[series.resource_id].extend(recurrence.occurrences(recurrence.rule_for(series), *windows[series.resource_id]))
+        busy[series.resource_id].sort()
+
+    booked = []
+    for resource_id, items in kept.items():
+        intervals = busy[resource_id]
+        j, latest_end = 0, None # Latest end among the intervals starting before the current item ends
+        for i in items: # Kept items don't overlap, so both their starts and ends increase
+            start, end = spans[i]
+            while j < len(intervals) and intervals[j][0] < end:
+                latest_end = intervals[j][1] if latest_end is None else max(latest_end, intervals[j][1])
+                j += 1
+            if latest_end is not None and latest_end > start:
+                results[i] = BulkItemResult(None)
+            else:
+                booked.append(i)
+
+    if not booked:
+        db.rollback() # Release the locks
+        return results
+    booked.sort()
+    change_version = _touch_owner(db, owner_id) # One version for the whole batch
+    created = db.scalars(
+        insert(AppointmentModel).returning(AppointmentModel, sort_by_parameter_order=True),
+        [
+            {
+                **appointments_in[i].model_dump(), "owner_id": owner_id,
+                "resource_id": resource_ids[appointments_in[i].service_name], "change_version": change_version,
+            }
+            for i in booked
+        ],
+    ).all()
+    owner = db.get(User, owner_id)
+    notification_outbox.add_appointment_notifications(
+        db,
+        event_type=notification_outbox.APPOINTMENT_CREATED,
+        recipient_email=owner.email,
+        recipient_name=owner.full_name,
+        notifications=[
+            (notification_outbox.appointment_details(db_appointment), _coalesce_key(db_appointment))
+            for db_appointment in created
+        ],
+    )
+    db.commit()
+    for i, db_appointment in zip(booked, created):
+        results[i] = BulkItemResult(db_appointment)
+        _record_in_conflict_index(db_appointment)
+        availability.invalidate(db_appointment.resource_id, db_appointment.start_time, db_appointment.end_time)
+        _publish_slot(SLOT_TAKEN, db_appointment)
+    notification_outbox.outbox_poller.wake()
+    return results
+
 def get_appointment(
-        db: Session, *, appointment_id: int, owner_id: int
-) -> Optional[AppointmentModel]:
+        db: Session, *, appointment_id: int, owner_id: int, columns: Sequence = ()
+):
     """
     Get a single appintment by its ID, ensuring it belongs to the specifiewed owner.
+    With `columns`, a row of just those columns instead of the ORM object.
     """
-    return db.query(AppointmentModel).filter(
+    return db.query(*columns or (AppointmentModel,)).filter(
         AppointmentModel.id == appointment_id,
         AppointmentModel.owner_id == owner_id
     ).first()
 
+def get_appointment_version(db: Session, *, appointment_id: int, owner_id: int) -> Optional[int]:
+    """The appointment's change_version (its ETag), or None if the owner has no such appointment; a PK lookup."""
+    return db.scalar(
+        select(AppointmentModel.change_version).where(
+            AppointmentModel.id == appointment_id, AppointmentModel.owner_id == owner_id
+        )
+    )
+
 def get_appointments_by_owner(
-        db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
-) -> List[AppointmentModel]:
+        db: Session, *, owner_id: int, skip: int = 0, limit: int = 100,
+        after: Optional[Tuple[datetime.datetime, int]] = None, columns: Sequence = (),
+) -> list:
     """
-    Get a list of appointments for a specific owner, with pagination.
+    Get a list of appointments for a specific owner, ordered by (start_time, id).
+    Pages either by `after`, the (start_time, id) of the last row of the
+    previous page (keyset: an index seek, same cost at any depth), or by
+    `skip` (OFFSET: the skipped rows are still read, so deep pages get slow).
+    With `columns`, rows of just those columns instead of ORM objects: no
+    identity map or instance state, for reads that go straight to JSON.
     """
-    return db.query(AppointmentModel).filter(
-        AppointmentModel.owner_id == owner_id
-    ).order_by(AppointmentModel.start_time.asc()).offset(skip).limit(limit).all() #sorting by start time
+    query = db.query(*columns or (AppointmentModel,)).filter(AppointmentModel.owner_id == owner_id).order_by(
+        AppointmentModel.start_time.asc(), AppointmentModel.id.asc()
+    )
+    if after is not None:
+        after_start, after_id = after
+        # Row-value comparison spelled out (MSSQL has no tuple >); the leading >=
+        # is the seek predicate on ix_appointments_owner_id_start_time, whose
+        # rows carry id as the clustered key
+        query = query.filter(
+            AppointmentModel.start_time >= after_start,
+            or_(AppointmentModel.start_time > after_start, AppointmentModel.id > after_id),
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+class ChangeSet(NamedTuple):
+    appointments: List[AppointmentModel] # Created or updated since the token, by change_version
+    deleted_ids: List[int]
+    version: int # Token for the next call: everything up to this version is included
+    has_more: bool # More changes after `version`; call again right away
+
+def get_changes_by_owner(
+        db: Session, *, owner_id: int, since: Optional[int], limit: int = 500
+) -> ChangeSet:
+    """
+    What changed in the owner's appointments after version `since` (None:
+    everything, as a first sync), at most about `limit` rows per call. Both
+    queries seek the (owner_id, change_version) indexes, so the cost follows
+    the number of changes, not of appointments; an up-to-date client costs
+    one primary-key lookup.
+    A page never ends in the middle of a version (a bulk create shares one),
+    so the next call can resume strictly after it.
+    """
+    # Read first: anything committed after this gets a higher version and is picked up next time
+    current = db.scalar(select(User.appointments_version).where(User.id == owner_id)) or 0
+    if since is not None and since >= current:
+        return ChangeSet([], [], current, False)
+    first_sync = since is None # Nothing to delete on the client: skip the tombstones
+    since = since if since is not None else -1 # Rows from before versioning have version 0
+
+    appointments = db.query(AppointmentModel).filter(
+        AppointmentModel.owner_id == owner_id,
+        AppointmentModel.change_version > since,
+        AppointmentModel.change_version <= current,
+    ).order_by(AppointmentModel.change_version, AppointmentModel.id).limit(limit + 1).all()
+    tombstones = db.query(AppointmentTombstone.change_version, AppointmentTombstone.appointment_id).filter(
+        AppointmentTombstone.owner_id == owner_id,
+        AppointmentTombstone.change_version > since,
+        AppointmentTombstone.change_version <= current,
+    ).order_by(AppointmentTombstone.change_version).limit(limit + 1).all() if not first_sync else []
+    if len(appointments) + len(tombstones) <= limit:
+        return ChangeSet(appointments, [row.appointment_id for row in tombstones], current, False)
+
+    # Too many: stop before the version of the first change that doesn't fit
+    versions = sorted([row.change_version for row in appointments] + [row.change_version for row in tombstones])
+    cutoff = versions[limit]
+    if cutoff == versions[0]:
+        # A single version has more than `limit` changes: return all of it
+        appointments = db.query(AppointmentModel).filter(
+            AppointmentModel.owner_id == owner_id, AppointmentModel.change_version == cutoff
+        ).order_by(AppointmentModel.id).all()
+        tombstones = [row for row in tombstones if row.change_version == cutoff]
+        return ChangeSet(appointments, [row.appointment_id for row in tombstones], cutoff, True)
+    return ChangeSet(
+        [row for row in appointments if row.change_version < cutoff],
+        [row.appointment_id for row in tombstones if row.change_version < cutoff],
+        cutoff - 1,
+        True,
+    )
 
 def update_appointment(
         db: Session,
         *,
         db_appointment: AppointmentModel,
-        appointment_in: AppointmentUpdate
+        appointment_in: AppointmentUpdate,
+        expected_version: Optional[int] = None,
 ) -> AppointmentModel:
     """
     Update an existing appointment.
     'db_appointment' is the existing appointment object fetched from the database.
+    If the new time, resource (service_name) or a status change back to a
+    blocking one needs a slot, it's reserved like on create; raises
+    SlotConflictError on overlap.
+    With `expected_version`, raises VersionConflictError unless the row is
+    still at that change_version: checked before anything else (creating a
+    resource or reserving a slot, which commit), and again atomically with
+    the change (see _claim_version).
     """
+    if expected_version is not None and db.scalar(
+        select(AppointmentModel.change_version).where(AppointmentModel.id == db_appointment.id)
+    ) != expected_version:
+        raise VersionConflictError()
     update_date = appointment_in.model_dump(exclude_unset=True)
+    old_resource_id = db_appointment.resource_id
+    resource_id = old_resource_id
+    if update_date.get("service_name"):
+        resource_id = crud_resource.get_or_create_resource_id(db, update_date["service_name"]) # May commit
+    start_time = update_date.get("start_time") or db_appointment.start_time
+    end_time = update_date.get("end_time") or db_appointment.end_time
+    new_status = update_date.get("status") or db_appointment.status
+    needs_slot = new_status in BLOCKING_STATUSES and (
+        resource_id != old_resource_id
+        or start_time != db_appointment.start_time
+        or end_time != db_appointment.end_time
+        or db_appointment.status not in BLOCKING_STATUSES
+    )
+    if needs_slot: # May commit, so before any change is made
+        _reserve_slot(db, resource_id, start_time, end_time, exclude_appointment_id=db_appointment.id)
+
+    change_version = _touch_owner(db, db_appointment.owner_id)
+    if expected_version is not None:
+        _claim_version(db, db_appointment.id, expected_version)
+    old_details = notification_outbox.appointment_details(db_appointment) # For the "what changed" summary
     for field, value in update_date.items():
         setattr(db_appointment, field, value)
+    db_appointment.resource_id = resource_id
+    db_appointment.change_version = change_version
 
     db.add(db_appointment)
+    _queue_notification(db, notification_outbox.APPOINTMENT_UPDATED, db_appointment, old_details=old_details)
     db.commit()
     db.refresh(db_appointment)
+    _record_in_conflict_index(db_appointment)
+    availability.invalidate(old_resource_id, old_details["start_time"], old_details["end_time"])
+    availability.invalidate(resource_id, db_appointment.start_time, db_appointment.end_time)
+    old_slot = (old_resource_id, old_details["start_time"], old_details["end_time"], old_details["status"] in BLOCKING_STATUSES)
+    new_slot = (resource_id, db_appointment.start_time, db_appointment.end_time, db_appointment.status in BLOCKING_STATUSES)
+    if old_slot != new_slot:
+        if old_slot[3]:
+            slot_event_broker.publish_slot(SLOT_FREED, *old_slot[:3], appointment_id=db_appointment.id)
+        if new_slot[3]:
+            slot_event_broker.publish_slot(SLOT_TAKEN, *new_slot[:3], appointment_id=db_appointment.id)
+    notification_outbox.outbox_poller.wake()
     return db_appointment
 
 def delete_appointment(
-    db: Session, *, db_appointment: AppointmentModel 
+    db: Session, *, db_appointment: AppointmentModel, expected_version: Optional[int] = None
 ) -> AppointmentModel: 
     """
     Delete an existing appointment.
     'db_appointment' is assumed to be the existing model instance fetched from the DB.
+    With `expected_version`, raises VersionConflictError unless the row is
+    still at that change_version.
     """
+    appointment_id, resource_id, owner_id = db_appointment.id, db_appointment.resource_id, db_appointment.owner_id
+    start_time, end_time = db_appointment.start_time, db_appointment.end_time
+    was_blocking = db_appointment.status in BLOCKING_STATUSES
+    db.add(AppointmentTombstone(
+        appointment_id=appointment_id,
+        owner_id=owner_id,
+        change_version=_touch_owner(db, owner_id),
+        deleted_at=datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+    ))
+    if expected_version is not None:
+        _claim_version(db, appointment_id, expected_version)
+    # After the owner and appointment rows, like update_appointment: the pending outbox
+    # row of this appointment is locked last on every write path, so they can't deadlock
+    _queue_notification(db, notification_outbox.APPOINTMENT_CANCELLED, db_appointment)
     db.delete(db_appointment)
     db.commit()
+    conflict_index.discard(appointment_id)
+    availability.invalidate(resource_id, start_time, end_time)
+    if was_blocking:
+        slot_event_broker.publish_slot(SLOT_FREED, resource_id, start_time, end_time, appointment_id=appointment_id)
+    notification_outbox.outbox_poller.wake()
     # db_appointment is now detached. If you need to return it, it's fine,
     # but accessing its relationships after deletion might be problematic.
     # Often, delete operations might just return a confirmation or None.
     # For consistency with other CRUDs returning the model, we return it here.
     return db_appointment
 
+def _touch_owner(db: Session, owner_id: int) -> int:
+    """
+    Bump the owner's appointments version (calendar feed ETag, change feed) in
+    the current transaction and return the new value. The UPDATE holds the
+    owner's row lock until commit, so the owner's changes commit in version
+    order and a client that has seen version N can't later miss one below it.
+    """
+    return db.execute(
+        update(User).where(User.id == owner_id).values(
+            appointments_version=User.appointments_version + 1,
+            appointments_changed_at=datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+        ).returning(User.appointments_version).execution_options(synchronize_session=False)
+    ).scalar_one()
+
+def _claim_version(db: Session, appointment_id: int, expected_version: int) -> None:
+    """
+    Lock the appointment's row if it's still at `expected_version`, else roll
+    back and raise VersionConflictError. Every writer of the row updates it,
+    so none can slip in between this check and our commit. Called after
+    _touch_owner and before _queue_notification, keeping the owner row ->
+    appointment row -> outbox row lock order of every write path.
+    """
+    claimed = db.execute(
+        update(AppointmentModel).where(
+            AppointmentModel.id == appointment_id, AppointmentModel.change_version == expected_version
+        ).values(change_version=AppointmentModel.change_version).execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback() # Release the locks
+        raise VersionConflictError()
+
+def _queue_notification(
+    db: Session, event_type: str, db_appointment: AppointmentModel, old_details: Optional[dict] = None
+) -> None:
+    """Add the owner's email for this change to the outbox (committed by the caller)."""
+    owner = db.get(User, db_appointment.owner_id) # Usually already in the session's identity map
+    notification_outbox.add_appointment_notification(
+        db,
+        event_type=event_type,
+        recipient_email=owner.email,
+        recipient_name=owner.full_name,
+        details=notification_outbox.appointment_details(db_appointment),
+        old_details=old_details,
+        coalesce_key=_coalesce_key(db_appointment),
+    )
+
+def _coalesce_key(db_appointment: AppointmentModel) -> str:
+    return f"appointment:{db_appointment.id}" # Bursts of edits to one appointment become one email
+
+def _slot_buckets(start_time: datetime.datetime, end_time: datetime.datetime) -> List[datetime.datetime]:
+    """Start of every SLOT_LOCK_BUCKET_MINUTES bucket that [start_time, end_time) touches."""
+    size = datetime.timedelta(minutes=settings.SLOT_LOCK_BUCKET_MINUTES)
+    start_time, end_time = start_time.replace(tzinfo=None), end_time.replace(tzinfo=None) # Stored as naive wall-clock time
+    bucket = datetime.datetime.min + (start_time - datetime.datetime.min) // size * size
+    buckets = []
+    while bucket < end_time:
+        buckets.append(bucket)
+        bucket += size
+    return buckets
+
+def _slot_lock_rows(buckets_by_resource: Dict[int, List[datetime.datetime]]):
+    """Filter for each resource's lock rows from its first to its last (sorted) bucket."""
+    return or_(*(
+        and_(
+            SlotLock.resource_id == resource_id,
+            SlotLock.bucket_start >= buckets[0],
+            SlotLock.bucket_start <= buckets[-1],
+        )
+        for resource_id, buckets in buckets_by_resource.items()
+    ))
+
+def _ensure_slot_buckets(db: Session, buckets_by_resource: Dict[int, List[datetime.datetime]]) -> None:
+    """
+    Create any missing lock rows for the buckets, committed in their own short
+    transaction. The booking transaction then only locks rows that already
+    exist, always in key order, so two bookings can't deadlock on them.
+    """
+    wanted = {(resource_id, bucket) for resource_id, buckets in buckets_by_resource.items() for bucket in buckets}
+    for _ in range(5):
+        existing = set(db.execute(
+            select(SlotLock.resource_id, SlotLock.bucket_start).where(_slot_lock_rows(buckets_by_resource))
+        ).tuples())
+        missing = sorted(wanted - existing)
+        if not missing:
+            return
+        try:
+            db.execute(insert(SlotLock), [
+                {"resource_id": resource_id, "bucket_start": bucket, "version": 0} for resource_id, bucket in missing
+            ])
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback() # Another booking created some of them first; look again
+    raise RuntimeError(f"Could not create slot lock rows for {len(wanted)} buckets")
+
+def _lock_slot_buckets(db: Session, buckets_by_resource: Dict[int, List[datetime.datetime]]) -> None:
+    """Lock the buckets' rows until the transaction ends."""
+    # An UPDATE takes exclusive row locks on every dialect (SELECT FOR UPDATE doesn't exist on SQLite)
+    db.execute(
+        update(SlotLock).where(_slot_lock_rows(buckets_by_resource)).values(version=SlotLock.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def _reserve_slot(
+    db: Session,
+    resource_id: int,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    exclude_appointment_id: Optional[int] = None
+) -> None:
+    """
+    Lock the slot's bucket rows for the rest of the transaction, then make the
+    final overlap check. Any two overlapping bookings share a bucket, so the
+    second one waits for the first to commit and then sees it; bookings in
+    different buckets or for other resources don't touch the same rows and
+    run in parallel.
+    Commits whatever the session had pending first (see _ensure_slot_buckets).
+    """
+    buckets_by_resource = {resource_id: _slot_buckets(start_time, end_time)}
+    _ensure_slot_buckets(db, buckets_by_resource)
+    _lock_slot_buckets(db, buckets_by_resource)
+    if _confirmed_overlap(db, resource_id, start_time, end_time, exclude_appointment_id):
+        db.rollback() # Release the locks
+        raise SlotConflictError()
+
+def _publish_slot(event_type: str, db_appointment: AppointmentModel) -> None:
+    if db_appointment.status in BLOCKING_STATUSES:
+        slot_event_broker.publish_slot(
+            event_type, db_appointment.resource_id, db_appointment.start_time, db_appointment.end_time,
+            appointment_id=db_appointment.id,
+        )
+
+def _record_in_conflict_index(db_appointment: AppointmentModel) -> None:
+    conflict_index.record(
+        db_appointment.id, db_appointment.resource_id, db_appointment.start_time, db_appointment.end_time,
+        blocking=db_appointment.status in BLOCKING_STATUSES,
+    )
+
+def _blocking_intervals(db: Session, horizon: datetime.datetime) -> List[tuple]:
+    """(id, resource_id, start_time, end_time) of every blocking appointment ending after `horizon`."""
+    return db.query(
+        AppointmentModel.id, AppointmentModel.resource_id, AppointmentModel.start_time, AppointmentModel.end_time
+    ).filter(
+        AppointmentModel.end_time > horizon,
+        blocking_status_clause()
+    ).all()
+
+def _load_blocking_intervals(horizon: datetime.datetime) -> List[tuple]:
+    with SessionLocal() as db: # Runs in the conflict index's loader thread
+        return _blocking_intervals(db, horizon)
+
+def _overlap_filters(
+    resource_id: Optional[int],
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    exclude_appointment_id: Optional[int] = None
+) -> list:
+    filters = [
+        AppointmentModel.start_time < end_time,
+        AppointmentModel.end_time > start_time,
+        # Consider only appointments that are 'confirmed' or 'pending' as blocking a slot
+        # (BLOCKING_STATUSES; inlined so the filtered index applies)
+        blocking_status_clause()
+    ]
+    if resource_id is not None: # None: any resource
+        filters.append(AppointmentModel.resource_id == resource_id)
+    if exclude_appointment_id:
+        filters.append(AppointmentModel.id != exclude_appointment_id)
+    return filters
+
+def has_overlapping_appointment(
+    db: Session,
+    *,
+    resource_id: int,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    exclude_appointment_id: Optional[int] = None # To exclude current appointment when updating
+) -> bool:
+    """Whether the slot overlaps any blocking appointment (of any user) for the resource."""
+    return _confirmed_overlap(db, resource_id, start_time, end_time, exclude_appointment_id)
+
+def _confirmed_overlap(
+    db: Session,
+    resource_id: int,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    exclude_appointment_id: Optional[int]
+) -> bool:
+    """
+    Whether the slot overlaps a blocking appointment, per the database.
+    A candidate from this worker's conflict index is checked first with a
+    primary key lookup; without one, or if another worker has since freed
+    it, the EXISTS query decides.
+    """
+    conflict_index.refresh(_load_blocking_intervals) # In the background when due
+    candidate = conflict_index.find_conflict(resource_id, start_time, end_time, exclude_appointment_id)
+    if candidate is not None:
+        if db.scalar(select(AppointmentModel.id).where(
+            AppointmentModel.id == candidate,
+            *_overlap_filters(resource_id, start_time, end_time, exclude_appointment_id)
+        )) is not None:
+            return True
+        conflict_index.forget(candidate)
+    return _overlap_exists(db, resource_id, start_time, end_time, exclude_appointment_id)
+
+def _overlap_exists(
+    db: Session,
+    resource_id: int,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    exclude_appointment_id: Optional[int]
+) -> bool:
+    return db.query(
+        db.query(AppointmentModel.id).filter(
+            *_overlap_filters(resource_id, start_time, end_time, exclude_appointment_id)
+        ).exists()
+    ).scalar() or _series_overlap_exists(db, resource_id, start_time, end_time)
+
 def get_overlapping_appointments(
     db: Session,
     *,
     #owner_id: int,
     start_time: datetime.datetime,
     end_time: datetime.datetime,
-    exclude_appointment_id: Optional[int] = None # To exclude current appointment when updating
+    exclude_appointment_id: Optional[int] = None, # To exclude current appointment when updating
+    resource_id: Optional[int] = None # None: on any resource
 ) -> List[AppointmentModel]:
     """
-    Finds appointments FOR ANY USER that overlap with the given time slot.
-    This assumes a single provider/resource system.
+    Finds appointments FOR ANY USER that overlap with the given time slot
+    on the given resource.
     """
-    query = db.query(AppointmentModel).filter(
+    return db.query(AppointmentModel).filter(
         #AppointmentModel.owner_id == owner_id,
-        AppointmentModel.start_time < end_time,
-        AppointmentModel.end_time > start_time,
-        # Consider only appointments that are 'confirmed' or 'pending' as blocking a slot
-        # Adjust statuses as per your business logic
-        AppointmentModel.status.in_([AppointmentStatus.CONFIRMED, AppointmentStatus.PENDING_CONFIRMATION])
-    )
+        *_overlap_filters(resource_id, start_time, end_time, exclude_appointment_id)
+    ).all()
 
-    if exclude_appointment_id:
-        query = query.filter(AppointmentModel.id != exclude_appointment_id)
+def get_available_slots(
+    db: Session,
+    *,
+    resource_id: Optional[int],
+    start_date: datetime.date,
+    end_date: datetime.date,
+    duration: datetime.timedelta,
+    open_time: datetime.time,
+    close_time: datetime.time,
+    not_before: Optional[datetime.datetime] = None
+) -> List[tuple]:
+    """
+    Free (start, end) slots of `duration` on the resource within business
+    hours on each day from start_date to end_date (inclusive). Busy intervals
+    come from the per-day cache; the days missing from it are loaded with one
+    range query. resource_id None is a resource nobody has booked yet.
+    """
+    days = [start_date + datetime.timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    if resource_id is None:
+        busy = {day: [] for day in days}
+    else:
+        busy = {day: availability.busy_by_day.get((resource_id, day)) for day in days}
+    missing = [day for day, intervals in busy.items() if intervals is None]
+    if missing:
+        range_start = datetime.datetime.combine(missing[0], datetime.time.min)
+        range_end = datetime.datetime.combine(missing[-1] + datetime.timedelta(days=1), datetime.time.min)
+        rows = db.query(AppointmentModel.start_time, AppointmentModel.end_time).filter(
+            *_overlap_filters(resource_id, range_start, range_end)
+        ).order_by(AppointmentModel.start_time).all()
+        series_rows = _blocking_series(db, {resource_id: (range_start, range_end)})
+        if series_rows:
+            for series in series_rows:
+                rows.extend(recurrence.occurrences(recurrence.rule_for(series), range_start, range_end))
+            rows.sort()
+        missing_days = set(missing)
+        for day in missing:
+            busy[day] = []
+        for start, end in rows: # Sorted by start, so each day's list is too
+            day = max(start.date(), missing[0])
+            while day <= min(end.date(), missing[-1]):
+                if day in missing_days:
+                    busy[day].append((start, end))
+                day += datetime.timedelta(days=1)
+        for day in missing:
+            availability.busy_by_day.set((resource_id, day), busy[day])
+
+    slots = []
+    for day in days:
+        slots.extend(availability.free_slots(
+            busy[day],
+            window_start=datetime.datetime.combine(day, open_time),
+            window_end=datetime.datetime.combine(day, close_time),
+            duration=duration,
+            not_before=not_before,
+        ))
+    return slots
+
+
+# --- Recurring series ---
 
+def _blocking_series(
+    db: Session,
+    windows: Dict[int, tuple],
+    exclude_series_id: Optional[int] = None
+) -> List[AppointmentSeries]:
+    """Blocking series active during each resource's (start, end) window, with their exceptions."""
+    query = db.query(AppointmentSeries).filter(
+        or_(*(
+            and_(
+                AppointmentSeries.resource_id == resource_id,
+                AppointmentSeries.start_time < end_time,
+                AppointmentSeries.last_end > start_time,
+            )
+            for resource_id, (start_time, end_time) in windows.items()
+        )),
+        blocking_status_clause(AppointmentSeries.status)
+    )
+    if exclude_series_id:
+        query = query.filter(AppointmentSeries.id != exclude_series_id)
     return query.all()
 
+def _series_overlap_exists(
+    db: Session,
+    resource_id: Optional[int],
+    start_time: datetime.datetime,
+    end_time: datetime.datetime
+) -> bool:
+    """Whether an occurrence of a blocking series on the resource overlaps the slot."""
+    if resource_id is None:
+        return False
+    start_time, end_time = start_time.replace(tzinfo=None), end_time.replace(tzinfo=None)
+    return any(
+        recurrence.first_overlap(recurrence.rule_for(series), start_time, end_time) is not None
+        for series in _blocking_series(db, {resource_id: (start_time, end_time)})
+    )
+
+def series_rule(series_in: AppointmentSeriesCreate) -> recurrence.Rule:
+    """The Rule a new series would have (naive wall-clock times, like the stored ones)."""
+    start_time, end_time = series_in.start_time.replace(tzinfo=None), series_in.end_time.replace(tzinfo=None)
+    period = recurrence.PERIODS[series_in.freq] * series_in.interval
+    until = series_in.until.replace(tzinfo=None) if series_in.until else None
+    return recurrence.Rule(
+        start=start_time,
+        duration=end_time - start_time,
+        period=period,
+        count=recurrence.occurrence_count(start_time, period, series_in.count, until),
+    )
+
+def create_appointment_series(
+        db: Session, *, series_in: AppointmentSeriesCreate, owner_id: int
+) -> AppointmentSeries:
+    """
+    Create a recurring series on the resource named by service_name. Its
+    occurrences are never stored; the conflict checks work on the rule:
+    - against single appointments, one range query over the series' lifetime,
+      each row checked against the rule arithmetically;
+    - against other series, recurrence.rules_overlap, which mostly decides
+      from the periods alone.
+    The slot lock rows of every occurrence are held for the checks, as on
+    create_appointment; raises SlotConflictError on overlap.
+    """
+    resource_id = crud_resource.get_or_create_resource_id(db, series_in.service_name)
+    rule = series_rule(series_in)
+
+    buckets = sorted({
+        bucket
+        for start, end in recurrence.occurrences(rule, rule.start, rule.last_end)
+        for bucket in _slot_buckets(start, end)
+    })
+    _ensure_slot_buckets(db, {resource_id: buckets})
+    _lock_slot_buckets(db, {resource_id: buckets})
+    appointments = db.query(AppointmentModel.start_time, AppointmentModel.end_time).filter(
+        *_overlap_filters(resource_id, rule.start, rule.last_end)
+    )
+    if (
+        any(recurrence.first_overlap(rule, start, end) is not None for start, end in appointments)
+        or any(
+            recurrence.rules_overlap(rule, recurrence.rule_for(series))
+            for series in _blocking_series(db, {resource_id: (rule.start, rule.last_end)})
+        )
+    ):
+        db.rollback() # Release the locks
+        raise SlotConflictError()
+
+    db_series = AppointmentSeries(
+        **series_in.model_dump(exclude={"start_time", "end_time", "until"}),
+        start_time=rule.start,
+        end_time=rule.start + rule.duration,
+        until=series_in.until.replace(tzinfo=None) if series_in.until else None,
+        last_end=rule.last_end,
+        owner_id=owner_id,
+        resource_id=resource_id,
+    )
+    db.add(db_series)
+    db.flush()
+    _touch_owner(db, owner_id)
+    _queue_series_notification(db, notification_outbox.APPOINTMENT_CREATED, db_series)
+    db.commit()
+    db.refresh(db_series)
+    _series_slots_changed(SLOT_TAKEN, db_series.id, resource_id, rule)
+    notification_outbox.outbox_poller.wake()
+    return db_series
+
+def get_series(db: Session, *, series_id: int, owner_id: int) -> Optional[AppointmentSeries]:
+    return db.query(AppointmentSeries).filter(
+        AppointmentSeries.id == series_id,
+        AppointmentSeries.owner_id == owner_id
+    ).first()
+
+def get_series_by_owner(db: Session, *, owner_id: int) -> List[AppointmentSeries]:
+    return db.query(AppointmentSeries).filter(
+        AppointmentSeries.owner_id == owner_id
+    ).order_by(AppointmentSeries.start_time.asc()).all()
+
+def delete_series(db: Session, *, db_series: AppointmentSeries) -> AppointmentSeries:
+    """Delete a series with all its occurrences; one cancellation email for the series."""
+    series_id, resource_id, rule = db_series.id, db_series.resource_id, recurrence.rule_for(db_series)
+    _touch_owner(db, db_series.owner_id) # Owner row before the outbox row, as on every write path
+    _queue_series_notification(db, notification_outbox.APPOINTMENT_CANCELLED, db_series)
+    db.delete(db_series)
+    db.commit()
+    _series_slots_changed(SLOT_FREED, series_id, resource_id, rule)
+    notification_outbox.outbox_poller.wake()
+    return db_series
+
+def cancel_series_occurrence(
+    db: Session, *, db_series: AppointmentSeries, original_start: datetime.datetime
+) -> Optional[AppointmentSeries]:
+    """
+    Add an exception so the occurrence starting at `original_start` no longer
+    takes place (and no longer blocks its slot). Returns None if the series
+    has no such occurrence.
+    """
+    rule = recurrence.rule_for(db_series)
+    original_start = original_start.replace(tzinfo=None)
+    occurrence = recurrence.first_overlap(rule, original_start, original_start + rule.duration)
+    if occurrence is None or occurrence[0] != original_start:
+        return None
+    db_series.exceptions.append(AppointmentSeriesException(original_start=original_start))
+    _touch_owner(db, db_series.owner_id)
+    db.commit()
+    db.refresh(db_series)
+    availability.invalidate(db_series.resource_id, occurrence[0], occurrence[1])
+    slot_event_broker.publish_slot(SLOT_FREED, db_series.resource_id, *occurrence, series_id=db_series.id)
+    return db_series
+
+def get_occurrences_by_owner(
+    db: Session, *, owner_id: int, start_time: datetime.datetime, end_time: datetime.datetime
+) -> List[dict]:
+    """
+    The owner's single appointments and series occurrences overlapping
+    [start_time, end_time), by start. Series are expanded for that window only.
+    """
+    items = [
+        {
+            "appointment_id": appointment.id, "series_id": None, "service_name": appointment.service_name,
+            "start_time": appointment.start_time, "end_time": appointment.end_time,
+            "status": appointment.status, "notes": appointment.notes,
+        }
+        for appointment in db.query(AppointmentModel).filter(
+            AppointmentModel.owner_id == owner_id,
+            AppointmentModel.start_time < end_time,
+            AppointmentModel.end_time > start_time,
+        )
+    ]
+    for series in db.query(AppointmentSeries).filter(
+        AppointmentSeries.owner_id == owner_id,
+        AppointmentSeries.start_time < end_time,
+        AppointmentSeries.last_end > start_time,
+    ):
+        items.extend(
+            {
+                "appointment_id": None, "series_id": series.id, "service_name": series.service_name,
+                "start_time": start, "end_time": end, "status": series.status, "notes": series.notes,
+            }
+            for start, end in recurrence.occurrences(recurrence.rule_for(series), start_time, end_time)
+        )
+    items.sort(key=lambda item: item["start_time"])
+    return items
+
+def _queue_series_notification(db: Session, event_type: str, db_series: AppointmentSeries) -> None:
+    """One email for the whole series, showing its first occurrence."""
+    owner = db.get(User, db_series.owner_id)
+    notification_outbox.add_appointment_notification(
+        db,
+        event_type=event_type,
+        recipient_email=owner.email,
+        recipient_name=owner.full_name,
+        details=notification_outbox.appointment_details(db_series),
+        coalesce_key=f"series:{db_series.id}",
+    )
+
+def _series_slots_changed(event_type: str, series_id: int, resource_id: int, rule: recurrence.Rule) -> None:
+    for start, end in recurrence.occurrences(rule, rule.start, rule.last_end):
+        availability.invalidate(resource_id, start, end)
+        slot_event_broker.publish_slot(event_type, resource_id, start, end, series_id=series_id)
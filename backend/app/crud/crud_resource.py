@@ -0,0 +1,32 @@
+from typing import Optional
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.models.resource import Resource
+
+# Resource name -> id. Resources are never renamed or deleted, so an entry can't go stale.
+_resource_ids = TTLCache(maxsize=10000, ttl=24 * 3600)
+
+def get_resource_id(db: Session, name: str) -> Optional[int]:
+    resource_id = _resource_ids.get(name)
+    if resource_id is None:
+        resource_id = db.scalar(select(Resource.id).where(Resource.name == name))
+        if resource_id is not None:
+            _resource_ids.set(name, resource_id)
+    return resource_id
+
+def get_or_create_resource_id(db: Session, name: str) -> int:
+    """
+    Id of the resource called `name`, creating it if needed. Creating commits
+    its own transaction, so call this before making any other change.
+    """
+    resource_id = get_resource_id(db, name)
+    if resource_id is not None:
+        return resource_id
+    try:
+        db.execute(insert(Resource).values(name=name))
+        db.commit()
+    except IntegrityError:
+        db.rollback() # Created concurrently by another request
+    return get_resource_id(db, name)
@@ -1,7 +1,10 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
+from app.services import token_revocation
+from app.services.user_cache import user_cache
 
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -9,11 +12,23 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def get_appointments_version(db: Session, user_id: int):
+    """(appointments_version, appointments_changed_at) of the user, or None; always read from the DB."""
+    return db.query(User.appointments_version, User.appointments_changed_at).filter(User.id == user_id).first()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def get_users(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    """Users by id; pass the last id of the previous page as `after_id` (keyset) rather than `skip` (OFFSET)."""
+    query = db.query(User).order_by(User.id)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    # Callers on the event loop hash in the password executor and pass the result in
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -25,8 +40,13 @@ def create_user(db: Session, user: UserCreate):
     db.refresh(db_user)
     return db_user
 
+# Changes that make claims baked into existing access tokens wrong or unsafe
+_TOKEN_REVOKING_FIELDS = {"email", "password", "is_active", "is_superuser"}
+
 def update_user(db: Session, db_user: User, user_in: UserUpdate):
+    old_email = db_user.email
     user_data = user_in.model_dump(exclude_unset=True) # Pydantic V2
+    revoke_tokens = bool(_TOKEN_REVOKING_FIELDS.intersection(user_data))
     if "password" in user_data and user_data["password"]:
         hashed_password = get_password_hash(user_data["password"])
         del user_data["password"] # remove plain password
@@ -36,8 +56,13 @@ def update_user(db: Session, db_user: User, user_in: UserUpdate):
         setattr(db_user, key, value)
 
     db.add(db_user)
+    if revoke_tokens:
+        token_revocation.revoke_user_tokens(db, db_user.id) # Committed with the change, so no worker trusts old claims after it
     db.commit()
     db.refresh(db_user)
+    # Drop cached auth snapshots so the change (e.g. is_active=False) applies on the next request
+    user_cache.invalidate(old_email)
+    user_cache.invalidate(db_user.email)
     return db_user
 
 # TODO: Add delete_user if needed
\ No newline at end of file
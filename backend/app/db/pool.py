@@ -0,0 +1,86 @@
+import collections
+import logging
+import threading
+import time
+from typing import Any, Deque, Dict, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool, QueuePool
+
+from app.core.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """
+    Checkout counters for one engine's pool in this worker process.
+    Wait time is how long a request blocked for a connection, which is what
+    grows first when the pool (or the database's connection limit) is too small.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self._waits: Deque[float] = collections.deque(maxlen=1024) # Recent checkout wait times (seconds)
+            self._max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self._waits.append(wait)
+            self._max_wait = max(self._max_wait, wait)
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds": {
+                    "p50": percentile(waits, 0.50),
+                    "p95": percentile(waits, 0.95),
+                    "p99": percentile(waits, 0.99),
+                    "max": self._max_wait,
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+            })
+        return stats
+
+
+def instrumented_pool(base: Type[QueuePool], stats: PoolStats) -> Type[QueuePool]:
+    """
+    Subclass of `base` (QueuePool or AsyncAdaptedQueuePool) that times every
+    checkout into `stats`. Pool.recreate() (engine.dispose()) builds a new pool
+    from self.__class__, so the stats carry over.
+    """
+
+    def _do_get(self: QueuePool) -> Any:
+        started = time.perf_counter()
+        try:
+            entry = base._do_get(self)
+        except exc.TimeoutError:
+            stats.record(time.perf_counter() - started, timed_out=True)
+            logger.warning(f"{stats.name} pool exhausted: {self.status()}")
+            raise
+        stats.record(time.perf_counter() - started)
+        return entry
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
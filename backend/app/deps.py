@@ -2,21 +2,20 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
-from app.models.user import User as UserModel
+from app.db.session import AsyncSessionLocal, get_async_db
 from app.schemas.token import TokenData
-import app.crud.crud_user as crud_user
+import app.crud.async_crud_user as async_crud_user
+from app.services import token_revocation
+from app.services.user_cache import UserSnapshot, user_cache
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/users/token" # Ensure this matches login route
 )
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> UserModel:
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -33,23 +32,75 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = crud_user.get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    if token_revocation.is_denied(payload):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token has been revoked",
+        )
+    return payload
+
+async def _load_user(db: AsyncSession, payload: dict) -> UserSnapshot:
+    email = payload["sub"]
+    snapshot = user_cache.get(email) # No DB round trip on a hit
+    if snapshot is None:
+        user = await async_crud_user.get_user_by_email(db, email=email)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        snapshot = UserSnapshot.from_user(user)
+        user_cache.set(email, snapshot)
+    if token_revocation.user_tokens_revoked(payload, snapshot.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token has been revoked",
+        )
+    return snapshot
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> UserSnapshot:
+    await token_revocation.sync()
+    payload = _decode_token(token)
+    return await _load_user(db, payload)
+
+async def get_current_user_from_claims(
+    token: str = Depends(reusable_oauth2)
+) -> UserSnapshot:
+    """
+    Like get_current_user, but trusts the signed user claims of a claims-mode
+    token (see ACCESS_TOKEN_MODE) so no session or query is needed. Falls back
+    to the DB lookup for subject-only tokens and for claims that are too old or
+    were revoked.
+    """
+    await token_revocation.sync()
+    payload = _decode_token(token)
+    if "uid" in payload and token_revocation.claims_are_current(payload):
+        return UserSnapshot(
+            id=payload["uid"],
+            email=payload["sub"],
+            full_name=payload.get("name"),
+            is_active=payload.get("act", False),
+            is_superuser=payload.get("su", False),
+        )
+    async with AsyncSessionLocal() as db:
+        return await _load_user(db, payload)
 
 def get_current_active_user(
-    current_user: UserModel = Depends(get_current_user),
-) -> UserModel:
+    current_user: UserSnapshot = Depends(get_current_user),
+) -> UserSnapshot:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 def get_current_active_superuser(
-    current_user: UserModel = Depends(get_current_active_user),
-) -> UserModel:
+    current_user: UserSnapshot = Depends(get_current_active_user),
+) -> UserSnapshot:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def get_current_active_user_from_claims(
+    current_user: UserSnapshot = Depends(get_current_user_from_claims),
+) -> UserSnapshot:
+    return get_current_active_user(current_user)
@@ -0,0 +1,81 @@
+"""
+Standalone notification dispatcher.
+
+Claims due rows from the notification_outbox table in batches and sends them,
+retrying failures with exponential backoff. Run as many copies as needed:
+row claiming guarantees each row is sent by only one of them.
+
+    python -m app.dispatcher                 # run until interrupted
+    python -m app.dispatcher --once          # drain what is due now and exit
+    python -m app.dispatcher --fake-email    # record emails locally instead of calling ACS
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from app.core.config import settings
+from app.db.session import engine
+from app.db.base_class import Base
+# Imported only to register the models: their tables (create_all below) and the
+# relationships between them, which the mapper resolves by name
+import app.models.appointment
+import app.models.appointment_series
+import app.models.appointment_tombstone
+import app.models.notification_outbox
+import app.models.resource
+import app.models.slot_lock
+import app.models.token_revocation
+import app.models.user
+from app.services.fake_email_client import FakeEmailClient
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.notification_outbox import OutboxPoller
+from app.services.notification_service import set_email_client
+
+logger = logging.getLogger("app.dispatcher")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send queued notification emails from the outbox.")
+    parser.add_argument("--workers", type=int, default=settings.NOTIFICATION_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=settings.OUTBOX_POLL_INTERVAL_SECONDS)
+    parser.add_argument("--once", action="store_true", help="Drain due rows once and exit.")
+    parser.add_argument("--fake-email", action="store_true", help="Use a local FakeEmailClient instead of ACS.")
+    args = parser.parse_args()
+    # force: importing notification_service already configured the root logger, without timestamps
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s",
+        force=True,
+    )
+
+    if args.fake_email:
+        set_email_client(FakeEmailClient())
+        Base.metadata.create_all(bind=engine) # Handy for local runs against a fresh SQLite file
+
+    dispatcher = NotificationDispatcher(
+        workers=args.workers,
+        max_queue_size=args.batch_size * 2,
+        enqueue_timeout=settings.OUTBOX_CLAIM_TIMEOUT_SECONDS, # Wait for the pool instead of letting claims lapse
+    )
+    poller = OutboxPoller(dispatcher, batch_size=args.batch_size, poll_interval=args.poll_interval)
+    dispatcher.start()
+
+    if args.once:
+        while poller.poll_once():
+            pass
+        dispatcher.stop()
+        logger.info(f"Outbox drained: {dispatcher.stats()}")
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    poller.start()
+    logger.info(f"Dispatcher running (workers={args.workers}, batch_size={args.batch_size}).")
+    stop.wait()
+    poller.stop()
+    dispatcher.stop()
+
+if __name__ == "__main__":
+    main()
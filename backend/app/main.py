@@ -2,9 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.api.v1.api import api_router
 from app.db.session import engine # For table creation
 from app.db.base_class import Base # For table creation
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_outbox import outbox_poller
+from app.core.security import shutdown_hash_executor
 
 # This is a simple way to create tables for development.
 # For production, you'd typically use Alembic for migrations.
@@ -62,6 +66,7 @@ if processed_origins: # Only add middleware if we have valid origins
         allow_credentials=True,
         allow_methods=["*"], 
         allow_headers=["*"], 
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"], # Readable by the frontend's fetch
     )
 else:
     print("WARNING: No valid CORS origins processed. CORSMiddleware NOT added or using default restrictive behavior.")
@@ -69,6 +74,15 @@ else:
 @app.on_event("startup")
 async def startup_event():
     create_tables() # Create tables on startup
+    notification_dispatcher.start()
+    if settings.OUTBOX_POLL_IN_APP:
+        outbox_poller.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    outbox_poller.stop()
+    notification_dispatcher.stop() # Drain queued emails before the worker exits
+    shutdown_hash_executor()
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SQLAlchemyEnum, literal
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 import datetime
@@ -12,6 +12,9 @@ class AppointmentStatus(enum.Enum):
     COMPLETED = "completed"
     NO_SHOW = "no_show"
 
+# Statuses that occupy a time slot (checked for overlaps). The order matters: the
+# filtered index's WHERE clause and the overlap query must render the same IN list.
+BLOCKING_STATUSES = (AppointmentStatus.CONFIRMED, AppointmentStatus.PENDING_CONFIRMATION)
 
 class Appointment(Base):
     __tablename__ = "appointments"  
@@ -26,5 +29,42 @@ class Appointment(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False) 
     owner = relationship("User", back_populates="appointments")
 
+    resource_id = Column(Integer, ForeignKey("resources.id"), nullable=False) # Derived from service_name
+    resource = relationship("Resource", back_populates="appointments")
 
+    # Owner's appointments_version of the last change to this row (see GET /appointments/changes)
+    change_version = Column(Integer, nullable=False, default=0, server_default="0")
 
+    __table_args__ = (
+        # Owner listing: WHERE owner_id = ? ORDER BY start_time
+        Index("ix_appointments_owner_id_start_time", "owner_id", "start_time"),
+        # Change feed: WHERE owner_id = ? AND change_version > ? ORDER BY change_version
+        Index("ix_appointments_owner_id_change_version", "owner_id", "change_version"),
+        # Overlap check: WHERE resource_id = ? AND end_time > ? AND start_time < ?
+        # AND status IN (blocking). After the resource, end_time leads because "ends
+        # after the new start" only matches upcoming appointments, while "starts
+        # before the new end" matches the whole history.
+        # Filtered to blocking statuses where the dialect supports it.
+        Index(
+            "ix_appointments_blocking_resource_id_end_time_start_time", "resource_id", "end_time", "start_time",
+            mssql_where=status.in_(BLOCKING_STATUSES),
+            postgresql_where=status.in_(BLOCKING_STATUSES),
+            sqlite_where=status.in_(BLOCKING_STATUSES),
+        ),
+        # IDs are never reused (SQLite would reuse the highest one after a delete,
+        # which IDENTITY doesn't), so a tombstone can't be mistaken for a new row
+        {"sqlite_autoincrement": True},
+    )
+
+
+def blocking_status_clause(status_column=None):
+    """
+    `status IN (blocking statuses)` with the values inlined rather than bound,
+    so the planner can match it to the filtered index (SQL Server won't use a
+    filtered index for a parameterized predicate). `status_column` defaults to
+    Appointment.status.
+    """
+    status_column = Appointment.status if status_column is None else status_column
+    return status_column.in_([
+        literal(status, status_column.type, literal_execute=True) for status in BLOCKING_STATUSES
+    ])
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SQLAlchemyEnum
+from sqlalchemy.orm import relationship
+from app.db.base_class import Base
+from app.models.appointment import AppointmentStatus, BLOCKING_STATUSES
+
+
+class AppointmentSeries(Base):
+    """
+    A recurring appointment stored as its rule (RRULE-style FREQ/INTERVAL/
+    COUNT/UNTIL) rather than one row per occurrence. Occurrences are expanded
+    on demand by app.services.recurrence, only for the window being looked at.
+    start_time/end_time are the first occurrence; last_end is the end of the
+    last one, so "series active during [start, end)" is a plain range filter.
+    """
+    __tablename__ = "appointment_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    service_name = Column(String(255), nullable=False)
+    notes = Column(String(500), nullable=True)
+    status = Column(SQLAlchemyEnum(AppointmentStatus), nullable=False, default=AppointmentStatus.PENDING_CONFIRMATION)
+    start_time = Column(DateTime, nullable=False) # First occurrence
+    end_time = Column(DateTime, nullable=False)
+    freq = Column(String(10), nullable=False) # "daily" or "weekly"
+    interval = Column(Integer, nullable=False, default=1) # Every `interval` days/weeks
+    count = Column(Integer, nullable=True) # Number of occurrences (before exceptions); None: until `until`
+    until = Column(DateTime, nullable=True) # No occurrence starts after this
+    last_end = Column(DateTime, nullable=False) # End of the last occurrence
+
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    resource_id = Column(Integer, ForeignKey("resources.id"), nullable=False)
+
+    # Always needed with the rule, so loaded with it
+    exceptions = relationship(
+        "AppointmentSeriesException", lazy="selectin", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    __table_args__ = (
+        # Conflict checks: WHERE resource_id = ? AND last_end > ? AND start_time < ? AND status IN (blocking)
+        Index(
+            "ix_appointment_series_blocking_resource_id_last_end", "resource_id", "last_end", "start_time",
+            mssql_where=status.in_(BLOCKING_STATUSES),
+            postgresql_where=status.in_(BLOCKING_STATUSES),
+            sqlite_where=status.in_(BLOCKING_STATUSES),
+        ),
+        Index("ix_appointment_series_owner_id_start_time", "owner_id", "start_time"),
+    )
+
+
+class AppointmentSeriesException(Base):
+    """An occurrence of a series that was cancelled, identified by its original start."""
+    __tablename__ = "appointment_series_exceptions"
+
+    series_id = Column(Integer, ForeignKey("appointment_series.id", ondelete="CASCADE"), primary_key=True)
+    original_start = Column(DateTime, primary_key=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from app.db.base_class import Base
+
+
+class AppointmentTombstone(Base):
+    """
+    Left behind when an appointment is deleted, so GET /appointments/changes
+    can tell clients to drop it. change_version is the owner's version of
+    the delete, in the same sequence as Appointment.change_version.
+    """
+    __tablename__ = "appointment_tombstones"
+
+    appointment_id = Column(Integer, primary_key=True, autoincrement=False) # Not a foreign key: the appointment is gone
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    change_version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False) # UTC
+
+    __table_args__ = (
+        Index("ix_appointment_tombstones_owner_id_change_version", "owner_id", "change_version"),
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, Enum as SQLAlchemyEnum
+from app.db.base_class import Base
+import datetime
+import enum
+
+class NotificationOutboxStatus(enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed" # Gave up after OUTBOX_MAX_ATTEMPTS
+
+
+class NotificationOutbox(Base):
+    """
+    A notification waiting to be sent. Rows are written in the same transaction
+    as the appointment change, so a committed change always has its email queued.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False) # e.g. "appointment_created"
+    recipient_email = Column(String(255), nullable=False)
+    recipient_name = Column(String(255), nullable=True)
+    payload = Column(Text, nullable=False) # JSON encoded appointment details
+    coalesce_key = Column(String(64), nullable=True, index=True) # e.g. "appointment:42"; changes with the same key are merged while pending
+    status = Column(SQLAlchemyEnum(NotificationOutboxStatus), nullable=False, default=NotificationOutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow) # Next time the row may be sent (UTC)
+    claimed_by = Column(String(64), nullable=True) # Claim token of the dispatcher currently sending it
+    claimed_until = Column(DateTime, nullable=True) # Claim expires so a crashed dispatcher's rows are retried
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Access path of the dispatcher's claim query
+        Index("ix_notification_outbox_status_available_at", "status", "available_at"),
+    )
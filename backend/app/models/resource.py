@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import relationship
+from app.db.base_class import Base
+
+
+class Resource(Base):
+    """
+    A bookable provider/room. Each resource has its own timeline: appointments
+    only conflict with appointments for the same resource. Created on demand
+    from an appointment's service_name.
+    """
+    __tablename__ = "resources"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, nullable=False)
+
+    appointments = relationship("Appointment", back_populates="resource")
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from app.db.base_class import Base
+
+
+class SlotLock(Base):
+    """
+    One row per resource and SLOT_LOCK_BUCKET_MINUTES of its timeline. A booking
+    locks the rows of every bucket it touches before its final overlap check,
+    so two overlapping bookings (which always share a bucket) are serialized
+    while bookings in different buckets or for other resources proceed in
+    parallel. Rows are created on first use and never deleted.
+    """
+    __tablename__ = "appointment_slot_locks"
+
+    resource_id = Column(Integer, ForeignKey("resources.id"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    version = Column(Integer, nullable=False, default=0) # Bumped by every booking that locks the bucket
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.db.base_class import Base
+
+
+class TokenRevocation(Base):
+    """
+    A revoked access token (jti set, e.g. on logout) or every token of a user
+    issued before revoked_at (user_id set, e.g. after a password change).
+    Shared by all workers through the database; a row is useless, and may be
+    deleted, once expires_at has passed.
+    """
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(64), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    revoked_at = Column(DateTime, nullable=False) # UTC
+    expires_at = Column(DateTime, nullable=False, index=True) # UTC; when every token it affects has expired
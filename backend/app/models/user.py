@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -9,5 +9,9 @@ class User(Base):
     full_name = Column(String(255), index=True)
     is_active = Column(Boolean(), default=True)
     is_superuser = Column(Boolean(), default=False)
+    # Bumped in the same transaction as every change to the user's appointments or
+    # series; the calendar feed's ETag/Last-Modified are derived from them
+    appointments_version = Column(Integer, nullable=False, default=0, server_default="0")
+    appointments_changed_at = Column(DateTime, nullable=True) # UTC
     # TODO: Add relationship to appointments
     appointments = relationship("Appointment", back_populates="owner")
\ No newline at end of file
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, field_validator, ValidationInfo
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator, ValidationInfo
+from typing import List, Literal, Optional
 import datetime
 from app.models.appointment import AppointmentStatus
+from app.services.recurrence import PERIODS
 
 class AppointmentBase(BaseModel):
     service_name: str
@@ -18,6 +19,27 @@ class AppointmentBase(BaseModel):
 
 class AppointmentCreate(AppointmentBase):
     pass 
+
+class AppointmentBulkCreate(BaseModel):
+    appointments: List[AppointmentCreate]
+
+class AppointmentSeriesCreate(AppointmentBase):
+    """start_time/end_time are the first occurrence; it repeats every `interval` days or weeks."""
+    freq: Literal["daily", "weekly"]
+    interval: int = Field(1, ge=1)
+    count: Optional[int] = Field(None, ge=1) # Number of occurrences
+    until: Optional[datetime.datetime] = None # Last possible occurrence start
+
+    @model_validator(mode="after")
+    def must_end_and_not_overlap_itself(self) -> "AppointmentSeriesCreate":
+        if self.count is None and self.until is None:
+            raise ValueError("count or until is required")
+        if self.end_time - self.start_time > PERIODS[self.freq] * self.interval:
+            raise ValueError("An occurrence can't last longer than the recurrence interval")
+        return self
+
+class SeriesOccurrenceCancel(BaseModel):
+    original_start: datetime.datetime # As returned by GET /occurrences
 class AppointmentUpdate(BaseModel):
     service_name: Optional[str] = None
     start_time: Optional[datetime.datetime] = None
@@ -40,10 +62,71 @@ class AppointmentUpdate(BaseModel):
 
 
 
+class AvailableSlot(BaseModel):
+    start_time: datetime.datetime
+    end_time: datetime.datetime
+
+
 class Appointment(AppointmentBase):
     id: int
     owner_id: int
+    resource_id: int
+    status: AppointmentStatus
+    change_version: int
+
+    class Config:
+        from_attributes = True # Pydantic V2 compatibility
+
+
+class AppointmentBulkItemResult(BaseModel):
+    index: int # Position of the item in the request
+    status: str # "created", "conflict" or "invalid"
+    appointment: Optional[Appointment] = None
+    detail: Optional[str] = None
+
+
+class AppointmentBulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[AppointmentBulkItemResult]
+
+
+class AppointmentSeriesException(BaseModel):
+    original_start: datetime.datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AppointmentSeries(AppointmentBase):
+    id: int
+    owner_id: int
+    resource_id: int
     status: AppointmentStatus
+    freq: str
+    interval: int
+    count: Optional[int] = None
+    until: Optional[datetime.datetime] = None
+    last_end: datetime.datetime
+    exceptions: List[AppointmentSeriesException] = []
 
     class Config:
-        from_attributes = True # Pydantic V2 compatibility
\ No newline at end of file
+        from_attributes = True
+
+
+class AppointmentOccurrence(BaseModel):
+    """A single appointment (appointment_id) or one occurrence of a series (series_id)."""
+    appointment_id: Optional[int] = None
+    series_id: Optional[int] = None
+    service_name: str
+    start_time: datetime.datetime
+    end_time: datetime.datetime
+    status: AppointmentStatus
+    notes: Optional[str] = None
+
+
+class AppointmentChanges(BaseModel):
+    changed: List[Appointment] # Created or updated; replace the client's copy
+    deleted: List[int] # IDs of deleted appointments
+    since: int # Pass as ?since= on the next call
+    has_more: bool # Call again right away for the rest
@@ -0,0 +1,198 @@
+"""
+Read-through cache for the appointment read endpoints (a single appointment
+and the owner's list pages), whose data changes far less often than it's read.
+
+Entries are JSON-compatible dicts (not ORM objects, which belong to a
+session), keyed under a per-owner generation token:
+"appointments:<owner>:<generation>:<what>". async_crud_appointment replaces
+the owner's token after each committed write, which orphans every cached page
+and appointment of that owner at once, and only of that owner; the orphans
+age out of the backend. A reader takes the token before querying, so a
+result read before a write can only be stored under the old token.
+
+Concurrent misses on the same key (e.g. a page many clients refresh right
+after a change) are single-flighted: one request queries, the others await
+its result.
+
+The backend is pluggable: MemoryBackend is per worker, so another worker's
+write is only seen once the entry expires (APPOINTMENT_CACHE_TTL_SECONDS);
+RedisBackend is shared by all workers, generations included, so writes
+anywhere invalidate everywhere. Backend calls are coroutines (RedisBackend
+uses redis.asyncio), so a slow or unreachable Redis never blocks the event
+loop; that's also why invalidation happens in the async crud, once the sync
+crud has committed, rather than inside it.
+"""
+import asyncio
+import json
+import logging
+import math
+import secrets
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Key/value store for JSON-compatible values, used from the event loop."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """Store `value`; `ttl` None: until evicted."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """This worker's LRU (see TTLCache)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        self._cache.set(key, value, ttl=math.inf if ttl is None else ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        return {"size": stats["size"], "maxsize": stats["maxsize"]}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Any client with redis-py's asyncio get/set (redis.asyncio.Redis, or a
+    stand-in with the same coroutines). Values are stored as JSON.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        import redis.asyncio # Optional dependency, only needed with APPOINTMENT_CACHE_BACKEND=redis
+        return cls(redis.asyncio.Redis.from_url(url, socket_timeout=0.5))
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        await self.client.set(key, json.dumps(value), px=None if ttl is None else int(ttl * 1000))
+
+
+_FAILED = object() # Result of a flight whose load raised; each waiter then loads for itself
+
+
+class AppointmentCache:
+    """Owner-scoped read-through cache over a CacheBackend, with single-flight loads and hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._flights: Dict[str, "asyncio.Future[Any]"] = {} # Key -> load in progress
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0 # Misses that waited for another request's load instead of querying
+        self.invalidations = 0
+        self.errors = 0 # Backend failures (the request then goes to the database)
+
+    async def _generation(self, owner_id: int) -> str:
+        key = f"appointments:{owner_id}:generation"
+        generation = await self.backend.get(key)
+        if generation is None:
+            # Unknown (new owner, or evicted): any fresh token is safe, it just starts cold.
+            # Two workers racing here both write one; the loser's entries are orphaned.
+            generation = secrets.token_hex(4)
+            await self.backend.set(key, generation, None)
+        return generation
+
+    async def invalidate_owner(self, owner_id: int) -> None:
+        """Orphan everything cached for the owner; call after committing a change to their appointments."""
+        try:
+            await self.backend.set(f"appointments:{owner_id}:generation", secrets.token_hex(4), None)
+        except Exception:
+            # The database is already committed; the entries now live until their TTL
+            logger.exception(f"Could not invalidate cached appointments of owner {owner_id}")
+            self._count("errors")
+            return
+        self._count("invalidations")
+
+    async def get_or_load(self, owner_id: int, what: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        The cached value for the owner's `what`, or the result of `load()`
+        (stored unless None). Backend failures fall back to `load()`.
+        """
+        if self.ttl <= 0:
+            return await load()
+        try:
+            key = f"appointments:{owner_id}:{await self._generation(owner_id)}:{what}"
+            value = await self.backend.get(key)
+        except Exception:
+            logger.exception("Appointment cache backend failed; reading from the database")
+            self._count("errors")
+            return await load()
+        if value is not None:
+            self._count("hits")
+            return value
+        self._count("misses")
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._count("coalesced")
+            value = await asyncio.shield(flight) # Our cancellation mustn't cancel the others' load
+            return await load() if value is _FAILED else value
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            value = await load()
+        except BaseException:
+            flight.set_result(_FAILED)
+            raise
+        finally:
+            del self._flights[key]
+        if not flight.done():
+            flight.set_result(value)
+        if value is not None:
+            try:
+                await self.backend.set(key, value, self.ttl)
+            except Exception:
+                logger.exception("Could not store appointments in the cache")
+                self._count("errors")
+        return value
+
+    def _count(self, counter: str) -> None:
+        setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            **self.backend.stats(),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+def _backend() -> CacheBackend:
+    if settings.APPOINTMENT_CACHE_BACKEND == "redis":
+        return RedisBackend.from_url(settings.APPOINTMENT_CACHE_REDIS_URL)
+    return MemoryBackend(maxsize=settings.APPOINTMENT_CACHE_MAX_SIZE, ttl=settings.APPOINTMENT_CACHE_TTL_SECONDS)
+
+
+appointment_cache = AppointmentCache(_backend(), ttl=settings.APPOINTMENT_CACHE_TTL_SECONDS)
@@ -0,0 +1,56 @@
+import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+
+def free_slots(
+    busy: Iterable[Interval],
+    *,
+    window_start: datetime.datetime,
+    window_end: datetime.datetime,
+    duration: datetime.timedelta,
+    not_before: Optional[datetime.datetime] = None,
+) -> List[Interval]:
+    """
+    Slots of `duration` inside [window_start, window_end), on a grid starting at
+    window_start, that don't overlap any busy interval. `busy` must be sorted by
+    start; one pass over it, so the cost is linear in intervals + slots.
+    """
+    slots = []
+    cursor = window_start # Start of the next candidate slot
+    busy_iter = iter(busy)
+    next_busy = next(busy_iter, None)
+    while cursor + duration <= window_end:
+        slot_end = cursor + duration
+        # Skip busy intervals that ended before this slot
+        while next_busy is not None and next_busy[1] <= cursor:
+            next_busy = next(busy_iter, None)
+        if next_busy is not None and next_busy[0] < slot_end:
+            # Overlaps: jump to the first grid point at or after the busy interval's end
+            steps = -(-(next_busy[1] - window_start) // duration)
+            cursor = window_start + steps * duration
+            continue
+        if not_before is None or cursor >= not_before:
+            slots.append((cursor, slot_end))
+        cursor = slot_end
+    return slots
+
+
+# (resource id, date) -> sorted (start, end) of the resource's blocking appointments overlapping that day.
+# Writes in this worker invalidate the days they touch; the TTL bounds how long
+# another worker's booking can go unseen (bookings are still checked on create).
+busy_by_day = TTLCache(maxsize=settings.AVAILABILITY_CACHE_MAX_DAYS, ttl=settings.AVAILABILITY_CACHE_TTL_SECONDS)
+
+
+def invalidate(resource_id: int, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> None:
+    """Drop the resource's cached days an appointment spanning [start, end) falls on."""
+    if start is None or end is None:
+        return
+    day = start.date()
+    while day <= end.date():
+        busy_by_day.invalidate((resource_id, day))
+        day += datetime.timedelta(days=1)
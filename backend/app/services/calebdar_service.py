@@ -0,0 +1,144 @@
+"""
+Calendar export: a user's appointments and series as an iCalendar (RFC 5545)
+feed that calendar apps subscribe to.
+
+The feed is rendered from the database on each full GET, streamed in chunks
+from a server-side cursor so memory stays flat however many appointments a
+user has. Its ETag comes from the user's appointments_version, which every
+appointment write bumps, so the frequent polls calendar apps make are
+answered with a 304 from a single-row lookup.
+"""
+import datetime
+from email.utils import format_datetime
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus
+from app.models.appointment_series import AppointmentSeries
+from app.services import recurrence
+
+PRODID = "-//Appointments API//Calendar Feed//EN"
+_RRULE_FREQ = {"daily": "DAILY", "weekly": "WEEKLY"}
+_STATUS = {
+    AppointmentStatus.PENDING_CONFIRMATION: "TENTATIVE",
+    AppointmentStatus.CONFIRMED: "CONFIRMED",
+    AppointmentStatus.CANCELLED_BY_USER: "CANCELLED",
+    AppointmentStatus.CANCELLED_BY_ADMIN: "CANCELLED",
+    AppointmentStatus.COMPLETED: "CONFIRMED",
+    AppointmentStatus.NO_SHOW: "CONFIRMED",
+}
+_EPOCH = datetime.datetime(1970, 1, 1) # DTSTAMP for users who never changed anything
+
+
+# --- Conditional GET ---
+
+def feed_etag(user_id: int, version: int) -> str:
+    """
+    Strong ETag of the user's feed. The body only depends on data covered by
+    the version (DTSTAMP is the last change, not the current time), so equal
+    versions render byte-identical feeds.
+    """
+    return f'"calendar-{user_id}-{version}"'
+
+def last_modified(changed_at: Optional[datetime.datetime]) -> Optional[str]:
+    """HTTP-date for a naive UTC timestamp."""
+    if changed_at is None:
+        return None
+    return format_datetime(changed_at.replace(tzinfo=datetime.timezone.utc), usegmt=True)
+
+
+# --- Rendering ---
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (continuation lines start with a space)."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start = [], 0
+    while start < len(encoded):
+        end = min(start + (75 if start == 0 else 74), len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80: # Don't split a UTF-8 sequence
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start = end
+    return "\r\n ".join(parts) + "\r\n"
+
+def _local_time(dt: datetime.datetime) -> str:
+    # Stored as naive wall-clock time, so exported as "floating" time
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+def _utc_time(dt: datetime.datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+def _event(uid: str, dtstamp: str, service_name: str, start: datetime.datetime, end: datetime.datetime,
+           status: AppointmentStatus, notes: Optional[str], extra: Sequence[str] = ()) -> str:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART:{_local_time(start)}",
+        f"DTEND:{_local_time(end)}",
+        f"SUMMARY:{_escape(service_name)}",
+        f"STATUS:{_STATUS.get(status, 'CONFIRMED')}",
+        *extra,
+    ]
+    if notes:
+        lines.append(f"DESCRIPTION:{_escape(notes)}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+def render_appointment(row, dtstamp: str) -> str:
+    """VEVENT for an appointment row (id, service_name, start_time, end_time, status, notes)."""
+    return _event(
+        f"appointment-{row.id}@{settings.CALENDAR_UID_DOMAIN}", dtstamp,
+        row.service_name, row.start_time, row.end_time, row.status, row.notes,
+    )
+
+def render_series(series: AppointmentSeries, dtstamp: str) -> str:
+    """One VEVENT with an RRULE (and EXDATEs) for a whole series, rather than one per occurrence."""
+    rule = recurrence.rule_for(series)
+    last_start = rule.start + (rule.count - 1) * rule.period
+    extra = [f"RRULE:FREQ={_RRULE_FREQ[series.freq]};INTERVAL={series.interval};UNTIL={_local_time(last_start)}"]
+    extra.extend(f"EXDATE:{_local_time(start)}" for start in sorted(rule.excluded))
+    return _event(
+        f"series-{series.id}@{settings.CALENDAR_UID_DOMAIN}", dtstamp,
+        series.service_name, series.start_time, series.end_time, series.status, series.notes, extra,
+    )
+
+def stream_feed(user_id: int, changed_at: Optional[datetime.datetime]) -> Iterator[str]:
+    """
+    Yield the user's feed in chunks of about CALENDAR_FEED_BATCH_SIZE events.
+    Runs its own session (the request's may be gone while the body streams)
+    and reads appointments as plain column rows through a server-side cursor,
+    so neither the rows nor ORM objects accumulate.
+    """
+    dtstamp = _utc_time(changed_at or _EPOCH)
+    yield "".join(_fold(line) for line in (
+        "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+    ))
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                AppointmentModel.id, AppointmentModel.service_name, AppointmentModel.start_time,
+                AppointmentModel.end_time, AppointmentModel.status, AppointmentModel.notes,
+            )
+            .where(AppointmentModel.owner_id == user_id)
+            .order_by(AppointmentModel.start_time, AppointmentModel.id)
+            .execution_options(yield_per=settings.CALENDAR_FEED_BATCH_SIZE)
+        )
+        for batch in rows.partitions():
+            yield "".join(render_appointment(row, dtstamp) for row in batch)
+
+        # A user has few series, and each is a single event
+        series = db.scalars(
+            select(AppointmentSeries).where(AppointmentSeries.owner_id == user_id).order_by(AppointmentSeries.id)
+        ).all()
+        if series:
+            yield "".join(render_series(one, dtstamp) for one in series)
+    yield _fold("END:VCALENDAR")
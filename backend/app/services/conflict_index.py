@@ -0,0 +1,231 @@
+import bisect
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Intervals ending before (load time - lookback) are left out; checks for slots
+# starting before the horizon go to the database instead.
+_LOOKBACK = datetime.timedelta(days=1)
+
+Interval = Tuple[int, int, datetime.datetime, datetime.datetime] # (appointment id, resource id, start, end)
+
+
+def _naive(dt: datetime.datetime) -> datetime.datetime:
+    # Columns are naive DateTime; an aware value is stored with its wall-clock time
+    return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
+class _Timeline:
+    """One resource's blocking intervals as parallel arrays sorted by start."""
+
+    def __init__(self):
+        self.starts: List[datetime.datetime] = []
+        self.ends: List[datetime.datetime] = []
+        self.ids: List[int] = []
+        self.max_duration = datetime.timedelta(0)
+
+    def find(self, start: datetime.datetime, end: datetime.datetime, exclude_id: Optional[int]) -> Optional[int]:
+        # Only intervals starting before `end` can overlap, and any that
+        # started more than the longest duration before `start` has ended.
+        i = bisect.bisect_left(self.starts, end) - 1
+        earliest = start - self.max_duration
+        while i >= 0 and self.starts[i] >= earliest:
+            if self.ends[i] > start and self.ids[i] != exclude_id:
+                return self.ids[i]
+            i -= 1
+        return None
+
+    def insert(self, appointment_id: int, start: datetime.datetime, end: datetime.datetime) -> None:
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, appointment_id)
+        self.max_duration = max(self.max_duration, end - start)
+
+    def remove(self, appointment_id: int, start: datetime.datetime) -> None:
+        i = bisect.bisect_left(self.starts, start)
+        while self.ids[i] != appointment_id:
+            i += 1
+        del self.starts[i], self.ends[i], self.ids[i]
+
+
+class ConflictIndex:
+    """
+    This worker's copy of the blocking appointments (BLOCKING_STATUSES), one
+    sorted timeline per resource, for answering "does [start, end) overlap
+    anything on this resource?" without a query.
+
+    It's (re)loaded in a background thread every CONFLICT_INDEX_TTL_SECONDS,
+    and this worker's own writes are applied to it as they commit. Other
+    workers' writes since the last load are missing, so it's only a hint:
+    a hit names a candidate for the caller to confirm against the database
+    (and forget() if another worker has freed it), and a miss still needs
+    the EXISTS query. The database stays the authority on what gets booked.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._timelines: Dict[int, _Timeline] = {}
+        self._by_id: Dict[int, Tuple[int, datetime.datetime]] = {} # appointment id -> (resource id, start)
+        self._horizon: Optional[datetime.datetime] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0 # After a failed load
+        self._loading_writes: Optional[List[Tuple[str, Any]]] = None # Writes committed while a load is running
+
+        # Metrics
+        self.hits = 0 # Candidate conflicts found in memory
+        self.misses = 0 # Checks with no candidate
+        self.stale = 0 # Candidates the database no longer had (see forget)
+        self.loads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _covers(self, start: datetime.datetime) -> bool:
+        return self._horizon is not None and start >= self._horizon and time.monotonic() < self._expires_at
+
+    def find_conflict(
+        self,
+        resource_id: int,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        exclude_id: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+        Id of a known blocking appointment on the resource overlapping
+        [start, end), or None. None is not a guarantee (see the class
+        docstring); also None when the index is stale or doesn't reach back
+        to `start`.
+        """
+        start, end = _naive(start), _naive(end)
+        with self._lock:
+            if not self._covers(start):
+                self.misses += 1
+                return None
+            timeline = self._timelines.get(resource_id)
+            conflict = timeline.find(start, end, exclude_id) if timeline is not None else None
+            if conflict is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return conflict
+
+    def refresh(self, fetch: Callable[[datetime.datetime], Iterable[Interval]]) -> bool:
+        """
+        Start load(fetch) in a background thread if the contents are due for
+        a reload and no load is running; returns whether one was started.
+        Until it's done, checks find no candidates (the old contents have
+        expired).
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not self.enabled or self._loading_writes is not None or now < max(self._expires_at, self._retry_at):
+                return False
+            self._loading_writes = []
+        threading.Thread(target=self._load_logged, args=(fetch,), name="conflict-index-load", daemon=True).start()
+        return True
+
+    def _load_logged(self, fetch: Callable[[datetime.datetime], Iterable[Interval]]) -> None:
+        try:
+            self._load(fetch)
+        except Exception:
+            logger.exception("Could not load the conflict index; checks go to the database until it loads")
+            with self._lock:
+                self._retry_at = time.monotonic() + self.ttl
+
+    def load(self, fetch: Callable[[datetime.datetime], Iterable[Interval]]) -> None:
+        """Replace the contents with `fetch(horizon)`: blocking intervals ending after `horizon`."""
+        with self._lock:
+            self._loading_writes = []
+        self._load(fetch)
+
+    def _load(self, fetch: Callable[[datetime.datetime], Iterable[Interval]]) -> None:
+        # _loading_writes is already set, which keeps other loads from starting
+        horizon = datetime.datetime.now() - _LOOKBACK
+        try:
+            intervals = sorted(fetch(horizon), key=lambda interval: interval[2])
+        except BaseException:
+            with self._lock:
+                self._loading_writes = None
+            raise
+        timelines: Dict[int, _Timeline] = {}
+        for appointment_id, resource_id, start, end in intervals:
+            timeline = timelines.get(resource_id)
+            if timeline is None:
+                timeline = timelines[resource_id] = _Timeline()
+            # Appending in start order keeps each timeline sorted
+            timeline.starts.append(start)
+            timeline.ends.append(end)
+            timeline.ids.append(appointment_id)
+            timeline.max_duration = max(timeline.max_duration, end - start)
+        with self._lock:
+            self._timelines = timelines
+            self._by_id = {interval[0]: (interval[1], interval[2]) for interval in intervals}
+            self._horizon = horizon
+            self._expires_at = time.monotonic() + self.ttl
+            # The query may not have seen writes this worker committed while it ran
+            writes, self._loading_writes = self._loading_writes or [], None
+            for op, arg in writes:
+                self._apply(op, arg)
+            self.loads += 1
+
+    def record(
+        self, appointment_id: int, resource_id: int, start: datetime.datetime, end: datetime.datetime, blocking: bool
+    ) -> None:
+        """Apply a committed create/update: (re)insert the interval, or drop it if it no longer blocks."""
+        self._write("put" if blocking else "discard", (appointment_id, resource_id, _naive(start), _naive(end)))
+
+    def discard(self, appointment_id: int) -> None:
+        """Apply a committed delete."""
+        self._write("discard", (appointment_id, None, None, None))
+
+    def forget(self, appointment_id: int) -> None:
+        """Drop a candidate the database showed to be stale (changed or deleted by another worker)."""
+        with self._lock:
+            self.stale += 1
+        self.discard(appointment_id)
+
+    def _write(self, op: str, arg: Any) -> None:
+        with self._lock:
+            if self._loading_writes is not None:
+                self._loading_writes.append((op, arg))
+            self._apply(op, arg)
+
+    def _apply(self, op: str, arg: Any) -> None:
+        appointment_id, resource_id, start, end = arg
+        existing = self._by_id.pop(appointment_id, None)
+        if existing is not None:
+            self._timelines[existing[0]].remove(appointment_id, existing[1])
+        if op == "put":
+            timeline = self._timelines.get(resource_id)
+            if timeline is None:
+                timeline = self._timelines[resource_id] = _Timeline()
+            timeline.insert(appointment_id, start, end)
+            self._by_id[appointment_id] = (resource_id, start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            checks = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._by_id),
+                "resources": len(self._timelines),
+                "ttl_seconds": self.ttl,
+                "horizon": self._horizon.isoformat() if self._horizon else None,
+                "loads": self.loads,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": self.hits / checks if checks else None,
+            }
+
+
+conflict_index = ConflictIndex(ttl=settings.CONFLICT_INDEX_TTL_SECONDS)
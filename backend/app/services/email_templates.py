@@ -0,0 +1,195 @@
+"""
+Notification email bodies, rendered from the templates in app/templates/email.
+
+The templates use a small subset of Mako's syntax: ${expression}
+substitutions and "% if ...:" / "% for ...:" / "% endif" / "% endfor"
+lines. At import each one is compiled into a plain Python function that
+joins f-strings, so a render costs about what the old inline f-strings did;
+Mako's general-purpose runtime (a context object, buffers and filter
+lookups on every call) took several times longer for these small bodies.
+Anything outside the subset fails at import, not when an email is sent.
+"""
+import datetime
+import functools
+import os
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from app.models.appointment import AppointmentStatus
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "email")
+
+APPOINTMENT_CREATED = "appointment_created"
+APPOINTMENT_UPDATED = "appointment_updated"
+APPOINTMENT_CANCELLED = "appointment_cancelled"
+
+_SUBJECTS = { # Followed by the service name
+    APPOINTMENT_CREATED: "Appointment Confirmed: ",
+    APPOINTMENT_UPDATED: "Appointment Updated: ",
+    APPOINTMENT_CANCELLED: "Appointment Cancelled: ",
+}
+
+
+@functools.lru_cache(maxsize=4096) # Appointments mostly start and end on the same few slot boundaries
+def format_datetime_for_email(dt_object: Optional[datetime.datetime]) -> str:
+    """Helper to format datetime objects for email, handling None."""
+    if dt_object is None:
+        return "N/A"
+    return dt_object.strftime('%Y-%m-%d at %H:%M') # Example format
+
+
+class AppointmentEmailView(NamedTuple):
+    """
+    The appointment fields an email shows, already formatted as strings.
+    Built once per notification; templates only read attributes from it.
+    """
+    id: str
+    service_name: str
+    start_time: str
+    end_time: str
+    status: str
+    notes: str
+
+    @classmethod
+    def from_details(cls, details: Dict[str, Any]) -> "AppointmentEmailView":
+        appointment_id = details.get("id")
+        status = details.get("status")
+        if isinstance(status, AppointmentStatus):
+            status = status.value
+        notes = details.get("notes")
+        return cls( # Positionally: keyword arguments make a NamedTuple noticeably slower to build
+            str(appointment_id) if appointment_id is not None else "N/A",
+            details.get("service_name") or "N/A",
+            format_datetime_for_email(details.get("start_time")),
+            format_datetime_for_email(details.get("end_time")),
+            str(status) if status else "N/A",
+            notes if notes is not None else "None",
+        )
+
+    @classmethod
+    def from_appointment(cls, appointment: Any) -> "AppointmentEmailView":
+        return cls.from_details({
+            "id": appointment.id,
+            "service_name": appointment.service_name,
+            "start_time": appointment.start_time,
+            "end_time": appointment.end_time,
+            "status": appointment.status,
+            "notes": appointment.notes,
+        })
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    plain_text_content: str
+    html_content: str
+
+
+Render = Callable[[str, AppointmentEmailView, List[str]], str] # (recipient_name, appointment, changes) -> body
+
+_SUBSTITUTION = re.compile(r"\$\{([^}]+)\}")
+_CONTROL = re.compile(r"%\s*(?:(if|for)\s+(.+):|(endif|endfor))\s*$")
+_LITERAL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t", "{": "{{", "}": "}}"})
+
+
+@functools.lru_cache(maxsize=4096) # Times, statuses and service names repeat across emails
+def _escape_html(value: Any) -> str:
+    # Same output as markupsafe.escape (Mako's "h" filter), without building a Markup object
+    return (
+        str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        .replace('"', "&#34;").replace("'", "&#39;")
+    )
+
+
+def _fstring(text: str, html: bool) -> str:
+    """Source of an f-string producing `text` with its ${...} substituted (escaped for HTML)."""
+    parts = []
+    position = 0
+    for match in _SUBSTITUTION.finditer(text):
+        expression = match.group(1).strip()
+        parts.append(text[position:match.start()].translate(_LITERAL_ESCAPES))
+        parts.append(f"{{_escape({expression})}}" if html else f"{{{expression}}}")
+        position = match.end()
+    parts.append(text[position:].translate(_LITERAL_ESCAPES))
+    return 'f"' + "".join(parts) + '"'
+
+
+def _compile(path: str, html: bool) -> Render:
+    with open(path, encoding="utf-8") as template:
+        lines = template.read().splitlines(keepends=True)
+    code = ["def render(recipient_name, appointment, changes):", "    _out = []"]
+    depth = 1
+    text: List[str] = [] # Consecutive text lines, emitted as one f-string
+
+    def flush():
+        if text:
+            code.append("    " * depth + f"_out.append({_fstring(''.join(text), html)})")
+            text.clear()
+
+    for line in lines:
+        if not line.lstrip().startswith("%"):
+            text.append(line)
+            continue
+        control = _CONTROL.match(line.strip())
+        if control is None:
+            raise ValueError(f"{path}: unsupported template line {line!r}")
+        flush()
+        keyword, condition, end = control.groups()
+        if end:
+            depth -= 1
+            if depth < 1:
+                raise ValueError(f"{path}: % {end} without a matching block")
+        else:
+            code.append("    " * depth + f"{keyword} {condition}:")
+            depth += 1
+            code.append("    " * depth + "pass") # In case the block has no text
+    if depth != 1:
+        raise ValueError(f"{path}: unclosed % if/% for block")
+    flush()
+    if len(code) == 3: # No blocks: the body is a single f-string
+        code[1:] = ["    return " + code[2].strip()[len("_out.append("):-1]]
+    else:
+        code.append("    return ''.join(_out)")
+    namespace = {"_escape": _escape_html} # Every substitution in HTML is escaped (user-supplied notes, names, ...)
+    exec(compile("\n".join(code), path, "exec"), namespace)
+    return namespace["render"]
+
+# Compiled once when the module is imported (app startup), then reused for every email.
+_TEMPLATES: Dict[str, Dict[str, Render]] = {
+    event_type: {
+        "text": _compile(os.path.join(TEMPLATE_DIR, f"{event_type}.txt"), html=False),
+        "html": _compile(os.path.join(TEMPLATE_DIR, f"{event_type}.html"), html=True),
+    }
+    for event_type in _SUBJECTS
+}
+
+
+def describe_changes(old: AppointmentEmailView, new: AppointmentEmailView) -> List[str]:
+    """Human readable list of what differs between two versions of an appointment."""
+    changes = []
+    if old.start_time != new.start_time or old.end_time != new.end_time:
+        changes.append(f"Time changed from: {old.start_time} - {old.end_time}")
+    if old.status != new.status:
+        changes.append(f"Status changed from: {old.status}")
+    if old.service_name != new.service_name:
+        changes.append(f"Service changed from: {old.service_name}")
+    if old.notes != new.notes:
+        changes.append(f"Notes changed from: {old.notes}")
+    return changes
+
+
+def render(
+    event_type: str,
+    *,
+    recipient_name: Optional[str],
+    appointment: AppointmentEmailView,
+    changes: Optional[List[str]] = None,
+) -> RenderedEmail:
+    templates = _TEMPLATES[event_type]
+    recipient_name = recipient_name or "User"
+    changes = changes or []
+    subject_service = appointment.service_name if appointment.service_name != "N/A" else "Your Appointment"
+    return RenderedEmail(
+        subject=_SUBJECTS[event_type] + subject_service,
+        plain_text_content=templates["text"](recipient_name, appointment, changes),
+        html_content=templates["html"](recipient_name, appointment, changes),
+    )
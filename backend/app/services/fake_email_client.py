@@ -0,0 +1,42 @@
+import itertools
+import threading
+from typing import Any, Dict, List
+
+
+class FakePoller:
+    """Mimics the LROPoller returned by EmailClient.begin_send."""
+
+    def __init__(self, operation_id: str):
+        self._id = operation_id
+
+    def status(self) -> str:
+        return "Succeeded"
+
+    def done(self) -> bool:
+        return True
+
+    def result(self, timeout: float = None) -> Dict[str, Any]:
+        return {"id": self._id, "status": "Succeeded"}
+
+
+class FakeEmailClient:
+    """
+    Local stand-in for azure.communication.email.EmailClient.
+
+    Records every message instead of calling ACS. Set `fail_for` to a set of
+    recipient addresses to make sends to them raise, to exercise retries.
+    """
+
+    def __init__(self):
+        self.sent: List[Dict[str, Any]] = []
+        self.fail_for = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def begin_send(self, message: Dict[str, Any], **kwargs: Any) -> FakePoller:
+        recipients = [r["address"] for r in message["recipients"]["to"]]
+        if self.fail_for.intersection(recipients):
+            raise RuntimeError(f"FakeEmailClient: simulated failure for {recipients}")
+        with self._lock:
+            self.sent.append(message)
+            return FakePoller(f"fake-{next(self._ids)}")
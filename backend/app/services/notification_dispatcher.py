@@ -0,0 +1,158 @@
+import collections
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+# Sentinel pushed onto the queue to tell a worker thread to exit.
+_STOP = object()
+
+
+class NotificationDispatcher:
+    """
+    Bounded in-process queue + worker pool for notification jobs.
+
+    Endpoints enqueue a job (a callable and its arguments) and return as soon as
+    their DB commit is done; the worker threads drain the queue and make the
+    blocking ACS calls. Workers are threads because the ACS SDK is synchronous.
+    """
+
+    def __init__(self, workers: int, max_queue_size: int, enqueue_timeout: float):
+        self.workers = max(1, workers)
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue_size))
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+        # Metrics
+        self._enqueued = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latencies: Deque[float] = collections.deque(maxlen=1024) # Recent enqueue -> done latencies (seconds)
+        self._max_latency = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"notification-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+        logger.info(f"Notification dispatcher started with {self.workers} workers (queue size {self._queue.maxsize}).")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let the workers drain what is already queued, then stop them."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            threads = self._threads
+            self._threads = []
+        for _ in threads:
+            self._queue.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        logger.info(f"Notification dispatcher stopped. {self._queue.qsize()} job(s) left in queue.")
+
+    def enqueue(self, description: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        """
+        Queue a notification job. Returns False if the job could not be queued.
+
+        When the queue is full the caller blocks for at most `enqueue_timeout`
+        seconds (backpressure) before the job is rejected. If the dispatcher is
+        not running (e.g. in scripts), the job runs inline instead.
+        """
+        if not self._running:
+            return self._run_job(description, func, args, kwargs, time.monotonic())
+        try:
+            self._queue.put((description, func, args, kwargs, time.monotonic()), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"Notification queue full, dropping job: {description}")
+            return False
+        with self._lock:
+            self._enqueued += 1
+        return True
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                description, func, args, kwargs, enqueued_at = item
+                self._run_job(description, func, args, kwargs, enqueued_at)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(
+        self,
+        description: str,
+        func: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        enqueued_at: float,
+    ) -> bool:
+        try:
+            ok = func(*args, **kwargs) is not False
+        except Exception as e:
+            logger.error(f"Notification job '{description}' raised an error: {e}")
+            ok = False
+        latency = time.monotonic() - enqueued_at
+        with self._lock:
+            if ok:
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._latencies.append(latency)
+            self._max_latency = max(self._max_latency, latency)
+        if ok:
+            logger.info(f"Notification job '{description}' done in {latency:.3f}s")
+        else:
+            logger.warning(f"Notification job '{description}' failed after {latency:.3f}s")
+        return ok
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "running": self._running,
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "enqueued": self._enqueued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "drain_latency_seconds": {
+                    "p50": percentile(latencies, 0.50),
+                    "p95": percentile(latencies, 0.95),
+                    "p99": percentile(latencies, 0.99),
+                    "max": self._max_latency,
+                },
+            }
+
+
+notification_dispatcher = NotificationDispatcher(
+    workers=settings.NOTIFICATION_WORKERS,
+    max_queue_size=settings.NOTIFICATION_QUEUE_SIZE,
+    enqueue_timeout=settings.NOTIFICATION_ENQUEUE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,364 @@
+import datetime
+import json
+import logging
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus
+from app.models.notification_outbox import NotificationOutbox, NotificationOutboxStatus
+from app.services.notification_dispatcher import NotificationDispatcher, notification_dispatcher
+from app.services.email_templates import (
+    AppointmentEmailView,
+    APPOINTMENT_CREATED,
+    APPOINTMENT_UPDATED,
+    APPOINTMENT_CANCELLED
+)
+from app.services.notification_service import (
+    send_appointment_created_email,
+    send_appointment_updated_email,
+    send_appointment_cancelled_email
+)
+
+logger = logging.getLogger(__name__)
+
+def _utcnow() -> datetime.datetime:
+    # Outbox timestamps are naive UTC, like the other DateTime columns
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+# --- Writing (called by crud inside the caller's transaction) ---
+
+def appointment_details(appointment: AppointmentModel) -> Dict[str, Any]:
+    """Snapshot of the appointment fields the emails use."""
+    return {
+        "id": appointment.id,
+        "service_name": appointment.service_name,
+        "start_time": appointment.start_time,
+        "end_time": appointment.end_time,
+        "status": appointment.status,
+        "notes": appointment.notes,
+    }
+
+def _encode_details(details: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if details is None:
+        return None
+    encoded = dict(details)
+    for key in ("start_time", "end_time"):
+        if isinstance(encoded.get(key), datetime.datetime):
+            encoded[key] = encoded[key].isoformat()
+    if isinstance(encoded.get("status"), AppointmentStatus):
+        encoded["status"] = encoded["status"].value
+    return encoded
+
+def _decode_details(encoded: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if encoded is None:
+        return None
+    details = dict(encoded)
+    for key in ("start_time", "end_time"):
+        if details.get(key):
+            details[key] = datetime.datetime.fromisoformat(details[key])
+    if details.get("status"):
+        details["status"] = AppointmentStatus(details["status"])
+    return details
+
+def _merge(
+    existing_event: str,
+    existing_payload: Dict[str, Any],
+    event_type: str,
+    details: Dict[str, Any],
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Fold a new change into a notification that hasn't been sent yet.
+    Returns the (event_type, payload) to send instead, or None if the two
+    cancel out and nothing should be sent at all.
+    """
+    new = _encode_details(details)
+    if existing_event == APPOINTMENT_CREATED:
+        if event_type == APPOINTMENT_CANCELLED:
+            return None # Created and deleted within the window: the user never needs to hear about it
+        return APPOINTMENT_CREATED, {"appointment": new} # Confirm the final state
+    if existing_event == APPOINTMENT_UPDATED:
+        if event_type == APPOINTMENT_CANCELLED:
+            return APPOINTMENT_CANCELLED, {"appointment": new}
+        old = existing_payload.get("old_appointment")
+        if old == new:
+            return None # Moved back to where it started
+        # Keep the state from before the burst so the email shows the whole change
+        return APPOINTMENT_UPDATED, {"appointment": new, "old_appointment": old}
+    return event_type, {"appointment": new}
+
+def add_appointment_notification(
+    db: Session,
+    *,
+    event_type: str,
+    recipient_email: str,
+    recipient_name: Optional[str],
+    details: Dict[str, Any],
+    old_details: Optional[Dict[str, Any]] = None,
+    coalesce_key: Optional[str] = None,
+) -> None:
+    """
+    Queue a notification in the session. Does NOT commit: the caller commits
+    it together with the appointment change.
+
+    Rows are held for NOTIFICATION_COALESCE_WINDOW_SECONDS after the last
+    change. A new change with the same `coalesce_key` (one per appointment)
+    is merged into a row still waiting in that window, so a burst of edits
+    produces a single email describing the final state.
+    """
+    now = _utcnow()
+    window = datetime.timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW_SECONDS)
+
+    if coalesce_key and window:
+        existing = db.scalars(
+            select(NotificationOutbox).where(
+                NotificationOutbox.coalesce_key == coalesce_key,
+                NotificationOutbox.status == NotificationOutboxStatus.PENDING,
+                NotificationOutbox.claimed_by.is_(None),
+            ).order_by(NotificationOutbox.id.desc()).limit(1)
+        ).first()
+        if existing is not None:
+            merged = _merge(existing.event_type, json.loads(existing.payload), event_type, details)
+            # Only touch the row if no dispatcher claimed it in the meantime
+            unclaimed = (NotificationOutbox.id == existing.id, NotificationOutbox.claimed_by.is_(None))
+            if merged is None:
+                result = db.execute(
+                    delete(NotificationOutbox).where(*unclaimed).execution_options(synchronize_session=False)
+                )
+            else:
+                max_delay = datetime.timedelta(seconds=settings.NOTIFICATION_COALESCE_MAX_SECONDS)
+                result = db.execute(
+                    update(NotificationOutbox).where(*unclaimed).values(
+                        event_type=merged[0],
+                        payload=json.dumps(merged[1]),
+                        available_at=min(now + window, existing.created_at + max_delay),
+                    ).execution_options(synchronize_session=False)
+                )
+            db.expire(existing)
+            if result.rowcount:
+                return
+
+    payload = {"appointment": _encode_details(details)}
+    if old_details is not None:
+        payload["old_appointment"] = _encode_details(old_details)
+    db.add(NotificationOutbox(
+        event_type=event_type,
+        recipient_email=recipient_email,
+        recipient_name=recipient_name,
+        payload=json.dumps(payload),
+        coalesce_key=coalesce_key,
+        status=NotificationOutboxStatus.PENDING,
+        attempts=0,
+        available_at=now + window if coalesce_key else now,
+        created_at=now,
+    ))
+
+def add_appointment_notifications(
+    db: Session,
+    *,
+    event_type: str,
+    recipient_email: str,
+    recipient_name: Optional[str],
+    notifications: List[Tuple[Dict[str, Any], Optional[str]]], # (details, coalesce_key)
+) -> None:
+    """
+    Queue one notification per appointment with a single multi-row INSERT.
+    Does NOT commit. Meant for appointments created in the same transaction:
+    they can't have a pending row yet, so there's nothing to merge into, but
+    each row is held for the coalescing window like add_appointment_notification's.
+    """
+    now = _utcnow()
+    window = datetime.timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW_SECONDS)
+    db.execute(insert(NotificationOutbox), [
+        {
+            "event_type": event_type,
+            "recipient_email": recipient_email,
+            "recipient_name": recipient_name,
+            "payload": json.dumps({"appointment": _encode_details(details)}),
+            "coalesce_key": coalesce_key,
+            "status": NotificationOutboxStatus.PENDING,
+            "attempts": 0,
+            "available_at": now + window if coalesce_key else now,
+            "created_at": now,
+        }
+        for details, coalesce_key in notifications
+    ])
+
+
+# --- Claiming and delivery (dispatcher side) ---
+
+def claim_batch(db: Session, *, batch_size: int) -> List[NotificationOutbox]:
+    """
+    Claim up to `batch_size` due rows for this dispatcher and return them.
+
+    The conditional UPDATE re-checks that a row is still unclaimed, so when
+    several dispatchers race for the same rows each row goes to exactly one
+    of them. SKIP LOCKED (READPAST on SQL Server) keeps them from queueing
+    behind each other's candidate rows.
+    """
+    now = _utcnow()
+    claimable = (
+        NotificationOutbox.status == NotificationOutboxStatus.PENDING,
+        NotificationOutbox.available_at <= now,
+        or_(NotificationOutbox.claimed_until.is_(None), NotificationOutbox.claimed_until < now),
+    )
+    candidate_ids = db.scalars(
+        select(NotificationOutbox.id)
+        .where(*claimable)
+        .order_by(NotificationOutbox.available_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not candidate_ids:
+        db.commit()
+        return []
+
+    claim_token = uuid.uuid4().hex
+    db.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(candidate_ids), *claimable)
+        .values(
+            claimed_by=claim_token,
+            claimed_until=now + datetime.timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT_SECONDS),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return db.scalars(
+        select(NotificationOutbox).where(NotificationOutbox.claimed_by == claim_token)
+    ).all()
+
+def _backoff_seconds(attempts: int) -> float:
+    delay = settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    return min(delay, settings.OUTBOX_BACKOFF_MAX_SECONDS)
+
+def _view(encoded: Optional[Dict[str, Any]]) -> Optional[AppointmentEmailView]:
+    details = _decode_details(encoded)
+    return AppointmentEmailView.from_details(details) if details is not None else None
+
+def _send(row: NotificationOutbox) -> bool:
+    payload = json.loads(row.payload)
+    appointment = _view(payload.get("appointment"))
+    if row.event_type == APPOINTMENT_CREATED:
+        return send_appointment_created_email(row.recipient_email, row.recipient_name, appointment)
+    if row.event_type == APPOINTMENT_UPDATED:
+        return send_appointment_updated_email(
+            row.recipient_email, row.recipient_name, appointment,
+            old_appointment=_view(payload.get("old_appointment")),
+        )
+    if row.event_type == APPOINTMENT_CANCELLED:
+        return send_appointment_cancelled_email(row.recipient_email, row.recipient_name, appointment)
+    raise ValueError(f"Unknown notification event type: {row.event_type}")
+
+def deliver(row_id: int, claim_token: str) -> bool:
+    """Send one claimed row and record the outcome. Runs in a worker thread."""
+    with SessionLocal() as db:
+        row = db.get(NotificationOutbox, row_id)
+        if row is None or row.claimed_by != claim_token or row.status != NotificationOutboxStatus.PENDING:
+            return True # Someone else owns it now (claim expired) or it's already done
+
+        error = None
+        try:
+            sent = _send(row)
+        except Exception as e:
+            sent, error = False, str(e)
+
+        now = _utcnow()
+        row.attempts += 1
+        row.claimed_by = None
+        row.claimed_until = None
+        if sent:
+            row.status = NotificationOutboxStatus.SENT
+            row.sent_at = now
+            row.last_error = None
+        else:
+            row.last_error = (error or "send returned False")[:500]
+            if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                row.status = NotificationOutboxStatus.FAILED
+                logger.error(f"Outbox row {row.id} ({row.event_type} to {row.recipient_email}) failed permanently after {row.attempts} attempts")
+            else:
+                row.available_at = now + datetime.timedelta(seconds=_backoff_seconds(row.attempts))
+        db.commit()
+        return sent
+
+
+class OutboxPoller:
+    """
+    Claims due outbox rows in batches and hands each row to a dispatcher's
+    worker pool. Runs in the API process (see OUTBOX_POLL_IN_APP) and in the
+    standalone `python -m app.dispatcher` process; row claiming makes it safe
+    to run any number of them side by side.
+    """
+
+    def __init__(self, dispatcher: NotificationDispatcher, *, batch_size: int, poll_interval: float):
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.claimed = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="outbox-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Poll now instead of waiting for the next interval (called after a commit)."""
+        self._wake.set()
+
+    def poll_once(self) -> int:
+        with SessionLocal() as db:
+            rows = claim_batch(db, batch_size=self.batch_size)
+            claimed = [(row.id, row.claimed_by, row.event_type, row.recipient_email) for row in rows]
+        for row_id, claim_token, event_type, recipient_email in claimed:
+            # If the queue is full the claim simply expires and the row is retried later
+            self.dispatcher.enqueue(
+                f"outbox row {row_id} ({event_type} to {recipient_email})",
+                deliver, row_id, claim_token,
+            )
+        self.claimed += len(claimed)
+        return len(claimed)
+
+    def run_forever(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = self.poll_once()
+            except Exception as e:
+                logger.error(f"Outbox poll failed: {e}")
+                claimed = 0
+            if claimed < self.batch_size: # A full batch means there's probably more waiting
+                self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None,
+            "batch_size": self.batch_size,
+            "poll_interval_seconds": self.poll_interval,
+            "claimed": self.claimed,
+        }
+
+
+# Poller for the API process; the standalone dispatcher builds its own.
+outbox_poller = OutboxPoller(
+    notification_dispatcher,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,112 @@
+import datetime
+import math
+from typing import FrozenSet, Iterator, NamedTuple, Optional, Tuple
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+PERIODS = {
+    "daily": datetime.timedelta(days=1),
+    "weekly": datetime.timedelta(weeks=1),
+}
+
+
+class Rule(NamedTuple):
+    """
+    A series' occurrences: [start + k*period, start + k*period + duration)
+    for k in range(count), except those whose start is in `excluded`.
+    """
+    start: datetime.datetime
+    duration: datetime.timedelta
+    period: datetime.timedelta
+    count: int
+    excluded: FrozenSet[datetime.datetime] = frozenset()
+
+    @property
+    def last_end(self) -> datetime.datetime:
+        return self.start + (self.count - 1) * self.period + self.duration
+
+
+def occurrence_count(
+    start: datetime.datetime, period: datetime.timedelta, count: Optional[int], until: Optional[datetime.datetime]
+) -> int:
+    """Occurrences (including excepted ones) of a rule ending after COUNT or UNTIL, whichever comes first."""
+    if until is not None:
+        until_count = (until - start) // period + 1 if until >= start else 0
+        count = until_count if count is None else min(count, until_count)
+    return count
+
+
+def rule_for(series) -> Rule:
+    """The Rule of an AppointmentSeries row (its exceptions must be loaded)."""
+    period = PERIODS[series.freq] * series.interval
+    return Rule(
+        start=series.start_time,
+        duration=series.end_time - series.start_time,
+        period=period,
+        count=occurrence_count(series.start_time, period, series.count, series.until),
+        excluded=frozenset(exception.original_start for exception in series.exceptions),
+    )
+
+
+def occurrences(rule: Rule, window_start: datetime.datetime, window_end: datetime.datetime) -> Iterator[Interval]:
+    """
+    Lazily yield the occurrences overlapping [window_start, window_end), in
+    order. Jumps straight to the first candidate, so the cost is the number
+    of occurrences in the window, not in the series.
+    """
+    # First k whose occurrence ends after window_start
+    k = max(0, (window_start - rule.start - rule.duration) // rule.period + 1)
+    while k < rule.count:
+        start = rule.start + k * rule.period
+        if start >= window_end:
+            return
+        if start not in rule.excluded:
+            yield start, start + rule.duration
+        k += 1
+
+
+def first_overlap(rule: Rule, start: datetime.datetime, end: datetime.datetime) -> Optional[Interval]:
+    """The first occurrence overlapping [start, end), or None."""
+    return next(occurrences(rule, start, end), None)
+
+
+def rules_overlap(a: Rule, b: Rule) -> bool:
+    """
+    Whether any occurrence of `a` overlaps any occurrence of `b`.
+
+    Occurrence starts differ by (b.start - a.start) + j*b.period - i*a.period,
+    and those combinations are exactly the multiples of g = gcd(periods)
+    offset by the start difference. So a and b can only collide if some
+    offset d + m*g falls in (-b.duration, a.duration) - decided without
+    expanding anything. When they can, and both run uninterrupted for a full
+    lcm(periods) side by side, every combination does occur and they do
+    collide. Only the remaining cases (exceptions, short overlap of their
+    lifetimes) walk the occurrences, and only within that overlap.
+    """
+    window_start, window_end = max(a.start, b.start), min(a.last_end, b.last_end)
+    if window_start >= window_end:
+        return False
+
+    unit = datetime.timedelta(seconds=1)
+    g = math.gcd(a.period // unit, b.period // unit)
+    offset = ((b.start - a.start) // unit) % g # b's starts relative to a's, modulo g
+    # Collide iff some offset + m*g lies strictly between -b.duration and a.duration
+    if not (offset < a.duration / unit or offset - g > -(b.duration / unit)):
+        return False
+
+    lcm = a.period * (b.period // unit // g)
+    full_cycle = window_end - window_start >= lcm + a.period + b.period + a.duration + b.duration
+    if full_cycle and not a.excluded and not b.excluded:
+        return True
+
+    # Sweep both occurrence streams over the shared window
+    a_iter, b_iter = occurrences(a, window_start, window_end), occurrences(b, window_start, window_end)
+    a_next, b_next = next(a_iter, None), next(b_iter, None)
+    while a_next is not None and b_next is not None:
+        if a_next[0] < b_next[1] and b_next[0] < a_next[1]:
+            return True
+        if a_next[1] <= b_next[1]:
+            a_next = next(a_iter, None)
+        else:
+            b_next = next(b_iter, None)
+    return False
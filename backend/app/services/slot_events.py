@@ -0,0 +1,195 @@
+"""
+Push channel for slot changes: booking UIs subscribe (over SSE) to the days
+of a resource they show and are told when a slot there is taken or freed,
+instead of polling the appointment endpoints.
+
+Topics are "<resource id>:<date>". crud_appointment publishes after each
+commit that takes or frees a slot; the broker encodes the event once and
+hands the same bytes to every subscriber of the topic. Publishing goes
+through a PubSubBackend: InProcessBackend only reaches this worker's
+subscribers, a cross-worker backend (e.g. Redis pub/sub) would publish to
+the shared channel and feed what it receives into the broker of every worker.
+"""
+import asyncio
+import datetime
+import json
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SLOT_TAKEN = "slot_taken"
+SLOT_FREED = "slot_freed"
+
+Deliver = Callable[[str, bytes], None] # (topic, encoded event)
+
+
+def topic(resource_id: int, day: datetime.date) -> str:
+    return f"{resource_id}:{day.isoformat()}"
+
+
+class PubSubBackend:
+    """Carries encoded events from publishers to the broker(s) that fan them out."""
+
+    def attach(self, deliver: Deliver) -> None:
+        """Register the local broker; `deliver` may be called from any thread."""
+        raise NotImplementedError
+
+    def publish(self, topic: str, message: bytes) -> None:
+        raise NotImplementedError
+
+
+class InProcessBackend(PubSubBackend):
+    """Delivers straight to this worker's broker."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def attach(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, topic: str, message: bytes) -> None:
+        if self._deliver is not None:
+            self._deliver(topic, message)
+
+
+class Subscription:
+    """One connected client: a bounded queue of encoded events for its topics."""
+
+    def __init__(self, topics: List[str], queue_size: int):
+        self.topics = topics
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False # Fell behind and missed events; must resync and reconnect
+
+
+class SlotEventBroker:
+    """
+    This worker's topic -> subscribers registry. Subscriptions live on the
+    event loop; deliveries from other threads are handed over to it with
+    call_soon_threadsafe, so the registry is only ever touched on the loop.
+    """
+
+    def __init__(self, backend: PubSubBackend, queue_size: int):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        backend.attach(self._deliver)
+
+        # Metrics
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    # --- Subscriber side (on the event loop) ---
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        subscription = Subscription(list(topics), self.queue_size)
+        for name in subscription.topics:
+            self._topics.setdefault(name, set()).add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for name in subscription.topics:
+            subscribers = self._topics.get(name)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[name]
+        self.subscribers -= 1
+
+    # --- Publisher side (any thread) ---
+
+    def publish_slot(
+        self,
+        event_type: str,
+        resource_id: int,
+        start_time: datetime.datetime,
+        end_time: datetime.datetime,
+        appointment_id: Optional[int] = None,
+        series_id: Optional[int] = None,
+    ) -> None:
+        """Publish that [start_time, end_time) on the resource was taken or freed, to each day it touches."""
+        message = _encode(event_type, {
+            "resource_id": resource_id,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "appointment_id": appointment_id,
+            "series_id": series_id,
+        })
+        day = start_time.date()
+        while day <= end_time.date():
+            self.backend.publish(topic(resource_id, day), message)
+            day += datetime.timedelta(days=1)
+        self.published += 1
+
+    def _deliver(self, name: str, message: bytes) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return # Nobody has ever subscribed in this worker
+        if threading.get_ident() == self._loop_thread:
+            self._fan_out(name, message) # e.g. crud running under AsyncSession.run_sync
+        else:
+            loop.call_soon_threadsafe(self._fan_out, name, message)
+
+    def _fan_out(self, name: str, message: bytes) -> None:
+        for subscription in self._topics.get(name, ()):
+            try:
+                subscription.queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                if not subscription.overflowed:
+                    subscription.overflowed = True
+                    self.overflows += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": self.subscribers,
+            "topics": len(self._topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+
+def _encode(event_type: str, data: dict) -> bytes:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n".encode()
+
+KEEPALIVE = b": keep-alive\n\n"
+RESYNC = _encode("resync", {}) # Sent before closing an overflowed subscription
+
+
+async def stream(topics: List[str], heartbeat: float):
+    """
+    SSE body for a subscription to `topics`: their events as they arrive, a
+    comment line every `heartbeat` seconds of silence (keeps proxies from
+    timing the connection out and surfaces dead clients), and a final
+    "resync" event if it fell too far behind. The subscription only exists
+    while the body is being iterated, so a response that is never sent
+    can't leak one.
+    """
+    subscription = slot_event_broker.subscribe(topics)
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            yield message
+            if subscription.overflowed and subscription.queue.empty():
+                yield RESYNC
+                return
+    finally:
+        slot_event_broker.unsubscribe(subscription)
+
+
+slot_event_broker = SlotEventBroker(InProcessBackend(), queue_size=settings.SLOT_EVENTS_QUEUE_SIZE)
@@ -0,0 +1,131 @@
+import datetime
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.token_revocation import TokenRevocation
+
+# Claims tokens are trusted without a user lookup, so revocation is checked here
+# instead. Revocations are rows of token_revocations, so every worker sees them;
+# each worker checks tokens against its own copy of the unexpired rows, merged
+# from the table at most every TOKEN_REVOCATION_SYNC_SECONDS (one small query
+# per worker, not one per request). Both maps only need to remember an entry for
+# as long as a token issued before it could still be valid, which keeps them small.
+_lock = threading.Lock()
+_denied_jtis: Dict[str, float] = {} # jti -> token expiry (epoch seconds)
+_revoked_before: Dict[int, float] = {} # user id -> tokens issued before this time are invalid
+_synced_at = 0.0
+_syncing = False
+
+
+def _to_utc(epoch: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _to_epoch(utc: datetime.datetime) -> float:
+    return utc.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _purge(now: float) -> None:
+    for jti in [jti for jti, exp in _denied_jtis.items() if exp <= now]:
+        del _denied_jtis[jti]
+    horizon = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    for user_id in [uid for uid, at in _revoked_before.items() if at <= horizon]:
+        del _revoked_before[user_id]
+
+
+def _remember(jti: Optional[str], user_id: Optional[int], revoked_at: float, expires_at: float) -> None:
+    if jti is not None:
+        _denied_jtis[jti] = expires_at
+    if user_id is not None:
+        _revoked_before[user_id] = max(_revoked_before.get(user_id, 0.0), revoked_at)
+
+
+def _add(db: Session, now: float, jti: Optional[str], user_id: Optional[int], expires_at: float) -> None:
+    # Revocations are rare, so they also clear out the rows that no longer matter
+    db.execute(delete(TokenRevocation).where(TokenRevocation.expires_at <= _to_utc(now)))
+    db.add(TokenRevocation(jti=jti, user_id=user_id, revoked_at=_to_utc(now), expires_at=_to_utc(expires_at)))
+    with _lock:
+        _purge(now)
+        _remember(jti, user_id, now, expires_at)
+
+
+def revoke_token(db: Session, jti: str, expires_at: float) -> None:
+    """
+    Deny a single token (e.g. on logout) until it would have expired anyway.
+    The caller commits.
+    """
+    now = time.time()
+    if expires_at > now:
+        _add(db, now, jti=jti, user_id=None, expires_at=expires_at)
+
+
+def revoke_user_tokens(db: Session, user_id: int) -> None:
+    """
+    Invalidate every token issued to a user so far (logout of a subject-only
+    token, deactivation, password or role change). The caller commits, in the
+    same transaction as the change.
+    """
+    now = time.time()
+    _add(db, now, jti=None, user_id=user_id, expires_at=now + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+async def sync() -> None:
+    """
+    Merge revocations made by any worker into this worker's view, if the last
+    merge is more than TOKEN_REVOCATION_SYNC_SECONDS old. Called before a token
+    is checked.
+    """
+    global _synced_at, _syncing
+    now = time.time()
+    if _syncing or now - _synced_at < settings.TOKEN_REVOCATION_SYNC_SECONDS:
+        return
+    _syncing = True # Concurrent requests meanwhile check against the current view
+    try:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(TokenRevocation.jti, TokenRevocation.user_id, TokenRevocation.revoked_at, TokenRevocation.expires_at)
+                .where(TokenRevocation.expires_at > _to_utc(now))
+            )).all()
+        with _lock:
+            for jti, user_id, revoked_at, expires_at in rows:
+                _remember(jti, user_id, _to_epoch(revoked_at), _to_epoch(expires_at))
+            _purge(now)
+        _synced_at = now
+    finally:
+        _syncing = False
+
+
+def is_denied(payload: Dict[str, Any]) -> bool:
+    """True if this exact token was revoked."""
+    with _lock:
+        return payload.get("jti") in _denied_jtis
+
+
+def user_tokens_revoked(payload: Dict[str, Any], user_id: int) -> bool:
+    """
+    True if the token was issued before a revocation of all of the user's
+    tokens (see revoke_user_tokens) that has reached this worker.
+    """
+    with _lock:
+        revoked_at = _revoked_before.get(user_id)
+    issued_at = payload.get("iat")
+    return revoked_at is not None and (issued_at is None or issued_at <= revoked_at)
+
+
+def claims_are_current(payload: Dict[str, Any]) -> bool:
+    """
+    True if the user claims in a token can be trusted as-is: the token is
+    recent enough and no revocation of the user's tokens since it was issued
+    has reached this worker. Otherwise the caller re-checks the user against
+    the DB.
+    """
+    issued_at = payload.get("iat")
+    if issued_at is None or time.time() - issued_at > settings.ACCESS_TOKEN_CLAIMS_TRUST_SECONDS:
+        return False
+    return not user_tokens_revoked(payload, payload.get("uid"))
@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    The fields of a User that request handling needs. Returned by
+    get_current_user instead of the ORM row so it can be cached across requests.
+    """
+    id: int
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+
+# Token subject (email) -> UserSnapshot. The TTL bounds how long a change made by
+# another worker (e.g. deactivating a user) can go unnoticed here.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
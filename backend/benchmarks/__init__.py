@@ -0,0 +1,9 @@
+"""
+Benchmarks and load tests behind the performance claims in the commit log.
+They aren't part of the test suite. Run them from backend/, e.g.
+
+    python -m benchmarks.sse_load
+
+Each script uses a throwaway SQLite database unless DATABASE_URL is set,
+and prints its results; see each module's docstring for what it measures.
+"""
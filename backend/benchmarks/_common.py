@@ -0,0 +1,106 @@
+"""
+Shared helpers: a throwaway SQLite database for in-process runs, and a
+real uvicorn server (in a subprocess, on its own throwaway database) for
+the benchmarks that need sockets.
+"""
+import contextlib
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_temp_database() -> str:
+    """
+    Point the app at a new SQLite file (unless DATABASE_URL is already set)
+    and silence its logging. Call before importing anything from app.
+    """
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="appointments-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("NOTIFICATION_COALESCE_WINDOW_SECONDS", "0")
+    os.environ.setdefault("OUTBOX_POLL_IN_APP", "false")
+    logging.disable(logging.CRITICAL)
+    return os.environ["DATABASE_URL"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def running_server(*uvicorn_args: str, env: Optional[Dict[str, str]] = None) -> Iterator["Server"]:
+    with tempfile.TemporaryDirectory(prefix="appointments-bench-") as tmp:
+        port = _free_port()
+        log = open(os.path.join(tmp, "server.log"), "w")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning", *uvicorn_args],
+            cwd=BACKEND_DIR,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env={
+                **os.environ,
+                "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                "NOTIFICATION_COALESCE_WINDOW_SECONDS": "0",
+                "OUTBOX_POLL_IN_APP": "false",
+                **(env or {}),
+            },
+        )
+        try:
+            server = Server(process, port)
+            try:
+                server.wait_ready()
+            except RuntimeError:
+                with open(log.name) as output:
+                    print(output.read()[-4000:], file=sys.stderr)
+                raise
+            yield server
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired: # Still waiting for open streams to close
+                process.kill()
+                process.wait()
+            log.close()
+
+
+class Server:
+    def __init__(self, process: subprocess.Popen, port: int):
+        self.process = process
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+
+    def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                httpx.get(self.url + "/", timeout=1.0)
+                return
+            except httpx.TransportError:
+                time.sleep(0.2)
+        raise RuntimeError("uvicorn did not start in time")
+
+    def rss_mb(self) -> float:
+        with open(f"/proc/{self.process.pid}/status") as status:
+            return int(status.read().split("VmRSS:")[1].split()[0]) / 1024
+
+
+async def register_and_login(client: httpx.AsyncClient, email: str) -> Dict[str, str]:
+    """Authorization headers for a new user."""
+    await client.post("/api/v1/users/register", json={"email": email, "password": "bench", "full_name": "Bench"})
+    response = await client.post("/api/v1/users/token", data={"username": email, "password": "bench"})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,126 @@
+"""
+Per-message cost of handing emails to Azure Communication Services, against a
+local HTTPS stand-in for the ACS endpoint (self-signed certificate, answers
+every send with 202 and the operation as succeeded):
+
+- client per email: what _send_email_acs did before, a new EmailClient (new
+  pipeline, credential and TLS connection) for every message;
+- shared client: notification_service.send_many over the worker's pooled
+  client.
+
+Both go over TCP and TLS on loopback, so network latency to the real service
+(paid again for every new connection) is not included.
+
+    python -m benchmarks.acs_send --emails 500
+"""
+import argparse
+import datetime
+import ipaddress
+import json
+import os
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+
+class _AcsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real service
+    disable_nagle_algorithm = True # Headers and body are separate writes
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(202)
+
+    def do_GET(self): # Status polls of the returned operation
+        self._reply(200)
+
+    def _reply(self, status: int) -> None:
+        body = json.dumps({"id": "bench", "status": "Succeeded"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Operation-Location", f"https://127.0.0.1:{self.server.server_port}/emails/operations/bench")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed_certificate(directory: str) -> tuple:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1)).not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = os.path.join(directory, "acs.pem"), os.path.join(directory, "acs.key")
+    with open(cert_path, "wb") as cert_file:
+        cert_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as key_file:
+        key_file.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    return cert_path, key_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-message ACS send cost.")
+    parser.add_argument("--emails", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="appointments-bench-") as tmp:
+        cert_path, key_path = _self_signed_certificate(tmp)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _AcsHandler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        os.environ["REQUESTS_CA_BUNDLE"] = cert_path # Trust the stand-in (requests reads it per request)
+        os.environ["ACS_CONNECTION_STRING"] = f"endpoint=https://127.0.0.1:{server.server_port}/;accesskey=" + "YmVuY2g=" * 4
+        os.environ["ACS_SENDER_ADDRESS"] = "noreply@example.com"
+        from azure.communication.email import EmailClient
+        from app.services import notification_service
+
+        emails = [
+            notification_service.OutgoingEmail(f"user{n}@example.com", "User", "Appointment Confirmed: Room", "plain", "<p>html</p>")
+            for n in range(args.emails)
+        ]
+
+        started = time.perf_counter()
+        for email in emails:
+            client = EmailClient.from_connection_string(os.environ["ACS_CONNECTION_STRING"])
+            client.begin_send(notification_service._build_message(email))
+        per_client = (time.perf_counter() - started) / args.emails
+
+        notification_service.send_many(emails[:1]) # Create the shared client and open its connection
+        started = time.perf_counter()
+        sent = notification_service.send_many(emails)
+        shared = (time.perf_counter() - started) / args.emails
+        server.shutdown()
+
+    if not all(sent):
+        raise SystemExit(f"{sent.count(False)} of {args.emails} sends failed")
+    print(f"client per email: {per_client * 1000:6.2f} ms per email")
+    print(f"   shared client: {shared * 1000:6.2f} ms per email ({per_client / shared:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
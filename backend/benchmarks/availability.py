@@ -0,0 +1,103 @@
+"""
+Cost of a free-slot search (crud_appointment.get_available_slots, behind
+GET /appointments/availability) over a --days range of one resource, with
+a cold per-day cache (one range query plus the sweep) and a warm one (sweep
+only). The throwaway SQLite database holds --rows back-to-back half-hour
+bookings of history across 20 resources, plus a few bookings a day on the
+searched resource over the searched range.
+
+    python -m benchmarks.availability --rows 1000000 --days 31
+"""
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+from sqlalchemy import insert
+
+from app.crud import crud_appointment
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.resource import Resource
+from app.models.user import User
+from app.services import availability
+
+RESOURCES = 20
+SEARCHED = 1 # Resource id the searches are for
+BATCH = 50_000
+
+
+def _fill(rows: int, range_start: datetime.date, days: int) -> int:
+    """Insert the history and the searched range's bookings; returns the number of busy intervals in the range."""
+    Base.metadata.create_all(bind=engine)
+    rnd = random.Random(13)
+    history_end = datetime.datetime.combine(range_start, datetime.time.min)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x", "appointments_version": 0}])
+        conn.execute(insert(Resource), [{"id": i, "name": f"Room {i}"} for i in range(1, RESOURCES + 1)])
+        per_resource = rows // RESOURCES
+        for batch_start in range(0, rows, BATCH):
+            conn.execute(insert(Appointment), [
+                {
+                    "service_name": f"Room {i % RESOURCES + 1}",
+                    "resource_id": i % RESOURCES + 1,
+                    "owner_id": 1,
+                    "start_time": history_end - datetime.timedelta(minutes=30 * (per_resource - i // RESOURCES)),
+                    "end_time": history_end - datetime.timedelta(minutes=30 * (per_resource - i // RESOURCES - 1)),
+                    "status": AppointmentStatus.CONFIRMED,
+                }
+                for i in range(batch_start, min(batch_start + BATCH, rows))
+            ])
+        booked = []
+        for day in range(days):
+            opening = history_end + datetime.timedelta(days=day, hours=8)
+            for slot in sorted(rnd.sample(range(24), 20)): # 20 of the day's 24 half hours between 08:00 and 20:00
+                start = opening + datetime.timedelta(minutes=30 * slot)
+                booked.append({
+                    "service_name": f"Room {SEARCHED}", "resource_id": SEARCHED, "owner_id": 1,
+                    "start_time": start, "end_time": start + datetime.timedelta(minutes=rnd.choice([30, 45])),
+                    "status": AppointmentStatus.CONFIRMED,
+                })
+        conn.execute(insert(Appointment), booked)
+    return len(booked)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Free-slot search cost.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    range_start = datetime.date(2026, 3, 1)
+    started = time.perf_counter()
+    intervals = _fill(args.rows, range_start, args.days)
+    print(f"{args.rows} history rows and {intervals} bookings in the searched range inserted in {time.perf_counter() - started:.0f} s")
+
+    def search(db):
+        return crud_appointment.get_available_slots(
+            db, resource_id=SEARCHED, start_date=range_start, end_date=range_start + datetime.timedelta(days=args.days - 1),
+            duration=datetime.timedelta(minutes=30), open_time=datetime.time(8), close_time=datetime.time(20),
+        )
+
+    timings = {"cold": [], "warm": []}
+    with SessionLocal() as db:
+        for _ in range(args.repeat):
+            availability.busy_by_day.clear()
+            for cache in ("cold", "warm"):
+                started = time.perf_counter()
+                slots = search(db)
+                timings[cache].append(time.perf_counter() - started)
+    print(f"{args.days}-day search, {len(slots)} free 30-minute slots between 08:00 and 20:00:")
+    for cache, samples in timings.items():
+        print(f"  {cache} cache: median {statistics.median(samples) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
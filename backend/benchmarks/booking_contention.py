@@ -0,0 +1,106 @@
+"""
+Concurrent bookings through crud_appointment.create_appointment: --threads
+threads (one session each, like concurrent requests) each try --bookings
+random quarter-hour-aligned bookings over --resources resources. Reports the
+booking rate, how many were booked or rejected as conflicts, errors, and the
+overlapping pairs left in the database (must be 0).
+
+Conflict checks and slot locks are per resource, so more resources mean fewer
+rejections. SQLite has a single database-wide write lock, so unlike SQL
+Server it can't show bookings for different resources running in parallel,
+and a few may hit its busy timeout ("database is locked") at high thread
+counts. The connection pool is sized to --threads.
+
+    python -m benchmarks.booking_contention --threads 64 --bookings 50 --resources 1000
+"""
+import argparse
+import collections
+import datetime
+import os
+import random
+import sys
+import threading
+import time
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent booking throughput and correctness.")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--bookings", type=int, default=50, help="Attempts per thread")
+    parser.add_argument("--resources", type=int, default=1)
+    parser.add_argument("--slots", type=int, default=800, help="Quarter-hour start times to pick from")
+    args = parser.parse_args()
+    os.environ["DB_POOL_SIZE"] = str(args.threads)
+
+    from app.crud import crud_appointment
+    from app.db.base_class import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.appointment import Appointment
+    from app.models.user import User
+    from app.schemas.appointment import AppointmentCreate
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        owner = User(email="contention@example.com", hashed_password="x", full_name="Bench", is_active=True, is_superuser=False)
+        db.add(owner)
+        db.commit()
+        owner_id = owner.id
+    base = (datetime.datetime.now() + datetime.timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+    outcomes = collections.Counter()
+    outcomes_lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def book(seed: int) -> None:
+        rnd = random.Random(seed)
+        barrier.wait()
+        for _ in range(args.bookings):
+            start = base + datetime.timedelta(minutes=15 * rnd.randrange(args.slots))
+            appointment = AppointmentCreate(
+                service_name=f"Room {rnd.randrange(args.resources)}",
+                start_time=start,
+                end_time=start + datetime.timedelta(minutes=rnd.choice([30, 60, 90])),
+            )
+            with SessionLocal() as db:
+                try:
+                    crud_appointment.create_appointment(db, appointment_in=appointment, owner_id=owner_id)
+                    outcome = "booked"
+                except crud_appointment.SlotConflictError:
+                    outcome = "conflict"
+                except Exception as e:
+                    outcome = f"{type(e).__name__}"
+                    print(f"{outcome}: {str(e)[:120]}", file=sys.stderr)
+            with outcomes_lock:
+                outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=book, args=(seed,)) for seed in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        rows = db.query(Appointment.resource_id, Appointment.start_time, Appointment.end_time).order_by(
+            Appointment.resource_id, Appointment.start_time
+        ).all()
+    overlapping = 0
+    for i, (resource_id, _, end) in enumerate(rows):
+        for later_resource_id, later_start, _ in rows[i + 1:]:
+            if later_resource_id != resource_id or later_start >= end:
+                break
+            overlapping += 1
+
+    attempts = args.threads * args.bookings
+    errors = {name: count for name, count in outcomes.items() if name not in ("booked", "conflict")}
+    print(f"{args.threads} threads x {args.bookings} bookings over {args.resources} resource(s) in {elapsed:.1f} s "
+          f"({attempts / elapsed:.0f} attempts/s): booked {outcomes['booked']}, conflicts {outcomes['conflict']}, "
+          f"errors {errors or 0}, overlapping pairs {overlapping}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Cost of building a notification email (plain text + HTML + subject) from an
+appointment, per email, over --renders "created" emails for appointments
+spread over two months of half-hour slots (best of --repeat runs):
+
+- f-strings: the inline f-strings the templates replaced (no HTML escaping),
+  copied here as the baseline;
+- Mako: the same template files rendered by Mako with the filters the first
+  template version used;
+- templates: app.services.email_templates as shipped (view + render).
+
+    python -m benchmarks.email_render --renders 100000
+"""
+import argparse
+import datetime
+import os
+import time
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+from mako.template import Template
+
+from app.models.appointment import AppointmentStatus
+from app.services import email_templates
+
+
+def _old_format_datetime(dt_object):
+    if dt_object is None:
+        return "N/A"
+    return dt_object.strftime('%Y-%m-%d at %H:%M')
+
+
+def _old_created_email(recipient_name, appointment_details):
+    # Body of the former send_appointment_created_email, minus the send
+    subject = f"Appointment Confirmed: {appointment_details.get('service_name', 'Your Appointment')}"
+    start_time_str = _old_format_datetime(appointment_details.get('start_time'))
+    end_time_str = _old_format_datetime(appointment_details.get('end_time'))
+    status_str = str(appointment_details.get('status').value) if appointment_details.get('status') else 'N/A'
+    appointment_id = appointment_details.get('id', 'N/A')
+    plain_text_content = f"""
+    Hello {recipient_name if recipient_name else 'User'},
+
+    Your appointment has been successfully booked!
+
+    *** Your Appointment ID is: {appointment_id} ***
+    Please use this ID to manage your appointment.
+
+    Details:
+    Service: {appointment_details.get('service_name', 'N/A')}
+    Time: {start_time_str} to {end_time_str}
+    Status: {status_str}
+    Notes: {appointment_details.get('notes', 'None')}
+
+    Thank you!
+    """
+    html_content = f"""
+    <html><body>
+        <p>Hello {recipient_name if recipient_name else 'User'},</p>
+        <p>Your appointment has been successfully booked!</p>
+        <p><strong>Your Appointment ID is: {appointment_id}</strong><br>
+        <small>Please use this ID to manage your appointment on our website.</small></p>
+        <h3>Details:</h3><ul>
+            <li><strong>Service:</strong> {appointment_details.get('service_name', 'N/A')}</li>
+            <li><strong>Time:</strong> {start_time_str} to {end_time_str}</li>
+            <li><strong>Status:</strong> {status_str}</li>
+            <li><strong>Notes:</strong> {appointment_details.get('notes', 'None')}</li>
+        </ul><p>Thank you!</p>
+    </body></html>
+    """
+    return subject, plain_text_content, html_content
+
+
+def _mako_created_email(templates, recipient_name, appointment_details):
+    appointment = email_templates.AppointmentEmailView.from_details(appointment_details)
+    context = {"recipient_name": recipient_name or "User", "appointment": appointment, "changes": []}
+    return (
+        f"Appointment Confirmed: {appointment.service_name}",
+        templates["text"].render(**context),
+        templates["html"].render(**context),
+    )
+
+
+def _templates_created_email(recipient_name, appointment_details):
+    appointment = email_templates.AppointmentEmailView.from_details(appointment_details)
+    return email_templates.render(email_templates.APPOINTMENT_CREATED, recipient_name=recipient_name, appointment=appointment)
+
+
+def _details(n: int) -> dict:
+    start = datetime.datetime(2026, 1, 1, 8) + datetime.timedelta(minutes=30 * (n % 2880))
+    return {
+        "id": n,
+        "service_name": f"Room {n % 20}",
+        "start_time": start,
+        "end_time": start + datetime.timedelta(minutes=30),
+        "status": AppointmentStatus.PENDING_CONFIRMATION,
+        "notes": "Bring the forms <signed> & dated" if n % 3 else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-email rendering cost.")
+    parser.add_argument("--renders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    details = [_details(n) for n in range(args.renders)]
+    path = os.path.join(email_templates.TEMPLATE_DIR, f"{email_templates.APPOINTMENT_CREATED}")
+    mako = {
+        "text": Template(filename=path + ".txt", default_filters=["str"], strict_undefined=True),
+        "html": Template(filename=path + ".html", default_filters=["h"], strict_undefined=True),
+    }
+    contenders = {
+        "f-strings": lambda d: _old_created_email("Ann", d),
+        "Mako": lambda d: _mako_created_email(mako, "Ann", d),
+        "templates": lambda d: _templates_created_email("Ann", d),
+    }
+    for name, build in contenders.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for d in details:
+                build(d)
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:>10}: {best / args.renders * 1e6:5.1f} us per email ({args.renders} renders in {best:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
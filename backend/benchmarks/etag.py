@@ -0,0 +1,86 @@
+"""
+Latency of conditional appointment reads: a full 200 response (with the
+appointment cache off and on) next to a 304 for a matching If-None-Match,
+for GET /appointments/?limit=100, ?limit=1000 and GET /appointments/{id}.
+Runs the app in-process (httpx's ASGI transport) on a throwaway SQLite
+database holding --rows appointments of one owner; much of the 304 time is
+the client and authentication, which every request pays.
+
+    python -m benchmarks.etag --rows 20000
+"""
+import argparse
+import asyncio
+import datetime
+import time
+
+from benchmarks._common import register_and_login, use_temp_database
+
+use_temp_database()
+
+import httpx
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal
+from app.main import app, create_tables
+from app.models.appointment import Appointment
+from app.models.resource import Resource
+from app.services.appointment_cache import appointment_cache
+
+URLS = {
+    "list, limit=100": "/api/v1/appointments/?limit=100",
+    "list, limit=1000": "/api/v1/appointments/?limit=1000",
+    "single appointment": "/api/v1/appointments/1",
+}
+
+
+async def _ms(client: httpx.AsyncClient, url: str, headers: dict, expect: int, requests: int) -> float:
+    await client.get(url, headers=headers) # Warm up (and fill the cache when it's on)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(url, headers=headers)
+        if response.status_code != expect:
+            raise RuntimeError(f"GET {url}: {response.status_code}, expected {expect}")
+    return (time.perf_counter() - started) / requests * 1000
+
+
+async def _run(args) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        headers = await register_and_login(client, "etag@example.com")
+        with SessionLocal() as db:
+            db.execute(insert(Resource).values(id=1, name="Room"))
+            start = datetime.datetime(2030, 2, 1)
+            db.execute(insert(Appointment), [
+                {
+                    "service_name": "Room", "resource_id": 1,
+                    "owner_id": 1, # The user registered above, in the fresh database
+                    "start_time": start + datetime.timedelta(hours=i),
+                    "end_time": start + datetime.timedelta(hours=i, minutes=30),
+                }
+                for i in range(args.rows)
+            ])
+            db.commit()
+
+        ttl = appointment_cache.ttl or 30
+        print(f"{args.rows} appointments, ms per request:")
+        print(f"  {'':20} {'200 cache off':>14} {'200 cache on':>13} {'304':>7}")
+        for label, url in URLS.items():
+            etag = (await client.get(url, headers=headers)).headers["ETag"]
+            appointment_cache.ttl = 0
+            uncached = await _ms(client, url, headers, 200, args.requests)
+            appointment_cache.ttl = ttl
+            cached = await _ms(client, url, headers, 200, args.requests)
+            not_modified = await _ms(client, url, {**headers, "If-None-Match": etag}, 304, args.requests)
+            print(f"  {label:20} {uncached:14.2f} {cached:13.2f} {not_modified:7.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Conditional (304) vs full appointment reads.")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    create_tables()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
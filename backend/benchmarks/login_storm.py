@@ -0,0 +1,73 @@
+"""
+Latency of GET /appointments/ while --logins logins (bcrypt) run at once,
+against the app in-process (httpx's ASGI transport, one event loop) and a
+throwaway SQLite database. Reports the same --reads sequential reads with no
+logins in flight and during the storm.
+
+Before bcrypt and the login queries moved off the event loop, 10 concurrent
+logins pushed the read latency to seconds and 40 exhausted the connection
+pool.
+
+    python -m benchmarks.login_storm --logins 40
+"""
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+from typing import List
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+import httpx
+
+from app.main import app, create_tables
+
+
+async def _reads(client: httpx.AsyncClient, headers: dict, count: int) -> List[float]:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.get("/api/v1/appointments/", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _summary(latencies: List[float]) -> str:
+    return f"p50 {statistics.median(latencies) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms"
+
+
+async def _run(args) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+        credentials = {"username": "storm@example.com", "password": "bench"}
+        await client.post("/api/v1/users/register", json={"email": credentials["username"], "password": "bench"})
+        token = (await client.post("/api/v1/users/token", data=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        start = datetime.datetime.now() + datetime.timedelta(days=1)
+        await client.post("/api/v1/appointments/", headers=headers, json={
+            "service_name": "Room", "start_time": start.isoformat(), "end_time": (start + datetime.timedelta(hours=1)).isoformat(),
+        })
+
+        quiet = await _reads(client, headers, args.reads)
+        storm = asyncio.gather(*[client.post("/api/v1/users/token", data=credentials) for _ in range(args.logins)])
+        during, logins = await asyncio.gather(_reads(client, headers, args.reads), storm)
+        failed = [response.status_code for response in logins if response.status_code != 200]
+        print(f"GET /appointments/ with no logins: {_summary(quiet)}")
+        print(f"GET /appointments/ during {args.logins} concurrent logins: {_summary(during)}"
+              + (f" ({len(failed)} logins failed: {sorted(set(failed))})" if failed else ""))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read latency during a login storm.")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--reads", type=int, default=30)
+    args = parser.parse_args()
+    create_tables()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Offset vs keyset (cursor) pagination of the appointment and user listings
+(crud_appointment.get_appointments_by_owner, crud_user.get_users), on a
+throwaway SQLite database with --rows appointments for one owner and --rows
+users. Times the first page and page --page of --page-size rows each way;
+offset pages get slower the deeper they are, cursor pages shouldn't.
+
+    python -m benchmarks.pagination --rows 100100 --page 1000
+"""
+import argparse
+import datetime
+import time
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+from sqlalchemy import insert
+
+from app.crud import crud_appointment, crud_user
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+from app.models.appointment import Appointment
+from app.models.resource import Resource
+from app.models.user import User
+
+
+def _fill(rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    start = datetime.datetime(2030, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"email": f"user{i}@example.com", "hashed_password": "x", "full_name": "User"} for i in range(rows)])
+        conn.execute(insert(Resource).values(id=1, name="Room"))
+        conn.execute(insert(Appointment), [
+            {
+                "service_name": "Room", "resource_id": 1, "owner_id": 1,
+                # Two per start time, so the id tiebreak of the cursor matters
+                "start_time": start + datetime.timedelta(minutes=30 * (i // 2)),
+                "end_time": start + datetime.timedelta(minutes=30 * (i // 2) + 15),
+            }
+            for i in range(rows)
+        ])
+
+
+def _ms(fetch, repeat: int = 20) -> float:
+    with SessionLocal() as db:
+        fetch(db) # Warm up the statement cache
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fetch(db)
+            db.rollback()
+        return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offset vs cursor pagination cost.")
+    parser.add_argument("--rows", type=int, default=100_100)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    _fill(args.rows)
+    size, skip = args.page_size, (args.page - 1) * args.page_size
+
+    with SessionLocal() as db:
+        last = crud_appointment.get_appointments_by_owner(db, owner_id=1, skip=skip - 1, limit=1)[0]
+        after = (last.start_time, last.id) # Cursor of the page before the deep one
+        after_id = crud_user.get_users(db, skip=skip - 1, limit=1)[0].id
+        by_offset = [a.id for a in crud_appointment.get_appointments_by_owner(db, owner_id=1, skip=skip, limit=size)]
+        by_cursor = [a.id for a in crud_appointment.get_appointments_by_owner(db, owner_id=1, after=after, limit=size)]
+        if by_offset != by_cursor:
+            raise SystemExit("Offset and cursor pages differ")
+
+    first_cursor = (datetime.datetime.min, 0)
+    print(f"appointments, {args.rows} rows for one owner, pages of {size}:")
+    print(f"  page 1:    offset {_ms(lambda db: crud_appointment.get_appointments_by_owner(db, owner_id=1, limit=size)):.2f} ms"
+          f"  cursor {_ms(lambda db: crud_appointment.get_appointments_by_owner(db, owner_id=1, after=first_cursor, limit=size)):.2f} ms")
+    print(f"  page {args.page}: offset {_ms(lambda db: crud_appointment.get_appointments_by_owner(db, owner_id=1, skip=skip, limit=size)):.2f} ms"
+          f"  cursor {_ms(lambda db: crud_appointment.get_appointments_by_owner(db, owner_id=1, after=after, limit=size)):.2f} ms")
+    print(f"users, {args.rows} rows, pages of {size}:")
+    print(f"  page 1:    offset {_ms(lambda db: crud_user.get_users(db, limit=size)):.2f} ms"
+          f"  cursor {_ms(lambda db: crud_user.get_users(db, after_id=0, limit=size)):.2f} ms")
+    print(f"  page {args.page}: offset {_ms(lambda db: crud_user.get_users(db, skip=skip, limit=size)):.2f} ms"
+          f"  cursor {_ms(lambda db: crud_user.get_users(db, after_id=after_id, limit=size)):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Where the time of an appointment read goes: cProfile over --requests calls
+to GET /appointments/?limit=500 (with the appointment cache off, then hit)
+and to GET /appointments/{id} (cache hit), against the app in-process
+(httpx's ASGI transport) and a throwaway SQLite database holding --rows
+appointments of one owner. Reports wall time per request and the CPU time
+per request spent in pydantic/FastAPI encoding, JSON encoding and
+SQLAlchemy/the driver; --top prints the heaviest functions too.
+
+    python -m benchmarks.read_profile --rows 20000
+"""
+import argparse
+import asyncio
+import cProfile
+import datetime
+import io
+import pstats
+import time
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+import httpx
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal
+from app.main import app, create_tables
+from app.models.appointment import Appointment
+from app.models.resource import Resource
+from app.services.appointment_cache import appointment_cache
+
+
+def _bucket(filename: str, name: str) -> str:
+    if "pydantic" in filename or "fastapi/_compat" in filename or "fastapi/encoders" in filename:
+        return "pydantic"
+    if "/json/" in filename or "orjson" in name or "encode_basestring" in name:
+        return "json"
+    if "sqlalchemy" in filename or "aiosqlite" in filename or "sqlite3" in name:
+        return "sqlalchemy"
+    return "other"
+
+
+async def _profile(client: httpx.AsyncClient, headers: dict, label: str, url: str, args) -> None:
+    (await client.get(url, headers=headers)).raise_for_status() # Warm up (and fill the cache when it's on)
+    profile = cProfile.Profile()
+    started = time.perf_counter()
+    profile.enable()
+    for _ in range(args.requests):
+        (await client.get(url, headers=headers)).raise_for_status()
+    profile.disable()
+    wall = (time.perf_counter() - started) / args.requests * 1000
+    buckets = {"pydantic": 0.0, "json": 0.0, "sqlalchemy": 0.0}
+    stats = pstats.Stats(profile)
+    for (filename, _, name), (_, _, own_time, _, _) in stats.stats.items():
+        bucket = _bucket(filename, name)
+        if bucket in buckets:
+            buckets[bucket] += own_time
+    print(f"{label:20} {wall:6.2f} ms/request; CPU in "
+          + ", ".join(f"{bucket} {seconds / args.requests * 1000:5.2f} ms" for bucket, seconds in buckets.items()))
+    if args.top:
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("tottime").print_stats(args.top)
+        print(output.getvalue())
+
+
+async def _run(args) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        credentials = {"username": "profile@example.com", "password": "bench"}
+        await client.post("/api/v1/users/register", json={"email": credentials["username"], "password": "bench", "full_name": "Bench"})
+        token = (await client.post("/api/v1/users/token", data=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        with SessionLocal() as db:
+            db.execute(insert(Resource).values(id=1, name="Room"))
+            start = datetime.datetime(2030, 2, 1)
+            owner_id = 1 # The user registered above, in the fresh database
+            db.execute(insert(Appointment), [
+                {
+                    "service_name": "Room", "resource_id": 1, "owner_id": owner_id,
+                    "start_time": start + datetime.timedelta(hours=i, microseconds=(i % 3) * 250_000), # Some with fractional seconds
+                    "end_time": start + datetime.timedelta(hours=i, minutes=30),
+                    "notes": "Notes" if i % 2 else None,
+                }
+                for i in range(args.rows)
+            ])
+            db.commit()
+
+        ttl = appointment_cache.ttl
+        appointment_cache.ttl = 0
+        await _profile(client, headers, "no cache, 500 rows", "/api/v1/appointments/?limit=500", args)
+        appointment_cache.ttl = ttl or 30
+        await _profile(client, headers, "cache hit, 500 rows", "/api/v1/appointments/?limit=500", args)
+        await _profile(client, headers, "single, cache hit", "/api/v1/appointments/2", args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile of the appointment read endpoints.")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--top", type=int, default=0, help="Also print this many functions by own time")
+    args = parser.parse_args()
+    create_tables()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
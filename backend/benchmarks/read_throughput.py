@@ -0,0 +1,64 @@
+"""
+Throughput of GET /appointments/ at a given concurrency, against the app
+in-process (httpx's ASGI transport) and a throwaway SQLite database holding
+20 appointments for the requesting user.
+
+With the former sync sessions, concurrency 200 failed with QueuePool
+timeouts (requests held a pooled connection while queued for a threadpool
+slot). SQLite barely waits on I/O, so a remote database gains more.
+
+    python -m benchmarks.read_throughput --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import time
+
+from benchmarks._common import use_temp_database
+
+use_temp_database()
+
+import httpx
+
+from app.main import app, create_tables
+
+
+async def _run(args) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+        await client.post("/api/v1/users/register", json={"email": "reader@example.com", "password": "bench"})
+        token = (await client.post("/api/v1/users/token", data={"username": "reader@example.com", "password": "bench"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        base = (datetime.datetime.now() + datetime.timedelta(days=2)).replace(minute=0, second=0, microsecond=0)
+        for hour in range(20):
+            start = base + datetime.timedelta(hours=hour)
+            response = await client.post("/api/v1/appointments/", headers=headers, json={
+                "service_name": "Room", "start_time": start.isoformat(), "end_time": (start + datetime.timedelta(minutes=30)).isoformat(),
+            })
+            response.raise_for_status()
+
+        statuses = collections.Counter()
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def read():
+            async with slots:
+                statuses[(await client.get("/api/v1/appointments/", headers=headers)).status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[read() for _ in range(args.requests)])
+        elapsed = time.perf_counter() - started
+        print(f"{args.requests} GET /appointments/ at concurrency {args.concurrency}: "
+              f"{args.requests / elapsed:.0f} req/s, status codes {dict(statuses)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GET /appointments/ throughput.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+    create_tables()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Load test for GET /appointments/availability/events (slot events over SSE).
+
+Opens --idle + --active event streams against a uvicorn server: the active
+ones all watch one resource/day, the idle ones are spread over other
+services. Then books --events slots on the watched day, one at a time, and
+reports how many bookings reached every active subscriber, the time from
+the POST to the last subscriber receiving its event, the server's RSS
+growth per connection, and that idle subscribers received nothing.
+
+Streams are raw asyncio sockets (one httpx stream per subscriber would
+dominate the client's CPU). Needs a file descriptor limit above the
+connection count (ulimit -n).
+
+    python -m benchmarks.sse_load --idle 4500 --active 500 --events 50
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import statistics
+import time
+from typing import Dict, List
+from urllib.parse import urlencode
+
+import httpx
+
+from benchmarks._common import register_and_login, running_server
+
+
+async def _subscribe(port: int, token: str, service: str, day: datetime.date, ready: List[int],
+                     received: Dict[int, List[float]], active: bool) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    query = urlencode({"service_name": service, "start_date": day.isoformat()})
+    writer.write((
+        f"GET /api/v1/appointments/availability/events?{query} HTTP/1.1\r\n"
+        f"Host: bench\r\nAuthorization: Bearer {token}\r\n\r\n"
+    ).encode())
+    await writer.drain()
+    status = await reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(f"Subscribing to {service} failed: {status!r}")
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass # Response headers
+    ready.append(1)
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        if active and line.startswith(b"data:"):
+            appointment_id = json.loads(line[5:])["appointment_id"]
+            received.setdefault(appointment_id, []).append(time.perf_counter())
+
+
+async def _run(server, args) -> None:
+    async with httpx.AsyncClient(base_url=server.url, timeout=60) as client:
+        headers = await register_and_login(client, "sse-load@example.com")
+        token = headers["Authorization"].split()[1]
+        day = (datetime.datetime.now() + datetime.timedelta(days=5)).date()
+        idle_services = [f"Idle {i}" for i in range(args.idle_services)]
+
+        # Events are only served for services that exist, i.e. were booked once (on another day here)
+        setup_start = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time(9))
+        for service in ["Hot", *idle_services]:
+            response = await client.post("/api/v1/appointments/", headers=headers, json={
+                "service_name": service,
+                "start_time": setup_start.isoformat(),
+                "end_time": (setup_start + datetime.timedelta(minutes=15)).isoformat(),
+            })
+            response.raise_for_status()
+
+        rss_before = server.rss_mb()
+        ready: List[int] = []
+        received: Dict[int, List[float]] = {}
+        started = time.perf_counter()
+        tasks = []
+        for i in range(args.idle + args.active):
+            active = i < args.active
+            service = "Hot" if active else idle_services[i % len(idle_services)]
+            tasks.append(asyncio.create_task(_subscribe(server.port, token, service, day, ready, received, active)))
+            if i % 200 == 199:
+                await asyncio.sleep(0.05) # Don't overflow the listen backlog
+        while len(ready) < len(tasks):
+            for task in tasks:
+                if task.done() and task.exception():
+                    raise task.exception()
+            await asyncio.sleep(0.1)
+        connections = len(tasks)
+        rss_after = server.rss_mb()
+        print(f"{args.idle} idle + {args.active} active subscribers connected in {time.perf_counter() - started:.1f}s; "
+              f"server RSS {rss_before:.0f} -> {rss_after:.0f} MB "
+              f"({(rss_after - rss_before) * 1024 / connections:.0f} KB per connection)")
+        await asyncio.sleep(1)
+
+        sent: Dict[int, float] = {} # Appointment id -> when its POST was sent
+        for k in range(args.events):
+            start = datetime.datetime.combine(day, datetime.time(0)) + datetime.timedelta(minutes=10 * k)
+            posted = time.perf_counter()
+            response = await client.post("/api/v1/appointments/", headers=headers, json={
+                "service_name": "Hot",
+                "start_time": start.isoformat(),
+                "end_time": (start + datetime.timedelta(minutes=10)).isoformat(),
+            })
+            response.raise_for_status()
+            sent[response.json()["id"]] = posted
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(2)
+
+        complete = [appointment_id for appointment_id in sent if len(received.get(appointment_id, ())) == args.active]
+        fan_out = sorted(max(received[appointment_id]) - sent[appointment_id] for appointment_id in complete)
+        print(f"{args.events} bookings: {len(complete)} reached all {args.active} active subscribers", end="")
+        if fan_out:
+            print(f"; POST to last subscriber p50 {statistics.median(fan_out) * 1000:.0f} ms, max {fan_out[-1] * 1000:.0f} ms")
+        else:
+            print()
+        extra = sum(len(times) for times in received.values()) - len(complete) * args.active
+        print(f"Events outside the watched resource/day: {extra}")
+        for task in tasks:
+            task.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--idle", type=int, default=4500)
+    parser.add_argument("--active", type=int, default=500)
+    parser.add_argument("--events", type=int, default=50, help="At most 120 (10-minute slots on one day)")
+    parser.add_argument("--idle-services", type=int, default=450)
+    args = parser.parse_args()
+    with running_server("--backlog", "8192", "--limit-concurrency", str(args.idle + args.active + 100)) as server:
+        asyncio.run(_run(server, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Tests run against a throwaway SQLite database. DATABASE_URL has to be set
+before anything imports app.core.config, hence the environment changes at
+the top of this module.
+"""
+import itertools
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="appointments-tests-"), "test.db")
+os.environ["NOTIFICATION_COALESCE_WINDOW_SECONDS"] = "0"
+
+import pytest
+
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+# Import every model so create_all sees all tables, whichever test module runs
+import app.models.appointment
+import app.models.appointment_series
+import app.models.appointment_tombstone
+import app.models.notification_outbox
+import app.models.resource
+import app.models.slot_lock
+import app.models.token_revocation
+from app.models.user import User
+
+_emails = (f"user{n}@example.com" for n in itertools.count())
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def owner_id(db) -> int:
+    """A new user's id."""
+    user = User(email=next(_emails), hashed_password="x", full_name="Test User", is_active=True, is_superuser=False)
+    db.add(user)
+    db.commit()
+    return user.id
@@ -0,0 +1,70 @@
+"""
+Every appointment write path must take its row locks in the same order:
+owner (users) row, then the appointment row, then the appointment's pending
+notification_outbox row. A PUT and a DELETE of one appointment taking them
+in different orders deadlock on SQL Server. SQLite can't show the deadlock,
+so this checks the order of the statements each path sends.
+"""
+import datetime
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.crud import crud_appointment
+from app.db.session import engine
+from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
+
+_WRITE = re.compile(r"^\s*(?:UPDATE|DELETE FROM|INSERT INTO)\s+(\w+)|^\s*SELECT .* FROM (notification_outbox)\b", re.S)
+
+
+@pytest.fixture
+def coalescing(monkeypatch):
+    # With a window, a change to an appointment updates or deletes its pending outbox row
+    monkeypatch.setattr(settings, "NOTIFICATION_COALESCE_WINDOW_SECONDS", 60.0)
+
+
+@pytest.fixture
+def tables_written():
+    """Tables the statements sent inside the `with` block write (or read from the outbox), in order."""
+    tables = []
+
+    def record(conn, cursor, statement, *args):
+        match = _WRITE.match(statement)
+        if match:
+            tables.append(match.group(1) or match.group(2))
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield tables
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _first_positions(tables: list) -> list:
+    return [tables.index(table) for table in ("users", "appointments", "notification_outbox")]
+
+
+def _booked(db, owner_id: int):
+    start = datetime.datetime(2031, 5, 5, 9) + datetime.timedelta(days=owner_id) # A free slot for each test
+    return crud_appointment.create_appointment(db, appointment_in=AppointmentCreate(
+        service_name="Lock Order Room", start_time=start, end_time=start + datetime.timedelta(hours=1),
+    ), owner_id=owner_id)
+
+
+def test_update_locks_owner_then_appointment_then_outbox(db, owner_id, coalescing, tables_written):
+    appointment = _booked(db, owner_id)
+    tables_written.clear()
+    crud_appointment.update_appointment(
+        db, db_appointment=appointment, appointment_in=AppointmentUpdate(notes="Moved"),
+        expected_version=appointment.change_version,
+    )
+    positions = _first_positions(tables_written)
+    assert positions == sorted(positions), tables_written
+
+
+def test_delete_locks_owner_then_appointment_then_outbox(db, owner_id, coalescing, tables_written):
+    appointment = _booked(db, owner_id)
+    tables_written.clear()
+    crud_appointment.delete_appointment(db, db_appointment=appointment, expected_version=appointment.change_version)
+    positions = _first_positions(tables_written)
+    assert positions == sorted(positions), tables_written
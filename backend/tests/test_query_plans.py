@@ -0,0 +1,86 @@
+"""
+Query-plan regression checks for the appointments indexes, on a separate
+in-memory SQLite database filled with enough history that a scan would be
+the planner's last resort. SQLite only uses the partial (filtered) index when
+the query's status predicate implies the index's, which is also what SQL
+Server needs: the blocking statuses inlined, not bound.
+"""
+import datetime
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.crud.crud_appointment import _overlap_filters
+from app.db.base_class import Base
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.resource import Resource
+from app.models.user import User
+
+# The scale the indexes are meant for; QUERY_PLAN_ROWS lowers it for a quick local run
+ROWS = int(os.environ.get("QUERY_PLAN_ROWS", 1_000_000))
+RESOURCES = 20
+OWNERS = 1000
+STATUSES = list(AppointmentStatus)
+
+
+@pytest.fixture(scope="module")
+def large_db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    start = datetime.datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"plan{i}@example.com", "hashed_password": "x", "appointments_version": 0}
+            for i in range(1, OWNERS + 1)
+        ])
+        conn.execute(insert(Resource), [{"id": i, "name": f"Room {i}"} for i in range(1, RESOURCES + 1)])
+        # Generated inside SQLite: a million rows through the ORM would take most of a minute
+        conn.execute(text(f"""
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < :rows)
+            INSERT INTO appointments (service_name, resource_id, owner_id, start_time, end_time, status, change_version)
+            SELECT 'Room ' || (i % {RESOURCES} + 1), i % {RESOURCES} + 1, i % {OWNERS} + 1,
+                   datetime(:start, '+' || (30 * i) || ' minutes') || '.000000',
+                   datetime(:start, '+' || (30 * i + 30) || ' minutes') || '.000000',
+                   CASE i % {len(STATUSES)} {" ".join(f"WHEN {k} THEN '{status.name}'" for k, status in enumerate(STATUSES))} END,
+                   i
+            FROM n
+        """), {"rows": ROWS, "start": start.isoformat(" ")})
+        conn.execute(text("ANALYZE"))
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _plan(session: Session, statement) -> str:
+    """The plan SQLite picks for `statement` as the app sends it (bound parameters included)."""
+    sent = []
+    capture = lambda conn, cursor, sql, parameters, *args: sent.append((sql, parameters))
+    event.listen(session.get_bind(), "before_cursor_execute", capture)
+    try:
+        session.execute(statement).all()
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", capture)
+    sql, parameters = sent[-1]
+    return "\n".join(row[-1] for row in session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters))
+
+
+def test_overlap_check_uses_filtered_index(large_db):
+    start_time = datetime.datetime(2025, 6, 1, 10)
+    filters = _overlap_filters(3, start_time, start_time + datetime.timedelta(hours=1), exclude_appointment_id=42)
+    statement = select(select(Appointment.id).where(*filters).exists()) # As _overlap_exists runs it
+
+    plan = _plan(large_db, statement)
+
+    assert "ix_appointments_blocking_resource_id_end_time_start_time" in plan, plan
+    assert "SCAN appointments" not in plan, plan
+
+
+def test_owner_listing_uses_owner_index(large_db):
+    statement = select(Appointment.id).where(Appointment.owner_id == 7).order_by(Appointment.start_time, Appointment.id)
+
+    plan = _plan(large_db, statement)
+
+    assert "ix_appointments_owner_id_start_time" in plan, plan
+    assert "SCAN appointments" not in plan, plan
@@ -0,0 +1,94 @@
+"""
+Concurrency check for _reserve_slot: many threads booking and moving
+appointments on the same few resources at once must never leave two
+blocking appointments overlapping on one resource. Each thread uses its own
+session, like concurrent requests do.
+"""
+import datetime
+import random
+import threading
+from collections import defaultdict
+
+from app.crud import crud_appointment
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment, blocking_status_clause
+from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
+
+THREADS = 16
+ATTEMPTS_PER_THREAD = 40
+RESOURCES = ("Stress Room A", "Stress Room B")
+SLOTS = 48 # Quarter-hour starts over 12 hours: dense enough that most attempts collide
+
+
+def _random_slot(rnd: random.Random, base: datetime.datetime):
+    start = base + datetime.timedelta(minutes=15 * rnd.randrange(SLOTS))
+    return start, start + datetime.timedelta(minutes=rnd.choice([30, 60, 90]))
+
+
+def _overlapping_pairs(db) -> list:
+    rows = db.query(Appointment.id, Appointment.resource_id, Appointment.start_time, Appointment.end_time).filter(
+        Appointment.service_name.in_(RESOURCES), blocking_status_clause()
+    ).order_by(Appointment.resource_id, Appointment.start_time).all()
+    by_resource = defaultdict(list)
+    for row in rows:
+        by_resource[row.resource_id].append(row)
+    pairs = []
+    for intervals in by_resource.values():
+        for i, earlier in enumerate(intervals):
+            for later in intervals[i + 1:]:
+                if later.start_time >= earlier.end_time:
+                    break
+                pairs.append((earlier.id, later.id))
+    return pairs
+
+
+def test_concurrent_bookings_never_overlap(owner_id):
+    base = (datetime.datetime.now() + datetime.timedelta(days=30)).replace(hour=8, minute=0, second=0, microsecond=0)
+    barrier = threading.Barrier(THREADS)
+    outcomes = defaultdict(int)
+    errors = []
+    lock = threading.Lock()
+
+    def worker(seed: int) -> None:
+        rnd = random.Random(seed)
+        booked = []
+        barrier.wait() # Start together for maximum contention
+        for _ in range(ATTEMPTS_PER_THREAD):
+            start_time, end_time = _random_slot(rnd, base)
+            service_name = rnd.choice(RESOURCES)
+            with SessionLocal() as db:
+                try:
+                    if booked and rnd.random() < 0.3:
+                        db_appointment = crud_appointment.get_appointment(
+                            db, appointment_id=rnd.choice(booked), owner_id=owner_id
+                        )
+                        crud_appointment.update_appointment(
+                            db, db_appointment=db_appointment, appointment_in=AppointmentUpdate(
+                                service_name=service_name, start_time=start_time, end_time=end_time
+                            ),
+                        )
+                        outcome = "moved"
+                    else:
+                        booked.append(crud_appointment.create_appointment(db, appointment_in=AppointmentCreate(
+                            service_name=service_name, start_time=start_time, end_time=end_time
+                        ), owner_id=owner_id).id)
+                        outcome = "booked"
+                except crud_appointment.SlotConflictError:
+                    outcome = "conflict"
+                except Exception as e:
+                    outcome = "error"
+                    with lock:
+                        errors.append(repr(e))
+            with lock:
+                outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert outcomes["booked"] > 0 and outcomes["conflict"] > 0, dict(outcomes) # The threads did contend
+    with SessionLocal() as db:
+        assert _overlapping_pairs(db) == []
@@ -0,0 +1,74 @@
+"""
+Revocations must reach every worker, not just the one that handled the
+logout or user change. A worker's memory is simulated by token_revocation's
+module state, emptied before the other "worker" syncs from the database.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import deps
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.services import token_revocation
+
+
+@pytest.fixture
+def other_worker(monkeypatch):
+    """Switch token_revocation to the state of a worker that hasn't seen any revocation yet."""
+    def switch():
+        monkeypatch.setattr(token_revocation, "_denied_jtis", {})
+        monkeypatch.setattr(token_revocation, "_revoked_before", {})
+        monkeypatch.setattr(token_revocation, "_synced_at", 0.0)
+    return switch
+
+
+def _sync():
+    asyncio.run(token_revocation.sync())
+
+
+def _current_user(token: str):
+    async def load():
+        async with AsyncSessionLocal() as db:
+            return await deps.get_current_user(db, token)
+    return asyncio.run(load())
+
+
+def test_logout_reaches_other_workers(db, other_worker):
+    token_revocation.revoke_token(db, "logged-out", time.time() + 600)
+    db.commit()
+
+    other_worker()
+    assert not token_revocation.is_denied({"jti": "logged-out"})
+    _sync()
+    assert token_revocation.is_denied({"jti": "logged-out"})
+    assert not token_revocation.is_denied({"jti": "still-valid"})
+
+
+def test_user_revocation_reaches_other_workers(db, owner_id, other_worker):
+    issued_before = time.time() - 5
+    token_revocation.revoke_user_tokens(db, owner_id)
+    db.commit()
+
+    other_worker()
+    assert token_revocation.claims_are_current({"iat": issued_before, "uid": owner_id})
+    _sync()
+    assert not token_revocation.claims_are_current({"iat": issued_before, "uid": owner_id})
+    assert token_revocation.claims_are_current({"iat": time.time() + 1, "uid": owner_id}) # Issued after the revocation
+
+
+def test_user_revocation_rejects_subject_tokens(db, owner_id):
+    # What logout does for a subject-only token, which has no jti of its own
+    email = db.get(User, owner_id).email
+    token = create_access_token(email)
+    assert _current_user(token).id == owner_id
+
+    token_revocation.revoke_user_tokens(db, owner_id)
+    db.commit()
+    with pytest.raises(HTTPException) as rejected:
+        _current_user(token)
+    assert rejected.value.detail == "Token has been revoked"
+    assert _current_user(create_access_token(email)).id == owner_id # Logging in again works at once